@@ -0,0 +1,27 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: 4f3c1a9e7d20
+Revises: b10dcb2d671d
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f3c1a9e7d20'
+down_revision = 'b10dcb2d671d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tasks_created_at_id', 'tasks', ['created_at', 'id'])
+    op.create_index('ix_projects_created_at_id',
+                    'projects', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_projects_created_at_id', table_name='projects')
+    op.drop_index('ix_tasks_created_at_id', table_name='tasks')
@@ -0,0 +1,29 @@
+"""Add descending due date indexes
+
+Revision ID: 5a7d3e9c1b84
+Revises: e1f4b7a9c362
+Create Date: 2026-10-18 21:40:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a7d3e9c1b84'
+down_revision = 'e1f4b7a9c362'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # sort=-due_date orders DESC NULLS LAST, which (due_date, id) can't serve
+    op.create_index('ix_tasks_due_date_desc_id', 'tasks',
+                    [sa.text('due_date DESC NULLS LAST'), sa.text('id DESC')])
+    op.create_index('ix_projects_due_date_desc_id', 'projects',
+                    [sa.text('due_date DESC NULLS LAST'), sa.text('id DESC')])
+
+
+def downgrade():
+    op.drop_index('ix_projects_due_date_desc_id', table_name='projects')
+    op.drop_index('ix_tasks_due_date_desc_id', table_name='tasks')
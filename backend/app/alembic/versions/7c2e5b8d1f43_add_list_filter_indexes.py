@@ -0,0 +1,41 @@
+"""Add indexes for task and project list filters
+
+Revision ID: 7c2e5b8d1f43
+Revises: 4f3c1a9e7d20
+Create Date: 2026-10-18 11:04:27.905631
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e5b8d1f43'
+down_revision = '4f3c1a9e7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tasks_project_id_created_at_id',
+                    'tasks', ['project_id', 'created_at', 'id'])
+    op.create_index('ix_tasks_status_created_at_id',
+                    'tasks', ['status', 'created_at', 'id'])
+    op.create_index('ix_tasks_assignee_created_at_id',
+                    'tasks', ['assignee', 'created_at', 'id'])
+    op.create_index('ix_tasks_due_date_id', 'tasks', ['due_date', 'id'])
+    op.create_index('ix_projects_status_created_at_id',
+                    'projects', ['status', 'created_at', 'id'])
+    op.create_index('ix_projects_assignee_created_at_id',
+                    'projects', ['assignee', 'created_at', 'id'])
+    op.create_index('ix_projects_due_date_id', 'projects', ['due_date', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_projects_due_date_id', table_name='projects')
+    op.drop_index('ix_projects_assignee_created_at_id', table_name='projects')
+    op.drop_index('ix_projects_status_created_at_id', table_name='projects')
+    op.drop_index('ix_tasks_due_date_id', table_name='tasks')
+    op.drop_index('ix_tasks_assignee_created_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_status_created_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_project_id_created_at_id', table_name='tasks')
@@ -0,0 +1,24 @@
+"""Add the owner of task imports
+
+Revision ID: 9e2b6c4f8a17
+Revises: 5a7d3e9c1b84
+Create Date: 2026-10-18 22:05:31.502917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2b6c4f8a17'
+down_revision = '5a7d3e9c1b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('task_imports', sa.Column('owner', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    op.drop_column('task_imports', 'owner')
@@ -0,0 +1,44 @@
+"""Add full-text search vectors and title trigram indexes
+
+Revision ID: a3d91f6c2b58
+Revises: 7c2e5b8d1f43
+Create Date: 2026-10-18 14:37:52.118390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d91f6c2b58'
+down_revision = '7c2e5b8d1f43'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in ('tasks', 'projects'):
+        # Adding a stored generated column rewrites the table
+        op.add_column(table, sa.Column(
+            'search_vector', postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True)))
+        op.create_index(f'ix_{table}_search_vector', table,
+                        ['search_vector'], postgresql_using='gin')
+        op.create_index(f'ix_{table}_title_trgm', table, ['title'],
+                        postgresql_using='gin',
+                        postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade():
+    # pg_trgm is left installed, other objects may depend on it
+    for table in ('projects', 'tasks'):
+        op.drop_index(f'ix_{table}_title_trgm', table_name=table)
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,54 @@
+"""Add analytics_counts materialized view
+
+Revision ID: d5e8a2c47b19
+Revises: a3d91f6c2b58
+Create Date: 2026-10-18 16:52:09.640213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8a2c47b19'
+down_revision = 'a3d91f6c2b58'
+branch_labels = None
+depends_on = None
+
+COUNTS_SELECT = """
+SELECT '{entity}' AS entity,
+       CASE GROUPING(status, priority, assignee, overdue)
+           WHEN 7 THEN 'status'
+           WHEN 11 THEN 'priority'
+           WHEN 13 THEN 'assignee'
+           WHEN 14 THEN 'overdue'
+           ELSE 'total'
+       END AS dimension,
+       COALESCE(status, priority, assignee, overdue::text) AS value,
+       count(*) AS count,
+       now() AS refreshed_at
+FROM (
+    SELECT status, priority, assignee,
+           COALESCE(due_date < current_date, false)
+               AND status IS DISTINCT FROM 'DONE' AS overdue
+    FROM {entity}
+) AS rows
+GROUP BY GROUPING SETS ((status), (priority), (assignee), (overdue), ())
+"""
+
+
+def upgrade():
+    op.execute(
+        "CREATE MATERIALIZED VIEW analytics_counts AS "
+        + COUNTS_SELECT.format(entity="tasks")
+        + " UNION ALL "
+        + COUNTS_SELECT.format(entity="projects")
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX ix_analytics_counts_entity_dimension_value "
+        "ON analytics_counts (entity, dimension, value)"
+    )
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW analytics_counts")
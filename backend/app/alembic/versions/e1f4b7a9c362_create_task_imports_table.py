@@ -0,0 +1,48 @@
+"""Create task_imports table
+
+Revision ID: e1f4b7a9c362
+Revises: d5e8a2c47b19
+Create Date: 2026-10-18 20:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f4b7a9c362'
+down_revision = 'd5e8a2c47b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "task_imports",
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('status', sa.String(length=20),
+                  server_default='PENDING', nullable=False),
+        sa.Column('format', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('path', sa.String(length=1024), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(),
+                  server_default='0', nullable=False),
+        sa.Column('imported_rows', sa.Integer(),
+                  server_default='0', nullable=False),
+        sa.Column('failed_rows', sa.Integer(),
+                  server_default='0', nullable=False),
+        sa.Column('errors', postgresql.JSONB(),
+                  server_default=sa.text("'[]'::jsonb"), nullable=False),
+        sa.Column('detail', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(),
+                  server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(),
+                  onupdate=sa.func.now(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("task_imports")
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from app.db.pool import PoolStatus, get_pool_status
+from app.db.session import async_engine, engine
+
+admin_router = r = APIRouter()
+
+
+class DbPools(BaseModel):
+    async_pool: PoolStatus
+    sync_pool: PoolStatus
+
+
+@r.get("/admin/db/pool", response_model=DbPools)
+async def db_pool_status():
+    """
+    Live connection pool stats of this worker process
+    """
+    return DbPools(
+        async_pool=get_pool_status(async_engine.pool),
+        sync_pool=get_pool_status(engine.pool),
+    )
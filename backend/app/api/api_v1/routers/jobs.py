@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core import config
+from app.core.jobs import JobStatus, wait_for_job
+
+jobs_router = r = APIRouter()
+
+
+@r.get("/jobs/{job_id}", response_model=JobStatus)
+async def read_job(job_id: str, wait: float = Query(0, ge=0, le=config.JOB_MAX_WAIT)):
+    """
+    Status of a background job. With wait, long-polls for up to that many
+    seconds until the job finished.
+    """
+    status = await wait_for_job(job_id, wait)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
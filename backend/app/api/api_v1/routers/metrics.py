@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.metrics import celery_queue_collector, metrics_registry
+
+metrics_router = r = APIRouter()
+
+
+# Sync, so reading the multiprocess files and the queue lengths from
+# Redis happens in the threadpool
+@r.get("/metrics", response_class=Response, include_in_schema=False)
+def read_metrics():
+    """
+    Prometheus metrics of every process of this deployment, see app.core.metrics
+    """
+    return Response(generate_latest(metrics_registry(celery_queue_collector)), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import exc
+
+from app.core import config
+from app.db.pool import InstrumentedQueuePool, get_pool_status
+from app.db.session import get_async_connect_args
+
+
+def test_db_pool_status(client, superuser_token_headers):
+    response = client.get(
+        "/api/v1/admin/db/pool", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    async_pool = response.json()["async_pool"]
+    assert async_pool["pool"] == "InstrumentedAsyncQueuePool"
+    assert async_pool["size"] == config.DB_POOL_SIZE
+    assert async_pool["max_overflow"] == config.DB_MAX_OVERFLOW
+    assert {"checked_out", "overflow", "timeouts", "wait_seconds_total"} <= (
+        async_pool.keys()
+    )
+
+
+def test_db_pool_status_requires_superuser(client, user_token_headers):
+    response = client.get("/api/v1/admin/db/pool", headers=user_token_headers)
+    assert response.status_code == 403
+
+
+def test_pool_counts_timeouts(test_db):
+    pool = InstrumentedQueuePool(
+        test_db.connection().engine.raw_connection,
+        pool_size=1,
+        max_overflow=0,
+        timeout=0.01,
+    )
+    conn = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    status = get_pool_status(pool)
+    assert status.checked_out == 1
+    assert status.checkouts == 2
+    assert status.timeouts == 1
+    assert status.wait_seconds_max > 0
+    conn.close()
+
+    pool.dispose()
+    assert get_pool_status(pool.recreate()).checkouts == 2
+
+
+def test_pgbouncer_connect_args(monkeypatch):
+    assert get_async_connect_args() == {}
+    monkeypatch.setattr(config, "DB_PGBOUNCER", True)
+    connect_args = get_async_connect_args()
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
@@ -0,0 +1,83 @@
+import pytest
+
+from app.core import jobs
+from app.core.celery_app import LOW_QUEUE, celery_app
+
+
+class FakeResult:
+    """
+    What the result backend knows about a job, set by the tests
+    """
+    states: dict = {}
+
+    def __init__(self, job_id):
+        self.state, self.result = self.states.get(job_id, ("PENDING", None))
+        self.date_done = None if self.state == "PENDING" else "2023-07-31T12:00:00"
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """
+    Jobs sent to the broker, with results from FakeResult.states
+    """
+    sent = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, **options: sent.append((name, options)))
+    monkeypatch.setattr(celery_app, "AsyncResult", FakeResult)
+    monkeypatch.setattr(FakeResult, "states", {})
+    return sent
+
+
+def test_background_task_status(client, sent):
+    job_id = client.get("/api/v1/background_task").json()["job_id"]
+    assert sent == [("app.celery_tasks.example_task", {
+        "args": ["Hello World"], "kwargs": {}, "task_id": job_id, "queue": None, "priority": None})]
+
+    response = client.get(f"/api/v1/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["state"] == "PENDING"
+    assert response.json()["name"] == "app.celery_tasks.example_task"
+    assert not response.json()["ready"]
+
+    FakeResult.states[job_id] = ("SUCCESS", "test task returns Hello World")
+    response = client.get(f"/api/v1/jobs/{job_id}", params={"wait": 5})
+    assert response.json()["ready"]
+    assert response.json()["result"] == "test task returns Hello World"
+
+
+def test_long_poll_times_out(client, sent):
+    job_id = jobs.enqueue("app.celery_tasks.example_task", args=["a"])
+
+    response = client.get(f"/api/v1/jobs/{job_id}", params={"wait": 0.3})
+    assert response.json()["state"] == "PENDING"
+    assert client.get(f"/api/v1/jobs/{job_id}", params={"wait": 3600}).status_code == 422
+
+
+def test_failed_job(client, sent):
+    job_id = jobs.enqueue("app.celery_tasks.example_task", args=["a"])
+    FakeResult.states[job_id] = ("FAILURE", ValueError("boom"))
+
+    response = client.get(f"/api/v1/jobs/{job_id}")
+    assert response.json()["error"] == "ValueError('boom')"
+
+
+def test_unknown_job(client):
+    assert client.get("/api/v1/jobs/nope").status_code == 404
+
+
+def test_unique_jobs(sent):
+    job_id = jobs.enqueue("app.celery_tasks.refresh_analytics", unique_for=60)
+    assert jobs.enqueue("app.celery_tasks.refresh_analytics", unique_for=60) == job_id
+    assert jobs.enqueue("app.celery_tasks.example_task", args=["a"], unique_for=60) != job_id
+    assert len(sent) == 2
+
+    task = celery_app.tasks["app.celery_tasks.refresh_analytics"]
+    jobs.release_unique_job(job_id, task, [], {}, state="RETRY")
+    assert jobs.enqueue("app.celery_tasks.refresh_analytics", unique_for=60) == job_id
+    jobs.release_unique_job(job_id, task, [], {}, state="SUCCESS")
+    assert jobs.enqueue("app.celery_tasks.refresh_analytics", unique_for=60) != job_id
+
+
+def test_routes():
+    route = celery_app.amqp.router.route({}, "app.celery_tasks.import_tasks", args=[1])
+    assert route["queue"].name == LOW_QUEUE
+    assert celery_app.tasks["app.celery_tasks.import_tasks"].rate_limit is not None
@@ -0,0 +1,108 @@
+import os
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from redis.exceptions import ConnectionError
+
+from app.core import config, metrics, security
+from app.main import app
+
+
+class FakePipeline:
+    lengths = {"high-queue": 1, "main-queue": 4, "low-queue": 0}
+
+    def __init__(self):
+        self.keys = []
+
+    def llen(self, key: str):
+        self.keys.append(key)
+
+    def execute(self):
+        # Every priority step holds the queue's length
+        return [self.lengths[key.split("\x06\x16")[0]] for key in self.keys]
+
+
+class FakeRedis:
+    def pipeline(self):
+        return FakePipeline()
+
+
+def scrape(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {family.name: family for family in text_string_to_metric_families(response.text)}
+
+
+def sample(family, name: str, **labels) -> float:
+    [value] = [s.value for s in family.samples if s.name == name and labels.items() <= s.labels.items()]
+    return value
+
+
+def test_request_duration_per_route(client, monkeypatch):
+    monkeypatch.setattr(metrics, "get_redis", FakeRedis)
+    task_id = client.post("/api/v1/tasks", json={"title": "a"}).json()["id"]
+    labels = {"method": "GET", "route": "/api/v1/tasks/{task_id}", "status": "200"}
+    before = REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+    client.get(f"/api/v1/tasks/{task_id}")
+    client.get(f"/api/v1/tasks/{task_id}")
+
+    families = scrape(client)
+    duration = families["http_request_duration_seconds"]
+    assert sample(duration, "http_request_duration_seconds_count", **labels) == before + 2
+    # The scrape itself is in progress
+    assert sample(families["http_requests_in_progress"], "http_requests_in_progress", method="GET") >= 1
+
+
+def test_unmatched_route(client, monkeypatch):
+    monkeypatch.setattr(metrics, "get_redis", FakeRedis)
+    client.get("/api/v1/nothing/here")
+    duration = scrape(client)["http_request_duration_seconds"]
+    assert sample(duration, "http_request_duration_seconds_count", route="unmatched", status="404") >= 1
+
+
+def test_celery_queue_length(client, monkeypatch):
+    monkeypatch.setattr(metrics, "get_redis", FakeRedis)
+    queue_length = scrape(client)["celery_queue_length"]
+    steps = len(metrics.celery_app.conf.broker_transport_options["priority_steps"])
+    assert {s.labels["queue"]: s.value for s in queue_length.samples} == {
+        "high-queue": steps, "main-queue": 4 * steps, "low-queue": 0}
+
+
+class DownRedis:
+    def pipeline(self):
+        raise ConnectionError("Connection refused")
+
+
+def test_metrics_without_redis(client, monkeypatch):
+    # The queue lengths are left out while the broker is down
+    monkeypatch.setattr(metrics, "get_redis", DownRedis)
+    families = scrape(client)
+    assert "celery_queue_length" not in families
+    assert "http_request_duration_seconds" in families
+
+
+def test_password_hash_duration(client, test_user, monkeypatch):
+    # Stand-ins keep the test fast, the time around them is what's measured
+    monkeypatch.setattr(security, "get_password_hash", lambda password: "supersecrethash")
+    monkeypatch.setattr(security, "verify_password", lambda password, hashed: True)
+
+    def count(operation: str) -> float:
+        return REGISTRY.get_sample_value("password_hash_duration_seconds_count", {"operation": operation}) or 0
+
+    hashed, verified = count("hash"), count("verify")
+    client.post("/api/signup", data={"username": "some@email.com", "password": "randompassword"})
+    client.post("/api/token", data={"username": test_user.email, "password": "nottheactualpass"})
+    assert (count("hash"), count("verify")) == (hashed + 1, verified + 1)
+
+
+def test_shutdown_marks_process_dead(monkeypatch):
+    dead = []
+    monkeypatch.setattr(metrics, "MULTIPROCESS", True)
+    monkeypatch.setattr(metrics.multiprocess, "mark_process_dead", dead.append)
+    monkeypatch.setattr(config, "PRINCIPAL_CACHE_REDIS_INVALIDATION", False)
+
+    # Runs the startup and shutdown handlers
+    with TestClient(app):
+        assert dead == []
+    assert dead == [os.getpid()]
@@ -0,0 +1,57 @@
+import pytest
+
+from sqlalchemy.orm import Session
+
+from app.db.session import get_async_db
+from app.main import app
+
+
+def test_root_opens_no_session(client, monkeypatch):
+    # Counts sync sessions and the ones AsyncSessions wrap, whatever their engine
+    sessions = []
+    session_init = Session.__init__
+
+    def counted_init(self, *args, **kwargs):
+        sessions.append(self)
+        session_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(Session, "__init__", counted_init)
+    response = client.get("/api/v1")
+    assert response.status_code == 200
+    assert sessions == []
+
+
+def test_one_session_per_request(client, superuser_token_headers):
+    get_test_async_db = app.dependency_overrides[get_async_db]
+    sessions = []
+
+    async def get_counted_async_db():
+        async for db in get_test_async_db():
+            sessions.append(db)
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_counted_async_db
+    response = client.get("/api/v1/users", headers=superuser_token_headers)
+    assert response.status_code == 200
+    assert len(sessions) == 1
+
+
+def test_query_budget(client, query_budget):
+    project_id = client.post("/api/v1/projects", json={"title": "a"}).json()["id"]
+    with pytest.raises(pytest.fail.Exception, match="2 statements in one request, over the budget of 1"):
+        with query_budget(1):
+            client.get(f"/api/v1/projects/{project_id}")
+
+
+def test_query_report_shows_repeated_statements(query_recorder):
+    report = query_recorder.report([
+        "SELECT tasks.id FROM tasks WHERE tasks.project_id = $1::INTEGER",
+        "SELECT projects.id FROM projects WHERE projects.id IN ($1::INTEGER, $2::INTEGER)",
+        "SELECT tasks.id FROM tasks WHERE tasks.project_id = $1::INTEGER",
+    ])
+    assert report.splitlines()[:3] == [
+        "Repeated statements:",
+        "  2x SELECT tasks.id FROM tasks WHERE tasks.project_id = ?",
+        "Statements:",
+    ]
+    assert "WHERE projects.id IN (?, ...)" in report
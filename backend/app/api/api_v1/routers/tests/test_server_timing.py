@@ -0,0 +1,43 @@
+import orjson
+
+from app.api.timing import access_logger
+
+
+def parse_server_timing(header: str) -> dict:
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+def test_server_timing_attributes_database_time(client):
+    task_id = client.post("/api/v1/tasks", json={"title": "a"}).json()["id"]
+    response = client.get(f"/api/v1/tasks/{task_id}")
+    assert response.status_code == 200
+    metrics = parse_server_timing(response.headers["Server-Timing"])
+    assert set(metrics) == {"db", "pool", "serialize", "app", "total"}
+    assert metrics["db"]["desc"] == '"1 queries"'
+    assert 0 < float(metrics["db"]["dur"]) <= float(metrics["total"]["dur"])
+    assert float(metrics["serialize"]["dur"]) > 0
+
+
+def test_server_timing_without_queries(client):
+    response = client.get("/api/v1")
+    metrics = parse_server_timing(response.headers["Server-Timing"])
+    assert metrics["db"] == {"dur": "0.0", "desc": '"0 queries"'}
+
+
+def test_access_log(client, caplog):
+    task_id = client.post("/api/v1/tasks", json={"title": "a"}).json()["id"]
+    access_logger.addHandler(caplog.handler)
+    try:
+        client.get(f"/api/v1/tasks/{task_id}")
+    finally:
+        access_logger.removeHandler(caplog.handler)
+
+    [record] = [record for record in caplog.records if record.name == "app.access"]
+    line = orjson.loads(record.getMessage())
+    assert line["route"] == "/api/v1/tasks/{task_id}"
+    assert (line["method"], line["status"], line["db_queries"]) == ("GET", 200, 1)
+    assert line["duration_ms"] >= line["db_ms"] > 0
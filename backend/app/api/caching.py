@@ -0,0 +1,42 @@
+from email.utils import parsedate_to_datetime
+import typing as t
+
+import orjson
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api.conditional import is_not_modified
+from app.core.cache import read_cache
+
+
+def _dump(response: Response) -> bytes:
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return orjson.dumps(headers) + b"\n" + response.body
+
+
+def _load(entry: bytes) -> Response:
+    headers, body = entry.split(b"\n", 1)
+    return Response(body, headers=orjson.loads(headers))
+
+
+async def cached_response(request: Request, namespace: str, variant: t.Any,
+                          render: t.Callable[[], t.Awaitable[Response]]) -> Response:
+    """
+    The 200 response render() builds, cached in namespace for variant, or
+    a 304 when it matches the client's validators
+    """
+    if read_cache.enabled:
+        async def load() -> bytes:
+            return _dump(await render())
+        response = _load(await read_cache.get_or_load(namespace, variant, load))
+    else:
+        response = await render()
+
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    if etag is not None and is_not_modified(
+            request, etag, last_modified and parsedate_to_datetime(last_modified)):
+        return Response(status_code=304, headers={
+            name: value for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")})
+    return response
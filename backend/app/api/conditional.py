@@ -0,0 +1,73 @@
+import datetime
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+import typing as t
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Clients may cache responses but must revalidate them on every use
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: t.Any, weak: bool = False) -> str:
+    """
+    Entity tag over the parts that determine a representation
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def _opaque(etag: str) -> str:
+    return etag.strip().removeprefix("W/")
+
+
+def _http_date(value: datetime.datetime) -> str:
+    # Timestamps are stored without time zone, in UTC
+    return format_datetime(value.replace(tzinfo=datetime.timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_conditional(request: Request) -> bool:
+    """
+    Whether the request carries validators is_not_modified can match
+    """
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime.datetime | None = None) -> bool:
+    """
+    Whether the client's cached copy is current. If-None-Match uses weak
+    comparison and takes precedence over If-Modified-Since.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or _opaque(etag) in {
+            _opaque(tag) for tag in if_none_match.split(",")
+        }
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(tzinfo=datetime.timezone.utc, microsecond=0) <= since
+
+
+def set_validators(response: Response, etag: str, last_modified: datetime.datetime | None = None):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: datetime.datetime | None = None,
+                 headers: t.Mapping[str, str] | None = None) -> Response:
+    """
+    Empty 304 carrying the validators, returned instead of the response model
+    """
+    response = Response(status_code=304, headers=headers)
+    set_validators(response, etag, last_modified)
+    return response
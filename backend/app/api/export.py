@@ -0,0 +1,64 @@
+import csv
+import datetime
+import io
+from enum import Enum
+import typing as t
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+# Rows fetched from the server-side cursor at a time, and written per chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+    def __str__(self):
+        return self.value
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _csv_value(value: t.Any) -> t.Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+async def _csv_chunks(columns: t.Sequence[str], partitions: t.AsyncIterator[t.Sequence[t.Sequence]]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in partitions:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Only the header when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def _ndjson_chunks(columns: t.Sequence[str], partitions: t.AsyncIterator[t.Sequence[t.Sequence]]):
+    async for rows in partitions:
+        yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def export_response(columns: t.Sequence[str], partitions: t.AsyncIterator[t.Sequence[t.Sequence]],
+                    format: ExportFormat, filename: str) -> StreamingResponse:
+    """
+    Stream partitions of rows with the given columns as CSV or NDJSON, one
+    chunk per partition, so memory use doesn't grow with the export
+    """
+    chunks = _csv_chunks if format == ExportFormat.CSV else _ndjson_chunks
+    return StreamingResponse(
+        chunks(columns, partitions),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
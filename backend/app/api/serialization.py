@@ -0,0 +1,78 @@
+import typing as t
+
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter, create_model
+
+from app.core import config
+from app.core.timing import timed_serialization
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse counting its rendering as the request's serialization
+    time, the default response class
+    """
+
+    def render(self, content: t.Any) -> bytes:
+        with timed_serialization():
+            return super().render(content)
+
+
+class RowSerializer:
+    """
+    Renders plain rows shaped like model to JSON with orjson, skipping the
+    per row validation FastAPI does for a response_model. The TypeAdapter
+    is built once; with VALIDATE_FAST_RESPONSES it checks every payload
+    against model, to catch queries drifting away from the schema.
+    """
+
+    def __init__(self, model: t.Type[BaseModel]):
+        self.model = model
+        self.adapter = TypeAdapter(model)
+        self.list_adapter = TypeAdapter(t.List[model])
+        self._trimmed: t.Dict[t.Tuple[str, ...], RowSerializer] = {}
+
+    def parse_fields(self, fields: str | None) -> t.Tuple[str, ...] | None:
+        """
+        Parse a comma separated fields= parameter into field names in
+        model order, None when it wasn't given
+        """
+        if fields is None:
+            return None
+        names = {name.strip() for name in fields.split(",")} - {""}
+        unknown = names - self.model.model_fields.keys()
+        if not names or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields requested",
+            )
+        return tuple(name for name in self.model.model_fields if name in names)
+
+    def trimmed(self, fields: t.Tuple[str, ...]) -> "RowSerializer":
+        """
+        Serializer of a model with only fields, built once per field set
+        """
+        if fields not in self._trimmed:
+            self._trimmed[fields] = RowSerializer(create_model(
+                f"{self.model.__name__}Fields",
+                **{name: (self.model.model_fields[name].annotation, self.model.model_fields[name])
+                   for name in fields},
+            ))
+        return self._trimmed[fields]
+
+    def one(self, item: t.Mapping[str, t.Any], fields: t.Tuple[str, ...] | None = None,
+            **kwargs) -> TimedORJSONResponse:
+        if fields is not None:
+            return self.trimmed(fields).one({name: item[name] for name in fields}, **kwargs)
+        if config.VALIDATE_FAST_RESPONSES:
+            self.adapter.validate_python(item)
+        return TimedORJSONResponse(item, **kwargs)
+
+    def many(self, items: t.Sequence[t.Mapping[str, t.Any]], fields: t.Tuple[str, ...] | None = None,
+             **kwargs) -> TimedORJSONResponse:
+        if fields is not None:
+            return self.trimmed(fields).many([{name: item[name] for name in fields} for item in items], **kwargs)
+        if config.VALIDATE_FAST_RESPONSES:
+            self.list_adapter.validate_python(items)
+        return TimedORJSONResponse(items, **kwargs)
@@ -0,0 +1,94 @@
+import logging
+import time
+
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import config
+from app.core.timing import RequestTimings, start_timings, stop_timings
+
+# One JSON object per request, see ServerTimingMiddleware
+access_logger = logging.getLogger("app.access")
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    """
+    Server-Timing header value, app being what the database and
+    serialization leave of total
+    """
+    app = max(total - timings.db - timings.pool_wait - timings.serialize, 0.0)
+    return ", ".join([
+        f'db;dur={_ms(timings.db)};desc="{timings.queries} queries"',
+        f"pool;dur={_ms(timings.pool_wait)}",
+        f"serialize;dur={_ms(timings.serialize)}",
+        f"app;dur={_ms(app)}",
+        f"total;dur={_ms(total)}",
+    ])
+
+
+class ServerTimingMiddleware:
+    """
+    Attributes the time of each request to the database, pool waits and
+    JSON serialization. The split up to the response's first byte goes
+    out as a Server-Timing header, the whole request's, streamed body
+    included, as a structured access log line.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_timings()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if config.SERVER_TIMING:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_timings(token)
+            if access_logger.isEnabledFor(logging.INFO):
+                route = scope.get("route")
+                access_logger.info(orjson.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "status": status_code,
+                    "duration_ms": _ms(time.perf_counter() - start),
+                    "db_queries": timings.queries,
+                    "db_ms": _ms(timings.db),
+                    "pool_wait_ms": _ms(timings.pool_wait),
+                    "serialize_ms": _ms(timings.serialize),
+                }).decode())
+
+
+def configure_access_log():
+    """
+    Write the access log to stderr, unless ACCESS_LOG is off or logging
+    was configured for it already
+    """
+    if not config.ACCESS_LOG or access_logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    access_logger.addHandler(handler)
+    access_logger.setLevel(logging.INFO)
+    # The lines are complete, root handlers would only reformat them
+    access_logger.propagate = False
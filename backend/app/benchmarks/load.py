@@ -0,0 +1,412 @@
+"""
+Requests per second and p50/p95/p99 latency of every route of the auth,
+users, tasks and projects routers, driven by concurrent clients against a
+running API. A run can be saved as a baseline, later runs compared to it
+exit with status 1 when a route got slower by more than the tolerance.
+
+    python -m app.benchmarks.load seed --scale 100k
+    python -m app.benchmarks.load run --url http://localhost:8888 --save baseline.json
+    python -m app.benchmarks.load run --url http://localhost:8888 --baseline baseline.json
+
+Seeding replaces every task and project of DATABASE_URL, point it at a
+database kept for benchmarks, and reseed at the baseline's scale before
+comparing: write routes leave rows behind. Runs log in as TEST_USERNAME.
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import random
+import re
+import statistics
+import sys
+import time
+import typing as t
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import text
+
+from app.core import config
+from app.db.session import AsyncSessionLocal, async_engine
+from app.domains.users.db.user_dtos import UserCreate
+from app.domains.users.db.user_repository import create_user, get_user_by_email
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+TASKS_PER_PROJECT = 100
+# Tasks inserted per transaction while seeding
+SEED_CHUNK = 1_000_000
+BULK_SIZE = 100
+
+SEED_PROJECTS = text("""
+    INSERT INTO projects (title, description, due_date, assignee, status, priority, created_at, updated_at)
+    SELECT 'Project ' || i, 'Benchmark project ' || i, date '2024-01-01' + i % 730, 'Assignee ' || i % 50,
+           (ARRAY['TO_DO', 'IN_PROGRESS', 'DONE'])[1 + i % 3], (ARRAY['LOW', 'MEDIUM', 'HIGH'])[1 + i % 3],
+           now() - make_interval(secs => :count - i), now() - make_interval(secs => :count - i)
+    FROM generate_series(1, :count) AS i
+""")
+SEED_TASKS = text("""
+    INSERT INTO tasks (title, description, due_date, assignee, status, priority, project_id, created_at, updated_at)
+    SELECT 'Task ' || i, 'Benchmark task ' || i, date '2024-01-01' + i % 730, 'Assignee ' || i % 500,
+           (ARRAY['TO_DO', 'IN_PROGRESS', 'DONE'])[1 + i % 3], (ARRAY['LOW', 'MEDIUM', 'HIGH'])[1 + i / 3 % 3],
+           1 + i % :projects, now() - make_interval(secs => :count - i), now() - make_interval(secs => :count - i)
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) AS i
+""")
+
+
+async def seed(tasks: int):
+    """
+    Replace tasks and projects with tasks rows spread over projects of
+    TASKS_PER_PROJECT, and make sure the benchmark user exists
+    """
+    projects = max(1, tasks // TASKS_PER_PROJECT)
+    async with async_engine.begin() as connection:
+        await connection.execute(text("TRUNCATE tasks, projects RESTART IDENTITY CASCADE"))
+        await connection.execute(SEED_PROJECTS, {"count": projects})
+    for start in range(1, tasks + 1, SEED_CHUNK):
+        stop = min(start + SEED_CHUNK - 1, tasks)
+        async with async_engine.begin() as connection:
+            await connection.execute(SEED_TASKS, {"start": start, "stop": stop, "projects": projects, "count": tasks})
+        print(f"seeded {stop:,} of {tasks:,} tasks")
+    async with async_engine.begin() as connection:
+        await connection.execute(text("ANALYZE tasks, projects"))
+
+    async with AsyncSessionLocal() as db:
+        if not await get_user_by_email(db, config.TEST_USERNAME):
+            await create_user(db, UserCreate(
+                email=config.TEST_USERNAME, password=config.TEST_PASSWORD, is_active=True, is_superuser=True))
+
+
+class Context:
+    """
+    What routes build their requests from: the client, logged in as the
+    benchmark superuser, and the ids of the seeded rows
+    """
+
+    def __init__(self, client: httpx.AsyncClient, headers: dict, user_id: int,
+                 max_task_id: int, max_project_id: int, seed: int):
+        self.client = client
+        self.headers = headers
+        self.user_id = user_id
+        self.max_task_id = max_task_id
+        self.max_project_id = max_project_id
+        self.random = random.Random(seed)
+
+    def task_id(self) -> int:
+        return self.random.randint(1, self.max_task_id)
+
+    def project_id(self) -> int:
+        return self.random.randint(1, self.max_project_id)
+
+    def email(self) -> str:
+        return f"bench-{uuid4().hex}@example.com"
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Request:
+        return self.client.build_request(method, url, headers=self.headers, **kwargs)
+
+    async def setup(self, method: str, url: str, **kwargs) -> t.Any:
+        """
+        Send a request a route needs before the one it measures, e.g. to
+        create what it deletes
+        """
+        response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+def task_payload(ctx: Context) -> dict:
+    return {"title": f"Bench task {uuid4().hex[:8]}", "description": "Created by the load benchmark",
+            "assignee": "Bench", "status": "to_do", "priority": "medium", "project_id": ctx.project_id()}
+
+
+def project_payload(ctx: Context) -> dict:
+    return {"title": f"Bench project {uuid4().hex[:8]}", "description": "Created by the load benchmark",
+            "assignee": "Bench", "status": "to_do", "priority": "medium"}
+
+
+# Route name to the function building its next request
+ROUTES: t.Dict[str, t.Callable[[Context], t.Awaitable[httpx.Request]]] = {}
+
+
+def route(name: str):
+    def register(prepare):
+        ROUTES[name] = prepare
+        return prepare
+    return register
+
+
+@route("POST /api/token")
+async def login(ctx: Context):
+    return ctx.request("POST", "/api/token", data={"username": config.TEST_USERNAME,
+                                                   "password": config.TEST_PASSWORD})
+
+
+@route("POST /api/signup")
+async def signup(ctx: Context):
+    return ctx.request("POST", "/api/signup", data={"username": ctx.email(), "password": "benchmark"})
+
+
+@route("GET /api/v1/users")
+async def list_users(ctx: Context):
+    return ctx.request("GET", "/api/v1/users")
+
+
+@route("GET /api/v1/users/me")
+async def read_me(ctx: Context):
+    return ctx.request("GET", "/api/v1/users/me")
+
+
+@route("GET /api/v1/users/{user_id}")
+async def read_user(ctx: Context):
+    return ctx.request("GET", f"/api/v1/users/{ctx.user_id}")
+
+
+@route("POST /api/v1/users")
+async def create_user_route(ctx: Context):
+    return ctx.request("POST", "/api/v1/users", json={"email": ctx.email(), "password": "benchmark"})
+
+
+@route("PUT /api/v1/users/{user_id}")
+async def edit_user(ctx: Context):
+    return ctx.request("PUT", f"/api/v1/users/{ctx.user_id}",
+                       json={"first_name": f"Bench {ctx.random.randint(0, 999)}"})
+
+
+@route("DELETE /api/v1/users/{user_id}")
+async def delete_user(ctx: Context):
+    user = await ctx.setup("POST", "/api/v1/users", json={"email": ctx.email(), "password": "benchmark"})
+    return ctx.request("DELETE", f"/api/v1/users/{user['id']}")
+
+
+@route("GET /api/v1/tasks")
+async def list_tasks(ctx: Context):
+    return ctx.request("GET", "/api/v1/tasks", params={"project_id": ctx.project_id()})
+
+
+@route("GET /api/v1/tasks/{task_id}")
+async def read_task(ctx: Context):
+    return ctx.request("GET", f"/api/v1/tasks/{ctx.task_id()}")
+
+
+@route("GET /api/v1/tasks/export")
+async def export_tasks(ctx: Context):
+    return ctx.request("GET", "/api/v1/tasks/export", params={"project_id": ctx.project_id()})
+
+
+@route("POST /api/v1/tasks")
+async def create_task(ctx: Context):
+    return ctx.request("POST", "/api/v1/tasks", json=task_payload(ctx))
+
+
+@route("PUT /api/v1/tasks/{task_id}")
+async def update_task(ctx: Context):
+    return ctx.request("PUT", f"/api/v1/tasks/{ctx.task_id()}", json={"priority": ctx.random.choice(["low", "high"])})
+
+
+@route("DELETE /api/v1/tasks/{task_id}")
+async def delete_task(ctx: Context):
+    task = await ctx.setup("POST", "/api/v1/tasks", json=task_payload(ctx))
+    return ctx.request("DELETE", f"/api/v1/tasks/{task['id']}")
+
+
+@route("POST /api/v1/tasks/bulk")
+async def create_tasks(ctx: Context):
+    return ctx.request("POST", "/api/v1/tasks/bulk", json=[task_payload(ctx) for _ in range(BULK_SIZE)])
+
+
+@route("PATCH /api/v1/tasks/bulk")
+async def update_tasks(ctx: Context):
+    return ctx.request("PATCH", "/api/v1/tasks/bulk", json=[
+        {"id": ctx.task_id(), "priority": ctx.random.choice(["low", "high"])} for _ in range(BULK_SIZE)])
+
+
+@route("DELETE /api/v1/tasks/bulk")
+async def delete_tasks(ctx: Context):
+    results = await ctx.setup("POST", "/api/v1/tasks/bulk", json=[task_payload(ctx) for _ in range(BULK_SIZE)])
+    return ctx.request("DELETE", "/api/v1/tasks/bulk", json=[result["task"]["id"] for result in results])
+
+
+@route("GET /api/v1/projects")
+async def list_projects(ctx: Context):
+    return ctx.request("GET", "/api/v1/projects", params={"assignee": f"Assignee {ctx.random.randint(0, 49)}"})
+
+
+@route("GET /api/v1/projects/{project_id}")
+async def read_project(ctx: Context):
+    return ctx.request("GET", f"/api/v1/projects/{ctx.project_id()}")
+
+
+@route("GET /api/v1/projects/{project_id}/tasks")
+async def read_project_tasks(ctx: Context):
+    return ctx.request("GET", f"/api/v1/projects/{ctx.project_id()}/tasks")
+
+
+@route("GET /api/v1/projects/export")
+async def export_projects(ctx: Context):
+    return ctx.request("GET", "/api/v1/projects/export", params={"assignee": f"Assignee {ctx.random.randint(0, 49)}"})
+
+
+@route("POST /api/v1/projects")
+async def create_project(ctx: Context):
+    return ctx.request("POST", "/api/v1/projects", json=project_payload(ctx))
+
+
+@route("PUT /api/v1/projects/{project_id}")
+async def update_project(ctx: Context):
+    return ctx.request("PUT", f"/api/v1/projects/{ctx.project_id()}",
+                       json={"priority": ctx.random.choice(["low", "high"])})
+
+
+@route("DELETE /api/v1/projects/{project_id}")
+async def delete_project(ctx: Context):
+    project = await ctx.setup("POST", "/api/v1/projects", json=project_payload(ctx))
+    return ctx.request("DELETE", f"/api/v1/projects/{project['id']}")
+
+
+@dataclasses.dataclass
+class RouteResult:
+    requests: int
+    errors: int
+    rps: float
+    # Latencies in milliseconds
+    p50: float
+    p95: float
+    p99: float
+
+
+def summarize(latencies: t.List[float], errors: int, elapsed: float) -> RouteResult:
+    """
+    Result of the requests that took latencies seconds, over elapsed seconds
+    """
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return RouteResult(requests=len(latencies), errors=errors, rps=len(latencies) / elapsed if elapsed else 0.0,
+                       p50=p50 * 1000, p95=p95 * 1000, p99=p99 * 1000)
+
+
+async def measure(ctx: Context, prepare, concurrency: int, duration: float) -> RouteResult:
+    """
+    Send the requests of a route from concurrency clients for duration
+    seconds. The requests a route sets up are only counted in its RPS.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            request = await prepare(ctx)
+            start = time.perf_counter()
+            response = await ctx.client.send(request)
+            latencies.append(time.perf_counter() - start)
+            if response.is_error:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def compare(results: t.Mapping[str, RouteResult], baseline: t.Mapping[str, t.Mapping],
+            tolerance: float) -> t.List[str]:
+    """
+    Regressions of results from baseline: an RPS lower or a latency
+    percentile higher by more than tolerance, or new errors
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result.rps < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result.rps:,.0f} RPS, was {before['rps']:,.0f}")
+        for percentile in ("p50", "p95", "p99"):
+            now, then = getattr(result, percentile), before[percentile]
+            if now > then * (1 + tolerance):
+                regressions.append(f"{name}: {percentile} {now:.1f} ms, was {then:.1f} ms")
+        if result.errors and not before["errors"]:
+            regressions.append(f"{name}: {result.errors} errors, was none")
+    return regressions
+
+
+async def last_id(client: httpx.AsyncClient, url: str, headers: dict) -> int:
+    response = await client.get(url, params={"sort": "-created_at", "limit": 1, "fields": "id"}, headers=headers)
+    response.raise_for_status()
+    rows = response.json()
+    if not rows:
+        raise SystemExit(f"No rows at {url}, seed the database first")
+    return rows[0]["id"]
+
+
+async def run(url: str, routes: t.List[str], concurrency: int, duration: float, warmup: float,
+              seed: int) -> t.Tuple[dict, t.Dict[str, RouteResult]]:
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        response = await client.post("/api/token", data={"username": config.TEST_USERNAME,
+                                                          "password": config.TEST_PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        # Edited by PUT /users/{user_id} instead of the benchmark user
+        user = (await client.post("/api/v1/users", headers=headers,
+                                  json={"email": f"bench-{uuid4().hex}@example.com", "password": "benchmark"})).json()
+        ctx = Context(client, headers, user["id"], await last_id(client, "/api/v1/tasks", headers),
+                      await last_id(client, "/api/v1/projects", headers), seed)
+
+        results = {}
+        for name in routes:
+            if warmup:
+                await measure(ctx, ROUTES[name], concurrency, warmup)
+            results[name] = await measure(ctx, ROUTES[name], concurrency, duration)
+            result = results[name]
+            print(f"{name:42} {result.rps:10,.0f} {result.p50:9.1f} {result.p95:9.1f} {result.p99:9.1f}"
+                  f" {result.errors:7}")
+    settings = {"concurrency": concurrency, "duration": duration}
+    return settings, results
+
+
+def main(args: argparse.Namespace):
+    if args.command == "seed":
+        asyncio.run(seed(SCALES[args.scale]))
+        return
+
+    routes = [name for name in ROUTES if re.search(args.routes, name)]
+    print(f"{'route':42} {'RPS':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    settings, results = asyncio.run(run(args.url, routes, args.concurrency, args.duration, args.warmup, args.seed))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"settings": settings, "routes": {name: dataclasses.asdict(result)
+                                                        for name, result in results.items()}}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline["settings"] != settings:
+            print(f"Baseline ran with {baseline['settings']}, this run with {settings}")
+        regressions = compare(results, baseline["routes"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed_parser = commands.add_parser("seed", help="Replace tasks and projects with seeded ones")
+    seed_parser.add_argument("--scale", choices=SCALES, default="100k")
+    run_parser = commands.add_parser("run", help="Benchmark the routes of a running API")
+    run_parser.add_argument("--url", default="http://localhost:8888")
+    run_parser.add_argument("--routes", default="", help="Only routes whose name matches this regex")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=10, help="Seconds per route")
+    run_parser.add_argument("--warmup", type=float, default=1, help="Seconds per route before measuring")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the random ids and payloads")
+    run_parser.add_argument("--save", help="Write the results to this baseline file")
+    run_parser.add_argument("--baseline", help="Fail on regressions from this baseline file")
+    run_parser.add_argument("--tolerance", type=float, default=0.1,
+                            help="Allowed relative slowdown from the baseline")
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""
+Rows per second of the task list response, rendered the way FastAPI does
+for a response_model from ORM objects (before) and by RowSerializer from
+Core rows (after). Query time is included, the seeded tasks are rolled back.
+
+    python -m app.benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import time
+import typing as t
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_engine
+from app.domains.tasks.api.api_v1.routers.tasks import task_serializer
+from app.domains.tasks.db.projects import project_entity  # noqa: F401, configures Task.project
+from app.domains.tasks.db.tasks import task_dtos, task_entity
+from app.domains.tasks.db.tasks.task_repository import TASK_COLUMNS
+
+response_field = create_response_field(name="response", type_=t.List[task_dtos.Task])
+
+
+async def orm_response(db: AsyncSession, limit: int) -> bytes:
+    db_tasks = (await db.scalars(select(task_entity.Task).limit(limit))).all()
+    content = await serialize_response(field=response_field, response_content=db_tasks)
+    body = JSONResponse(content).body
+    # A session lives for one request, so does its identity map
+    db.expunge_all()
+    return body
+
+
+async def row_response(db: AsyncSession, limit: int) -> bytes:
+    rows = (await db.execute(select(*TASK_COLUMNS).limit(limit))).all()
+    return task_serializer.many([row._asdict() for row in rows]).body
+
+
+async def best_rate(render, db: AsyncSession, rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await render(db, rows)
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+async def main(rows: int, repeat: int):
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        db = AsyncSession(bind=connection)
+        await db.execute(insert(task_entity.Task), [
+            {"title": f"Task {i}", "description": "Benchmark task " * 4, "assignee": "Jane Doe",
+             "status": task_dtos.Status.IN_PROGRESS, "priority": task_dtos.Priority.HIGH}
+            for i in range(rows)
+        ])
+        before = await best_rate(orm_response, db, rows, repeat)
+        after = await best_rate(row_response, db, rows, repeat)
+        await transaction.rollback()
+
+    print(f"ORM + response_model: {before:12,.0f} rows/s")
+    print(f"Core rows + orjson:   {after:12,.0f} rows/s")
+    print(f"speedup:              {after / before:12.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -1,6 +1,22 @@
 from app.core.celery_app import celery_app
+# Connects the worker signals of the job helpers and metrics
+from app.core import jobs, metrics  # noqa: F401
+from app.db.session import engine
+from app.domains.analytics.db import analytics_views
+from app.domains.tasks.db.imports import task_import
 
 
 @celery_app.task(acks_late=True)
 def example_task(word: str) -> str:
     return f"test task returns {word}"
+
+
+@celery_app.task(acks_late=True)
+def refresh_analytics() -> bool:
+    with engine.begin() as connection:
+        return analytics_views.refresh(connection)
+
+
+@celery_app.task(acks_late=True)
+def import_tasks(job_id: int):
+    task_import.run_import(engine, job_id)
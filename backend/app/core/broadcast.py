@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import threading
+import time
+import typing as t
+
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app.core import config
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Messages for one client, delivered on the event loop it subscribed
+    from. A client that falls maxsize messages behind is cut off: get()
+    returns None and it should reconnect and reload.
+    """
+
+    def __init__(self, maxsize: int):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, message: t.Any):
+        """
+        Queue message, from any thread
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The client's event loop is gone
+            pass
+
+    def _put(self, message: t.Any):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self) -> t.Any | None:
+        if self.overflowed:
+            return None
+        message = await self.queue.get()
+        return None if self.overflowed else message
+
+
+class Broadcaster:
+    """
+    Fans messages published by any process out to the subscriptions of
+    this one. With CHANGE_EVENTS=redis they go through Redis pub/sub, one
+    listener thread per process, with memory they stay in the process and
+    off drops them.
+    """
+
+    def __init__(self, channel: str, decode: t.Callable[[bytes], t.Any]):
+        self.channel = channel
+        self.decode = decode
+        self._subscriptions: t.Set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return config.CHANGE_EVENTS in ("redis", "memory")
+
+    def subscribe(self, maxsize: int) -> Subscription:
+        subscription = Subscription(maxsize)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, message: bytes):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+        # Decoded once, shared by every subscription
+        decoded = self.decode(message)
+        for subscription in subscriptions:
+            subscription.put(decoded)
+
+    def publish_sync(self, message: bytes):
+        """
+        Publish message to every process. Blocks, use publish() on the
+        event loop.
+        """
+        if config.CHANGE_EVENTS == "memory":
+            self.dispatch(message)
+        elif config.CHANGE_EVENTS == "redis":
+            try:
+                get_redis().publish(self.channel, message)
+            except RedisError:
+                logger.exception("Failed to publish to %s", self.channel)
+
+    async def publish(self, message: bytes):
+        if config.CHANGE_EVENTS == "memory":
+            self.dispatch(message)
+        elif config.CHANGE_EVENTS == "redis":
+            await run_in_threadpool(self.publish_sync, message)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.dispatch(message["data"])
+            except RedisError:
+                logger.exception("%s listener disconnected", self.channel)
+                time.sleep(1)
+
+    def start_listener(self):
+        threading.Thread(
+            target=self._listen,
+            name=f"{self.channel}-listener",
+            daemon=True,
+        ).start()
@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import logging
+import random
+import threading
+import time
+import typing as t
+import uuid
+
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app.core import config
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Entries expire after a random share of up to this much of the TTL early,
+# so entries filled together don't all expire together
+TTL_JITTER = 0.1
+# Namespace versions are kept this many CACHE_TTLs after their last
+# invalidation, longer than any entry stored under the version before it
+VERSION_TTL_FACTOR = 2
+# How often callers waiting for another caller's load check for its entry
+LOCK_POLL_INTERVAL = 0.02
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for the Redis commands the cache uses, for tests
+    and single process deployments. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: t.Dict[str, t.Tuple[bytes, t.Optional[float]]] = {}
+
+    def _get(self, name: str) -> t.Optional[bytes]:
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[name]
+            return None
+        return value
+
+    def get(self, name: str) -> t.Optional[bytes]:
+        with self._lock:
+            return self._get(name)
+
+    def mget(self, names: t.Sequence[str]) -> t.List[t.Optional[bytes]]:
+        with self._lock:
+            return [self._get(name) for name in names]
+
+    def set(self, name: str, value: bytes, px: t.Optional[int] = None, nx: bool = False) -> t.Optional[bool]:
+        with self._lock:
+            if nx and self._get(name) is not None:
+                return None
+            expires_at = time.monotonic() + px / 1000 if px is not None else None
+            self._entries[name] = (value, expires_at)
+            return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._entries.pop(name, None) is not None for name in names)
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    def flushdb(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class MemoryPipeline:
+    """
+    Queues commands for MemoryBackend like a Redis pipeline
+    """
+
+    def __init__(self, backend: MemoryBackend):
+        self._backend = backend
+        self._commands: t.List[t.Tuple[str, tuple]] = []
+
+    def set(self, name: str, value: bytes, px: t.Optional[int] = None) -> "MemoryPipeline":
+        self._commands.append(("set", (name, value, px)))
+        return self
+
+    def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [getattr(self._backend, command)(*args) for command, args in commands]
+
+
+memory_backend = MemoryBackend()
+
+
+class ReadThroughCache:
+    """
+    Read-through cache of serialized values in Redis, or MemoryBackend
+    when CACHE_BACKEND is "memory", switched off with CACHE_BACKEND=off.
+
+    Entries belong to a namespace, e.g. one project, and are stored under
+    the namespace's current version. Invalidating a namespace sets a new
+    random version in the backend, so every process stops reading its
+    entries at once and they expire on their own. Versions expire too, a
+    namespace without one reads version 0. A load that started before an
+    invalidation stores under the old version, and can't bring stale data
+    back.
+
+    On a miss one caller per entry loads the value while the others wait
+    for it. Redis errors are logged and the value loaded directly.
+    """
+
+    def __init__(self, prefix: str = "cache"):
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return config.CACHE_BACKEND != "off" and config.CACHE_TTL > 0
+
+    @property
+    def backend(self):
+        if config.CACHE_BACKEND == "memory":
+            return memory_backend
+        return get_redis()
+
+    def _version_key(self, namespace: str) -> str:
+        return f"{self.prefix}:v:{namespace}"
+
+    def _lookup(self, namespace: str, digest: str) -> t.Tuple[str, t.Optional[bytes], bool]:
+        """
+        Key of the entry, its value and, on a miss, whether this caller
+        got the lock to load it
+        """
+        backend = self.backend
+        version = (backend.get(self._version_key(namespace)) or b"0").decode()
+        key = f"{self.prefix}:{namespace}:{version}:{digest}"
+        value = backend.get(key)
+        if value is not None:
+            return key, value, False
+        locked = backend.set(f"{key}:lock", b"1", px=int(config.CACHE_LOCK_TTL * 1000), nx=True)
+        return key, None, bool(locked)
+
+    def _store(self, key: str, value: bytes):
+        ttl = config.CACHE_TTL * random.uniform(1 - TTL_JITTER, 1)
+        backend = self.backend
+        backend.set(key, value, px=int(ttl * 1000))
+        backend.delete(f"{key}:lock")
+
+    async def _wait(self, key: str) -> t.Optional[bytes]:
+        """
+        Value another caller is loading, None if it gave up or took longer
+        than CACHE_LOCK_TTL
+        """
+        deadline = time.monotonic() + config.CACHE_LOCK_TTL
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            value, lock = await run_in_threadpool(self.backend.mget, [key, f"{key}:lock"])
+            if value is not None or lock is None:
+                return value
+        return None
+
+    async def get_or_load(self, namespace: str, variant: t.Any,
+                          load: t.Callable[[], t.Awaitable[bytes]]) -> bytes:
+        """
+        Value cached for variant in namespace, load()ed and cached on a miss.
+        variant must have a stable repr, e.g. a tuple of query parameters.
+        """
+        if not self.enabled:
+            return await load()
+        digest = hashlib.blake2b(repr(variant).encode(), digest_size=16).hexdigest()
+        try:
+            key, value, locked = await run_in_threadpool(self._lookup, namespace, digest)
+            if value is None and not locked:
+                value = await self._wait(key)
+        except RedisError:
+            logger.exception("Cache lookup failed")
+            return await load()
+        if value is not None:
+            return value
+
+        try:
+            value = await load()
+        except BaseException:
+            if locked:
+                await self._release(key)
+            raise
+        try:
+            await run_in_threadpool(self._store, key, value)
+        except RedisError:
+            logger.exception("Cache store failed")
+        return value
+
+    async def _release(self, key: str):
+        try:
+            await run_in_threadpool(self.backend.delete, f"{key}:lock")
+        except RedisError:
+            logger.exception("Cache lock release failed")
+
+    def _bump(self, namespaces: t.Iterable[str]):
+        # Random rather than INCR: once the key expired, counting up again
+        # from 0 could reach a version whose entries are still cached
+        ttl = int(config.CACHE_TTL * VERSION_TTL_FACTOR * 1000)
+        pipeline = self.backend.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipeline.set(self._version_key(namespace), uuid.uuid4().hex.encode(), px=ttl)
+        pipeline.execute()
+
+    def bump(self, *namespaces: str):
+        """
+        Drop the entries of namespaces, in every process. Blocks, use
+        invalidate() on the event loop. A failure is logged, the write
+        that invalidates already committed: see CACHE_TTL.
+        """
+        if not self.enabled or not namespaces:
+            return
+        try:
+            self._bump(set(namespaces))
+        except RedisError:
+            logger.exception("Cache invalidation failed")
+
+    async def invalidate(self, *namespaces: str):
+        if self.enabled and namespaces:
+            await run_in_threadpool(self.bump, *namespaces)
+
+
+read_cache = ReadThroughCache()
@@ -1,5 +1,55 @@
 from celery import Celery
+from kombu import Queue
 
-celery_app = Celery("worker", broker="redis://redis:6379/0")
+from app.core import config
 
-celery_app.conf.task_routes = {"app.celery_tasks.*": "main-queue"}
+celery_app = Celery("worker", broker=config.REDIS_URL, backend=config.CELERY_RESULT_BACKEND)
+
+# Workers consume queues in this order, so quick interactive jobs don't
+# wait behind bulk ones
+HIGH_QUEUE = "high-queue"
+MAIN_QUEUE = "main-queue"
+LOW_QUEUE = "low-queue"
+
+celery_app.conf.update(
+    task_queues=[Queue(name, routing_key=name) for name in (HIGH_QUEUE, MAIN_QUEUE, LOW_QUEUE)],
+    task_default_queue=MAIN_QUEUE,
+    task_routes={
+        "app.celery_tasks.import_tasks": {"queue": LOW_QUEUE},
+        "app.celery_tasks.refresh_analytics": {"queue": LOW_QUEUE},
+        "app.celery_tasks.*": {"queue": MAIN_QUEUE},
+    },
+    broker_transport_options={
+        # Priorities 0 (first) to 9 within each queue, emulated by the
+        # Redis transport with one list per priority
+        "priority_steps": list(range(10)),
+        # Empty the queues a worker consumes in the order it lists them
+        "queue_order_strategy": "priority",
+    },
+    task_default_priority=5,
+    # Jobs are acknowledged when done, so those of a worker that dies are
+    # redelivered, and each process only reserves the job it runs next, so
+    # a long job doesn't hold back the ones queued behind it
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=config.CELERY_PREFETCH_MULTIPLIER,
+    worker_concurrency=config.CELERY_CONCURRENCY or None,
+    worker_max_tasks_per_child=config.CELERY_MAX_TASKS_PER_CHILD,
+    # Report STARTED, and keep the name and arguments of each job with its result
+    task_track_started=True,
+    result_extended=True,
+    result_expires=config.CELERY_RESULT_EXPIRES,
+    task_annotations={
+        "app.celery_tasks.import_tasks": {"rate_limit": config.IMPORT_RATE_LIMIT},
+    },
+)
+
+if config.ANALYTICS_REFRESH_MODE == "celery":
+    celery_app.conf.beat_schedule = {
+        "refresh-analytics": {
+            "task": "app.celery_tasks.refresh_analytics",
+            "schedule": config.ANALYTICS_REFRESH_INTERVAL,
+            # A refresh still queued when the next one is due is dropped
+            "options": {"expires": config.ANALYTICS_REFRESH_INTERVAL},
+        },
+    }
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,102 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 TEST_USERNAME = os.getenv("TEST_USERNAME")
 TEST_PASSWORD = os.getenv("TEST_PASSWORD")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# Celery keeps job states and results in CELERY_RESULT_BACKEND for
+# CELERY_RESULT_EXPIRES seconds. Each worker runs CELERY_CONCURRENCY
+# processes (0 for one per CPU), each reserving CELERY_PREFETCH_MULTIPLIER
+# jobs ahead, and replaces a process after CELERY_MAX_TASKS_PER_CHILD jobs.
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", "86400"))
+CELERY_CONCURRENCY = int(os.getenv("CELERY_CONCURRENCY", "0"))
+CELERY_PREFETCH_MULTIPLIER = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "1"))
+CELERY_MAX_TASKS_PER_CHILD = int(os.getenv("CELERY_MAX_TASKS_PER_CHILD", "1000"))
+# Longest a job status request may wait for the job to finish, in seconds
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))
+
+# Connection pool of each engine, per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds after which a connection is replaced, -1 to keep it forever
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Connect through PgBouncer in transaction mode: no prepared statement
+# caching and unique statement names. PgBouncer should run DISCARD ALL
+# (server_reset_query_always) so unnamed leftovers don't pile up.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+# Authenticated users are cached per process for this many seconds (0 disables)
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+# Broadcast principal cache invalidations to other processes through Redis
+PRINCIPAL_CACHE_REDIS_INVALIDATION = os.getenv(
+    "PRINCIPAL_CACHE_REDIS_INVALIDATION", "false").lower() == "true"
+
+# Password hashing runs off the event loop in a "process" or "thread" pool.
+# The first scheme hashes new passwords, the others are only verified and
+# are rehashed on login, as are hashes with other rounds than configured.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_SCHEMES = os.getenv(
+    "PASSWORD_HASH_SCHEMES", "sha512_crypt").split(",")
+PASSWORD_HASH_ROUNDS = os.getenv("PASSWORD_HASH_ROUNDS")
+
+# Validate list and detail responses built from rows against their response
+# model. Costs what the fast serialization path saves, meant for tests.
+VALIDATE_FAST_RESPONSES = os.getenv(
+    "VALIDATE_FAST_RESPONSES", "false").lower() == "true"
+
+# Analytics views are refreshed by a scheduled "celery" job, or "on_demand"
+# by the request that finds them older than the refresh interval (seconds)
+ANALYTICS_REFRESH_MODE = os.getenv("ANALYTICS_REFRESH_MODE", "celery")
+ANALYTICS_REFRESH_INTERVAL = float(
+    os.getenv("ANALYTICS_REFRESH_INTERVAL", "60"))
+
+# Task and project reads are cached in "redis", in process ("memory", for
+# tests and single process deployments) or not at all ("off"), for up to
+# CACHE_TTL seconds. A miss is loaded once, others wait up to
+# CACHE_LOCK_TTL seconds for it. Writes invalidate what they change, but
+# one that can't reach Redis only logs it, so reads can then be up to
+# CACHE_TTL seconds stale.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_LOCK_TTL = float(os.getenv("CACHE_LOCK_TTL", "5"))
+
+# Uploaded task imports wait in IMPORT_DIR, which the API and the Celery
+# workers must share, and are loaded IMPORT_BATCH_SIZE rows per COPY.
+# Jobs keep the first IMPORT_MAX_ERRORS rejected rows.
+IMPORT_DIR = os.getenv("IMPORT_DIR", os.path.join(tempfile.gettempdir(), "task-imports"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+# A running import without progress for IMPORT_CLAIM_TIMEOUT seconds can
+# be taken over, by the redelivery of a job whose worker died
+IMPORT_CLAIM_TIMEOUT = float(os.getenv("IMPORT_CLAIM_TIMEOUT", "600"))
+# Celery rate limit of import jobs, per worker, e.g. "10/m"
+IMPORT_RATE_LIMIT = os.getenv("IMPORT_RATE_LIMIT", "10/m")
+
+# Task and project change events reach the /stream clients of every
+# process through "redis" pub/sub, only those of the publishing process
+# ("memory", for tests) or nobody ("off"). A client falling
+# STREAM_QUEUE_SIZE events behind is disconnected. SSE streams send a
+# keep-alive comment every STREAM_HEARTBEAT seconds.
+CHANGE_EVENTS = os.getenv("CHANGE_EVENTS", "redis")
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "1000"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+# Send each request's database, pool wait and serialization time as a
+# Server-Timing header, and log them with the request as a JSON line
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() == "true"
+
+# /metrics reports the process it runs in, which is all of the API as
+# docker-compose runs it, one uvicorn process. Several API processes
+# (uvicorn --workers) or Celery pool processes report as one with
+# PROMETHEUS_MULTIPROC_DIR naming a directory they share, emptied before
+# they start. Processes drop their live gauges as they exit. Celery
+# workers serve their metrics on WORKER_METRICS_PORT (0 disables).
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
 
 
 API_V1_STR = "/api/v1"
@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+import hashlib
+import time
+import typing as t
+from uuid import uuid4
+
+import orjson
+from celery.signals import task_postrun
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from app.core import config
+from app.core.celery_app import celery_app
+from app.core.redis import get_redis
+
+# How often a long-polling status request checks on its job
+JOB_POLL_INTERVAL = 0.25
+
+
+class JobStatus(BaseModel):
+    id: str
+    name: str
+    # PENDING until a worker starts the job, then STARTED, RETRY, SUCCESS
+    # or FAILURE, or REVOKED
+    state: str
+    ready: bool
+    result: t.Any = None
+    error: str | None = None
+    date_done: datetime.datetime | None = None
+
+
+def _job_key(job_id: str) -> str:
+    return f"jobs:{job_id}"
+
+
+def _unique_key(name: str, args: t.Sequence, kwargs: t.Mapping | None) -> str:
+    digest = hashlib.blake2b(
+        orjson.dumps([name, list(args), kwargs or {}], option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    return f"jobs:unique:{digest}"
+
+
+def enqueue(name: str, args: t.Sequence = (), kwargs: t.Mapping | None = None, queue: str | None = None,
+            priority: int | None = None, unique_for: float | None = None) -> str:
+    """
+    Send the task called name to the workers and return the job id. The
+    queue defaults to the task's route, priority runs from 0 (first) to 9.
+
+    With unique_for, enqueuing the same task with the same arguments while
+    a job for it is queued or running, and for at most unique_for seconds,
+    returns that job's id instead.
+    """
+    redis = get_redis()
+    job_id = str(uuid4())
+    if unique_for:
+        unique_key = _unique_key(name, args, kwargs)
+        if not redis.set(unique_key, job_id.encode(), px=int(unique_for * 1000), nx=True):
+            existing_id = redis.get(unique_key)
+            if existing_id is not None:
+                return existing_id.decode()
+            redis.set(unique_key, job_id.encode(), px=int(unique_for * 1000))
+    # Results don't tell unknown jobs from queued ones, so remember the job
+    redis.set(_job_key(job_id), name.encode(), px=config.CELERY_RESULT_EXPIRES * 1000)
+    celery_app.send_task(name, args=list(args), kwargs=dict(kwargs or {}), task_id=job_id,
+                         queue=queue, priority=priority)
+    return job_id
+
+
+@task_postrun.connect
+def release_unique_job(task_id: str, task, args, kwargs, state: str | None = None, **_):
+    """
+    Let a unique job be enqueued again once it finished, in the worker
+    """
+    if state == "RETRY":
+        return
+    redis = get_redis()
+    unique_key = _unique_key(task.name, args, kwargs)
+    if redis.get(unique_key) == task_id.encode():
+        redis.delete(unique_key)
+
+
+def get_job_status(job_id: str) -> JobStatus | None:
+    """
+    Status of a job enqueued in the last CELERY_RESULT_EXPIRES seconds,
+    None for other ids
+    """
+    name = get_redis().get(_job_key(job_id))
+    if name is None:
+        return None
+    result = celery_app.AsyncResult(job_id)
+    state = result.state
+    ready = state in ("SUCCESS", "FAILURE", "REVOKED")
+    return JobStatus(
+        id=job_id,
+        name=name.decode(),
+        state=state,
+        ready=ready,
+        result=result.result if state == "SUCCESS" else None,
+        error=repr(result.result) if state == "FAILURE" else None,
+        # The backend returns an ISO string
+        date_done=result.date_done if ready else None,
+    )
+
+
+async def wait_for_job(job_id: str, wait: float) -> JobStatus | None:
+    """
+    Status of a job once it is ready, or after wait seconds
+    """
+    deadline = time.monotonic() + min(wait, config.JOB_MAX_WAIT)
+    while True:
+        status = await run_in_threadpool(get_job_status, job_id)
+        if status is None or status.ready or time.monotonic() >= deadline:
+            return status
+        await asyncio.sleep(JOB_POLL_INTERVAL)
@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+import typing as t
+
+from celery.signals import task_postrun, task_prerun, worker_process_shutdown, worker_ready
+from kombu.transport.redis import Channel
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from redis.exceptions import RedisError
+
+from app.core import config
+from app.core.celery_app import HIGH_QUEUE, LOW_QUEUE, MAIN_QUEUE, celery_app
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# With PROMETHEUS_MULTIPROC_DIR set, every process writes its samples
+# there and a scrape adds them up. Gauges only count live processes, see
+# mark_process_dead.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to handle a request, until its last byte is sent",
+    ["method", "route", "status"])
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", ["method"], multiprocess_mode="livesum")
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Connections the pools keep open", ["pool"], multiprocess_mode="livesum")
+DB_POOL_MAX_OVERFLOW = Gauge(
+    "db_pool_max_overflow", "Connections the pools may open beyond their size", ["pool"], multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections in use", ["pool"], multiprocess_mode="livesum")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time to check out a connection, connecting included", ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts", "Checkouts that gave up waiting for a connection", ["pool"])
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Time to hash or verify a password, waiting for the executor included",
+    ["operation"], buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds", "Time a worker ran a job for", ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600))
+
+
+class CeleryQueueCollector:
+    """
+    Jobs waiting in each queue, read from the broker at scrape time. The
+    Redis transport keeps one list per priority step of a queue.
+    """
+
+    queues = (HIGH_QUEUE, MAIN_QUEUE, LOW_QUEUE)
+
+    def _keys(self, queue: str) -> t.List[str]:
+        steps = celery_app.conf.broker_transport_options.get("priority_steps", [0])
+        return [f"{queue}{Channel.sep}{step}" if step else queue for step in steps]
+
+    def collect(self) -> t.Iterator[GaugeMetricFamily]:
+        try:
+            pipeline = get_redis().pipeline()
+            for queue in self.queues:
+                for key in self._keys(queue):
+                    pipeline.llen(key)
+            lengths = iter(pipeline.execute())
+        except RedisError:
+            logger.warning("Can't read the Celery queue lengths", exc_info=True)
+            return
+        family = GaugeMetricFamily("celery_queue_length", "Jobs waiting in the queue", labels=["queue"])
+        for queue in self.queues:
+            family.add_metric([queue], sum(next(lengths) for _ in self._keys(queue)))
+        yield family
+
+
+celery_queue_collector = CeleryQueueCollector()
+
+
+def metrics_registry(*collectors) -> CollectorRegistry:
+    """
+    Registry of the metrics of every process in multiprocess mode, of this
+    one otherwise, and collectors
+    """
+    registry = CollectorRegistry()
+    if MULTIPROCESS:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    for collector in collectors:
+        registry.register(collector)
+    return registry
+
+
+# Celery worker signals: job runtimes, and the worker's own /metrics
+_task_starts: t.Dict[str, float] = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id: str, **_):
+    _task_starts[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task(task_id: str, task, state: str | None = None, **_):
+    start = _task_starts.pop(task_id, None)
+    if start is not None:
+        CELERY_TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - start)
+
+
+@worker_ready.connect
+def start_worker_metrics_server(**_):
+    if config.WORKER_METRICS_PORT:
+        start_http_server(config.WORKER_METRICS_PORT, registry=metrics_registry())
+
+
+def mark_process_dead():
+    """
+    Drop the live gauges of this process from the multiprocess samples, as
+    API and Celery pool processes exit. Those of killed processes are only
+    dropped when the directory is emptied on the next start.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+@worker_process_shutdown.connect
+def mark_worker_process_dead(**_):
+    mark_process_dead()
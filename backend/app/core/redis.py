@@ -0,0 +1,12 @@
+from functools import lru_cache
+import redis
+
+from app.core import config
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """
+    Redis client shared by the process, connections are pooled
+    """
+    return redis.Redis.from_url(config.REDIS_URL)
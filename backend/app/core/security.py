@@ -1,8 +1,12 @@
+import asyncio
+import time
 import jwt
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from fastapi.security import OAuth2PasswordBearer
-from passlib.hash import sha512_crypt
+from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from app.core import config
+from app.core.metrics import PASSWORD_HASH_DURATION
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
@@ -10,13 +14,77 @@ SECRET_KEY = config.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+pwd_context = CryptContext(
+    schemes=config.PASSWORD_HASH_SCHEMES,
+    deprecated="auto",
+    **(
+        {f"{config.PASSWORD_HASH_SCHEMES[0]}__rounds": int(config.PASSWORD_HASH_ROUNDS)}
+        if config.PASSWORD_HASH_ROUNDS
+        else {}
+    ),
+)
+
+_hashing_executors: dict[str, Executor] = {}
+
 
 def get_password_hash(password: str) -> str:
-    return sha512_crypt.hash(password)
+    return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return sha512_crypt.verify(plain_password, hashed_password)
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a hash was made with another scheme or rounds than configured
+    """
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except ValueError:
+        # Not a hash we recognise, so there is nothing to upgrade it from
+        return False
+
+
+def get_hashing_executor() -> Executor:
+    """
+    Pool that password hashing runs on. Hashing holds the GIL, so only a
+    process pool keeps it from stalling the event loop.
+    """
+    kind = config.PASSWORD_HASH_EXECUTOR
+    if kind not in _hashing_executors:
+        if kind == "process":
+            executor = ProcessPoolExecutor(config.PASSWORD_HASH_WORKERS)
+        elif kind == "thread":
+            executor = ThreadPoolExecutor(
+                config.PASSWORD_HASH_WORKERS, thread_name_prefix="hashing"
+            )
+        else:
+            raise ValueError(f"Unknown PASSWORD_HASH_EXECUTOR {kind!r}")
+        _hashing_executors[kind] = executor
+    return _hashing_executors[kind]
+
+
+async def get_password_hash_async(password: str) -> str:
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            get_hashing_executor(), get_password_hash, password
+        )
+    finally:
+        PASSWORD_HASH_DURATION.labels("hash").observe(time.perf_counter() - start)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            get_hashing_executor(), verify_password, plain_password, hashed_password
+        )
+    finally:
+        PASSWORD_HASH_DURATION.labels("verify").observe(time.perf_counter() - start)
 
 
 def create_access_token(*, data: dict, expires_delta: timedelta | None = None):
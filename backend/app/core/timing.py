@@ -0,0 +1,63 @@
+import contextvars
+import time
+import typing as t
+from contextlib import contextmanager
+
+
+class RequestTimings:
+    """
+    Where the time of one request went, in seconds. Filled in by the
+    engine and pool hooks and the JSON responses while the request is
+    handled, see ServerTimingMiddleware.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.pool_wait = 0.0
+        self.serialize = 0.0
+
+
+_current: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    """
+    Timings of the request being handled, None outside of requests
+    """
+    return _current.get()
+
+
+def start_timings() -> tuple[RequestTimings, contextvars.Token]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop_timings(token: contextvars.Token):
+    _current.reset(token)
+
+
+def record_query(seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db += seconds
+
+
+def record_pool_wait(seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.pool_wait += seconds
+
+
+@contextmanager
+def timed_serialization() -> t.Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize += time.perf_counter() - start
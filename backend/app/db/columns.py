@@ -0,0 +1,26 @@
+import typing as t
+
+from pydantic import BaseModel
+
+
+def model_columns(entity, model: t.Type[BaseModel]) -> list:
+    """
+    Columns of entity backing the fields of model, in field order. Selecting
+    them returns plain rows, without identity map or change tracking.
+    """
+    table_columns = entity.__table__.columns
+    return [getattr(entity, name) for name in model.model_fields if name in table_columns]
+
+
+# Cursors and ETags are built from these, so they are read whatever fields were requested
+VERSION_FIELDS = {"id", "created_at", "updated_at"}
+
+
+def field_columns(columns: list, fields: t.Iterable[str] | None) -> list:
+    """
+    The columns for fields, plus VERSION_FIELDS. All of them when fields is None.
+    """
+    if fields is None:
+        return columns
+    names = set(fields) | VERSION_FIELDS
+    return [column for column in columns if column.key in names]
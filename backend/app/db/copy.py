@@ -0,0 +1,27 @@
+import re
+import typing as t
+from enum import Enum
+
+# Backslash escapes of COPY's text format
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+ESCAPED = re.compile(r"[\\\t\n\r]")
+
+
+def copy_value(value: t.Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        # Searching first is much cheaper than translating every value
+        return value.translate(COPY_ESCAPES) if ESCAPED.search(value) else value
+    # Enum columns store member names
+    if isinstance(value, Enum):
+        return value.name
+    # Numbers, dates and booleans need no escaping
+    return str(value)
+
+
+def copy_line(values: t.Iterable[t.Any]) -> str:
+    """
+    One row of COPY ... FROM STDIN in text format
+    """
+    return "\t".join(map(copy_value, values)) + "\n"
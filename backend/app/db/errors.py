@@ -0,0 +1,12 @@
+from sqlalchemy.exc import IntegrityError
+
+# SQLSTATE of foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    """
+    Whether error is a foreign key violation. psycopg2 and SQLAlchemy's
+    asyncpg adapter both expose the SQLSTATE as pgcode.
+    """
+    return getattr(error.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION
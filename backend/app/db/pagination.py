@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+import typing as t
+
+# Response header carrying the cursor of the next page, if there is one
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Build an opaque cursor pointing just past the (created_at, id) row
+    """
+    raw = json.dumps([created_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> t.Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def next_cursor(items: t.Sequence[t.Any], limit: int) -> t.Optional[str]:
+    """
+    Cursor for the page after items, or None if this was the last page
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, t.Mapping):
+        return encode_cursor(last["created_at"], last["id"])
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,118 @@
+import threading
+import time
+import typing as t
+
+from pydantic import BaseModel
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core import metrics
+from app.core.timing import record_pool_wait
+
+
+class PoolStats:
+    """
+    Counters a pool can't report by itself: how long checkouts waited for
+    a connection and how many gave up
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class PoolStatsMixin:
+    stats: PoolStats
+    # pool label of the Prometheus metrics
+    metrics_label: str
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        if isinstance(self, QueuePool):
+            metrics.DB_POOL_SIZE.labels(self.metrics_label).set(self.size())
+            metrics.DB_POOL_MAX_OVERFLOW.labels(self.metrics_label).set(self._max_overflow)
+            # Exported from the start, at 0. Not reset, connections of the
+            # pool this one replaces on dispose are still counted.
+            metrics.DB_POOL_CHECKED_OUT.labels(self.metrics_label)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            record = super()._do_get()
+            metrics.DB_POOL_CHECKED_OUT.labels(self.metrics_label).inc()
+            return record
+        except exc.TimeoutError:
+            timed_out = True
+            metrics.DB_POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            wait_seconds = time.perf_counter() - start
+            self.stats.record_checkout(wait_seconds, timed_out)
+            record_pool_wait(wait_seconds)
+            metrics.DB_POOL_WAIT.labels(self.metrics_label).observe(wait_seconds)
+
+    def _do_return_conn(self, record):
+        metrics.DB_POOL_CHECKED_OUT.labels(self.metrics_label).dec()
+        super()._do_return_conn(record)
+
+    def recreate(self):
+        # Keep counting across engine.dispose()
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(PoolStatsMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(PoolStatsMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+class PoolStatus(BaseModel):
+    pool: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    max_overflow: int | None = None
+    timeout_seconds: float | None = None
+    checkouts: int | None = None
+    timeouts: int | None = None
+    wait_seconds_total: float | None = None
+    wait_seconds_max: float | None = None
+
+
+def get_pool_status(pool: Pool) -> PoolStatus:
+    status: t.Dict[str, t.Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # Negative while the pool has not filled up to size yet
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    if isinstance(pool, PoolStatsMixin):
+        status.update(
+            checkouts=pool.stats.checkouts,
+            timeouts=pool.stats.timeouts,
+            wait_seconds_total=pool.stats.wait_seconds_total,
+            wait_seconds_max=pool.stats.wait_seconds_max,
+        )
+    return PoolStatus(**status)
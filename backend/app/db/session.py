@@ -1,14 +1,86 @@
-from sqlalchemy import create_engine
+import time
+from uuid import uuid4
+from sqlalchemy import DDL, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core import config
+from app.core.timing import record_query
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+pool_options = dict(
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_query(time.perf_counter() - context._query_start)
+
+
+def instrument_engine(engine):
+    """
+    Count the statements of engine and their time towards the request
+    running them, see app.core.timing. Takes the sync_engine of async ones.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
 
 engine = create_engine(
     config.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    **pool_options,
 )
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_url(url: str) -> str:
+    """
+    Point a postgres URL at the asyncpg driver
+    """
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+def get_async_connect_args() -> dict:
+    if not config.DB_PGBOUNCER:
+        return {}
+    # PgBouncer may hand each transaction a different server connection,
+    # so statements can't be cached and names must never collide
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+async_engine = create_async_engine(
+    get_async_url(config.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=get_async_connect_args(),
+    **pool_options,
+)
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
+# Extensions the models' indexes rely on, created by migrations in production
+event.listen(
+    Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
 
 
 # Dependency
@@ -18,3 +90,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async dependency, used by the routers. FastAPI caches it per request, so
+# the auth dependencies and the route share one session, and the session
+# only checks out a pool connection when it runs its first statement.
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
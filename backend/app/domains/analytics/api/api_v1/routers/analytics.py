@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.domains.analytics.db import analytics_repository, analytics_dtos
+
+analytics_router = r = APIRouter()
+
+
+# Route to get task and project counts across all projects, as of refreshed_at
+@r.get("/analytics", response_model=analytics_dtos.Analytics)
+async def read_analytics(db: AsyncSession = Depends(get_async_db)):
+    return await analytics_repository.get_analytics(db)
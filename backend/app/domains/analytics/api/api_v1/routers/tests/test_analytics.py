@@ -0,0 +1,57 @@
+import datetime
+
+from app.core import config
+from app.domains.analytics.db import analytics_views
+
+
+def create_tasks(client):
+    yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    project_id = client.post(
+        "/api/v1/projects", json={"title": "Board", "status": "to_do"}).json()["id"]
+    for task in [
+        {"title": "a", "status": "to_do", "priority": "high", "assignee": "Ann", "due_date": yesterday},
+        {"title": "b", "status": "done", "priority": "high", "assignee": "Ann", "due_date": yesterday},
+        {"title": "c", "status": "to_do", "project_id": project_id},
+    ]:
+        client.post("/api/v1/tasks", json=task)
+
+
+def test_read_analytics_on_demand(client, monkeypatch):
+    monkeypatch.setattr(config, "ANALYTICS_REFRESH_MODE", "on_demand")
+    monkeypatch.setattr(config, "ANALYTICS_REFRESH_INTERVAL", 0)
+    create_tasks(client)
+
+    response = client.get("/api/v1/analytics")
+
+    assert response.status_code == 200
+    tasks = response.json()["tasks"]
+    assert tasks["total"] == 3
+    assert tasks["overdue"] == 1
+    assert tasks["by_status"] == [
+        {"value": "to_do", "count": 2}, {"value": "done", "count": 1}]
+    assert tasks["by_priority"] == [
+        {"value": "high", "count": 2}, {"value": None, "count": 1}]
+    assert tasks["by_assignee"] == [
+        {"value": "Ann", "count": 2}, {"value": None, "count": 1}]
+    projects = response.json()["projects"]
+    assert projects["total"] == 1
+    assert projects["by_status"] == [{"value": "to_do", "count": 1}]
+    assert response.json()["refreshed_at"] is not None
+
+
+def test_read_analytics_served_from_views(client, monkeypatch):
+    monkeypatch.setattr(config, "ANALYTICS_REFRESH_MODE", "celery")
+    create_tasks(client)
+
+    # Nothing refreshed the views since the tables were created
+    assert client.get("/api/v1/analytics").json()["tasks"]["total"] == 0
+
+
+def test_refresh_views(client, test_db):
+    create_tasks(client)
+
+    assert analytics_views.refresh(test_db.connection())
+    total = test_db.execute(analytics_views.analytics_counts.select().where(
+        analytics_views.analytics_counts.c.entity == "tasks",
+        analytics_views.analytics_counts.c.dimension == "total")).one().count
+    assert total == 3
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+import datetime
+
+
+class Count(BaseModel):
+    value: str | None
+    count: int
+
+
+class Breakdown(BaseModel):
+    total: int = 0
+    overdue: int = 0
+    by_status: list[Count] = []
+    by_priority: list[Count] = []
+    by_assignee: list[Count] = []
+
+
+class Analytics(BaseModel):
+    tasks: Breakdown
+    projects: Breakdown
+    refreshed_at: datetime.datetime | None = None
@@ -0,0 +1,58 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import config
+from app.domains.analytics.db import analytics_dtos, analytics_views
+from app.domains.tasks.db.tasks.task_dtos import Priority, Status
+
+views = analytics_views.analytics_counts
+
+# Enum columns store member names, the API speaks in values
+ENUM_DIMENSIONS = {"status": Status, "priority": Priority}
+
+
+def _count(dimension: str, value: str | None, count: int) -> analytics_dtos.Count:
+    if value is not None and dimension in ENUM_DIMENSIONS:
+        value = ENUM_DIMENSIONS[dimension][value].value
+    return analytics_dtos.Count(value=value, count=count)
+
+
+async def get_age(db: AsyncSession) -> float | None:
+    """
+    Seconds since the views were refreshed, on the database clock
+    """
+    return await db.scalar(select(func.extract("epoch", func.now() - func.min(views.c.refreshed_at))))
+
+
+async def refresh(db: AsyncSession) -> bool:
+    connection = await db.connection()
+    refreshed = await connection.run_sync(analytics_views.refresh)
+    await db.commit()
+    return refreshed
+
+
+async def get_analytics(db: AsyncSession) -> analytics_dtos.Analytics:
+    """
+    Read the precomputed counts, refreshing them first when stale in
+    on_demand mode
+    """
+    if config.ANALYTICS_REFRESH_MODE == "on_demand":
+        age = await get_age(db)
+        if age is None or age > config.ANALYTICS_REFRESH_INTERVAL:
+            await refresh(db)
+
+    breakdowns = {"tasks": analytics_dtos.Breakdown(), "projects": analytics_dtos.Breakdown()}
+    refreshed_at = None
+    result = await db.execute(select(views).order_by(
+        views.c.entity, views.c.dimension, views.c.count.desc(), views.c.value))
+    for entity, dimension, value, count, row_refreshed_at in result:
+        breakdown = breakdowns[entity]
+        if dimension == "total":
+            breakdown.total = count
+        elif dimension == "overdue":
+            if value == "true":
+                breakdown.overdue = count
+        else:
+            getattr(breakdown, f"by_{dimension}").append(_count(dimension, value, count))
+        refreshed_at = min(refreshed_at or row_refreshed_at, row_refreshed_at)
+    return analytics_dtos.Analytics(**breakdowns, refreshed_at=refreshed_at)
@@ -0,0 +1,71 @@
+from sqlalchemy import DDL, column, event, table, text
+from sqlalchemy.engine import Connection
+
+from app.db.session import Base
+
+# Counts of tasks and projects along each dimension, one pass over each
+# table with GROUPING SETS. The GROUPING() bitmask names the dimension of a
+# row: the bit of the grouped column is 0, all others are 1.
+COUNTS_SELECT = """
+SELECT '{entity}' AS entity,
+       CASE GROUPING(status, priority, assignee, overdue)
+           WHEN 7 THEN 'status'
+           WHEN 11 THEN 'priority'
+           WHEN 13 THEN 'assignee'
+           WHEN 14 THEN 'overdue'
+           ELSE 'total'
+       END AS dimension,
+       COALESCE(status, priority, assignee, overdue::text) AS value,
+       count(*) AS count,
+       now() AS refreshed_at
+FROM (
+    SELECT status, priority, assignee,
+           COALESCE(due_date < current_date, false)
+               AND status IS DISTINCT FROM 'DONE' AS overdue
+    FROM {entity}
+) AS rows
+GROUP BY GROUPING SETS ((status), (priority), (assignee), (overdue), ())
+"""
+
+CREATE_VIEWS = [
+    "CREATE MATERIALIZED VIEW analytics_counts AS "
+    + COUNTS_SELECT.format(entity="tasks")
+    + " UNION ALL "
+    + COUNTS_SELECT.format(entity="projects"),
+    # REFRESH .. CONCURRENTLY needs a unique index
+    "CREATE UNIQUE INDEX ix_analytics_counts_entity_dimension_value "
+    "ON analytics_counts (entity, dimension, value)",
+]
+
+# Concurrent refreshes keep the view readable while it is rebuilt
+REFRESH_VIEWS = ["REFRESH MATERIALIZED VIEW CONCURRENTLY analytics_counts"]
+
+# Serializes refreshes across processes, a second one would redo the same work
+REFRESH_LOCK_ID = 0x616E616C
+
+analytics_counts = table(
+    "analytics_counts",
+    column("entity"),
+    column("dimension"),
+    column("value"),
+    column("count"),
+    column("refreshed_at"),
+)
+
+# Views aren't part of the metadata, create them with the tables
+for statement in CREATE_VIEWS:
+    event.listen(Base.metadata, "after_create", DDL(statement))
+
+
+def refresh(connection: Connection) -> bool:
+    """
+    Refresh the views unless another refresh is running, in the caller's
+    transaction. Returns whether they were refreshed.
+    """
+    locked = connection.scalar(
+        text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": REFRESH_LOCK_ID})
+    if not locked:
+        return False
+    for statement in REFRESH_VIEWS:
+        connection.execute(text(statement))
+    return True
@@ -2,7 +2,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import APIRouter, Depends, HTTPException, status
 from datetime import timedelta
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.core import security
 from app.domains.auth.auth import authenticate_user, sign_up_new_user
 
@@ -11,9 +11,9 @@ auth_router = r = APIRouter()
 
 @r.post("/token")
 async def login(
-    db=Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    db=Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,9 +38,9 @@ async def login(
 
 @r.post("/signup")
 async def signup(
-    db=Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    db=Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = sign_up_new_user(db, form_data.username, form_data.password)
+    user = await sign_up_new_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -1,4 +1,7 @@
+from passlib.context import CryptContext
 from app.core import security
+from app.domains.auth import auth
+from app.domains.users.db import user_entity
 
 
 # Monkey patch function we can use to shave a second off our tests by skipping the password hashing check
@@ -18,8 +21,8 @@ def test_login(client, test_user, monkeypatch):
 
 
 def test_signup(client, monkeypatch):
-    def get_password_hash_mock(first: str, second: str):
-        return True
+    def get_password_hash_mock(password: str):
+        return "supersecrethash"
 
     monkeypatch.setattr(security, "get_password_hash", get_password_hash_mock)
 
@@ -65,3 +68,46 @@ def test_wrong_login(client, test_db, test_user, test_password):
         "/api/token", data={"username": "fakeuser", "password": test_password}
     )
     assert response.status_code == 401
+
+
+def test_current_user_is_cached(client, user_token_headers, monkeypatch):
+    lookups = []
+    get_user_by_email = auth.get_user_by_email
+
+    async def get_user_by_email_spy(db, email: str):
+        lookups.append(email)
+        return await get_user_by_email(db, email)
+
+    monkeypatch.setattr(auth, "get_user_by_email", get_user_by_email_spy)
+
+    for _ in range(2):
+        response = client.get("/api/v1/users/me", headers=user_token_headers)
+        assert response.status_code == 200
+
+    assert len(lookups) == 1
+
+
+def test_login_rehashes_password(client, test_db, monkeypatch):
+    old_context = CryptContext(schemes=["sha512_crypt"], sha512_crypt__rounds=1000)
+    user = user_entity.User(
+        email="rehash@email.com",
+        hashed_password=old_context.hash("securepassword"),
+        is_active=True,
+    )
+    test_db.add(user)
+    test_db.commit()
+
+    monkeypatch.setattr(
+        security,
+        "pwd_context",
+        CryptContext(schemes=["sha512_crypt"], sha512_crypt__rounds=2000),
+    )
+    response = client.post(
+        "/api/token",
+        data={"username": "rehash@email.com", "password": "securepassword"},
+    )
+    assert response.status_code == 200
+
+    test_db.refresh(user)
+    assert user.hashed_password.startswith("$6$rounds=2000$")
+    assert security.verify_password("securepassword", user.hashed_password)
@@ -3,13 +3,14 @@ from fastapi import Depends, HTTPException, status
 from jwt import PyJWTError
 
 from app.db import session
-from app.domains.users.db import user_entity, user_dtos
-from app.domains.users.db.user_repository import get_user_by_email, create_user
+from app.domains.users.db import user_dtos
+from app.domains.users.db.user_repository import get_user_by_email, create_user, update_password_hash
+from app.domains.auth.principal_cache import principal_cache
 from app.core import security
 
 
 async def get_current_user(
-    db=Depends(session.get_db), token: str = Depends(security.oauth2_scheme)
+    db=Depends(session.get_async_db), token: str = Depends(security.oauth2_scheme)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,14 +29,22 @@ async def get_current_user(
             email=email, permissions=permissions)
     except PyJWTError:
         raise credentials_exception
-    user = get_user_by_email(db, token_data.email)
-    if user is None:
+    # FastAPI resolves this dependency once per request, the cache spares
+    # the lookup across requests
+    user = principal_cache.get(token_data.email)
+    if user is not None:
+        return user
+    generation = principal_cache.generation
+    db_user = await get_user_by_email(db, token_data.email)
+    if db_user is None:
         raise credentials_exception
+    user = user_dtos.User.model_validate(db_user)
+    principal_cache.set(token_data.email, user, generation)
     return user
 
 
 async def get_current_active_user(
-    current_user: user_entity.User = Depends(get_current_user),
+    current_user: user_dtos.User = Depends(get_current_user),
 ):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -43,8 +52,8 @@ async def get_current_active_user(
 
 
 async def get_current_active_superuser(
-    current_user: user_entity.User = Depends(get_current_user),
-) -> user_entity.User:
+    current_user: user_dtos.User = Depends(get_current_user),
+) -> user_dtos.User:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -52,20 +61,25 @@ async def get_current_active_superuser(
     return current_user
 
 
-def authenticate_user(db, email: str, password: str):
-    user = get_user_by_email(db, email)
+async def authenticate_user(db, email: str, password: str):
+    user = await get_user_by_email(db, email)
     if not user:
         return False
-    if not security.verify_password(password, user.hashed_password):
+    if not await security.verify_password_async(password, user.hashed_password):
         return False
+    # Upgrade the stored hash while we have the plain password
+    if security.password_needs_rehash(user.hashed_password):
+        await update_password_hash(
+            db, user.id, await security.get_password_hash_async(password)
+        )
     return user
 
 
-def sign_up_new_user(db, email: str, password: str):
-    user = get_user_by_email(db, email)
+async def sign_up_new_user(db, email: str, password: str):
+    user = await get_user_by_email(db, email)
     if user:
         return False  # User already exists
-    new_user = create_user(
+    new_user = await create_user(
         db,
         user_dtos.UserCreate(
             email=email,
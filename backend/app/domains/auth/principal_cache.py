@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+import typing as t
+
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app.core import config
+from app.core.redis import get_redis
+from app.domains.users.db import user_dtos
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "principal-cache:invalidate"
+
+
+class PrincipalCache:
+    """
+    LRU of authenticated users keyed on the token subject, whose entries
+    expire after ttl seconds. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: t.OrderedDict[
+            str, t.Tuple[float, user_dtos.User]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> t.Optional[user_dtos.User]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return user
+
+    def set(self, subject: str, user: user_dtos.User, generation: int):
+        """
+        Cache user unless an invalidation happened since generation was
+        read, in which case user may already be stale
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[subject] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id: int):
+        with self._lock:
+            self.generation += 1
+            for subject in [
+                subject
+                for subject, (_, user) in self._entries.items()
+                if user.id == user_id
+            ]:
+                del self._entries[subject]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    config.PRINCIPAL_CACHE_SIZE, config.PRINCIPAL_CACHE_TTL
+)
+
+
+async def invalidate_user(user_id: int):
+    """
+    Drop a user from the principal cache of this process and, when
+    enabled, of every other process
+    """
+    principal_cache.discard_user(user_id)
+    if config.PRINCIPAL_CACHE_REDIS_INVALIDATION:
+        try:
+            await run_in_threadpool(
+                get_redis().publish, INVALIDATION_CHANNEL, user_id
+            )
+        except RedisError:
+            logger.exception("Failed to publish principal invalidation")
+
+
+def _listen_for_invalidations():
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Invalidations may have been missed while disconnected
+            principal_cache.clear()
+            for message in pubsub.listen():
+                principal_cache.discard_user(int(message["data"]))
+        except RedisError:
+            logger.exception("Principal invalidation listener disconnected")
+            time.sleep(1)
+
+
+def start_invalidation_listener():
+    threading.Thread(
+        target=_listen_for_invalidations,
+        name="principal-cache-invalidation",
+        daemon=True,
+    ).start()
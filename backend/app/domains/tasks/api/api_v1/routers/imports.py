@@ -0,0 +1,50 @@
+import os
+import shutil
+from uuid import uuid4
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core import config
+from app.core.jobs import enqueue
+from app.db.session import get_async_db
+from app.domains.tasks.db.imports import import_repository, import_dtos
+
+imports_router = r = APIRouter()
+
+SUFFIXES = {
+    ".csv": import_dtos.Format.CSV,
+    ".ndjson": import_dtos.Format.NDJSON,
+    ".jsonl": import_dtos.Format.NDJSON,
+}
+
+
+def save_upload(file: UploadFile, format: import_dtos.Format) -> str:
+    os.makedirs(config.IMPORT_DIR, exist_ok=True)
+    path = os.path.join(config.IMPORT_DIR, f"{uuid4()}.{format}")
+    with open(path, "wb") as destination:
+        shutil.copyfileobj(file.file, destination, 1024 * 1024)
+    return path
+
+
+# Route to import a CSV or NDJSON file of tasks in the background. The
+# format defaults to the file's extension. CSV columns and NDJSON keys are
+# the fields of a new task. Poll the returned job for progress and errors.
+@r.post("/tasks/imports", response_model=import_dtos.ImportJob, status_code=202)
+async def create_import(file: UploadFile, format: import_dtos.Format | None = None,
+                        db: AsyncSession = Depends(get_async_db)):
+    format = format or SUFFIXES.get(os.path.splitext(file.filename or "")[1].lower())
+    if format is None:
+        raise HTTPException(status_code=400, detail="Unknown import format, pass format=csv or format=ndjson")
+    path = await run_in_threadpool(save_upload, file, format)
+    db_job = await import_repository.create_import(db, format, file.filename, path)
+    await run_in_threadpool(enqueue, "app.celery_tasks.import_tasks", args=[db_job.id])
+    return db_job
+
+
+# Route to get the status, progress and row errors of an import
+@r.get("/tasks/imports/{job_id}", response_model=import_dtos.ImportJob)
+async def read_import(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_job = await import_repository.get_import(db, job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return db_job
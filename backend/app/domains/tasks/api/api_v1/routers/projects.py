@@ -1,55 +1,170 @@
+import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.api.caching import cached_response
+from app.api.conditional import is_conditional, is_not_modified, make_etag, not_modified, set_validators
+from app.api.export import EXPORT_BATCH_SIZE, ExportFormat, export_response
+from app.core.cache import read_cache
+from app.api.serialization import RowSerializer
+from app.domains.tasks.db.filtering import CURSOR_SORT, next_page_headers
 from app.domains.tasks.db.projects import project_repository, project_dtos
+from app.domains.tasks.db.read_cache import PROJECTS, project_namespace
 from app.domains.tasks.db.tasks import task_dtos
 
 projects_router = r = APIRouter()
 
+# Reads render rows straight to JSON, response_model only documents them
+project_serializer = RowSerializer(project_dtos.Project)
+task_serializer = RowSerializer(task_dtos.Task)
 
-# Route to get a project by its ID
-@r.get("/projects/{project_id}", response_model=project_dtos.Project)
-async def read_project(project_id: int, db: Session = Depends(get_db)):
-    db_project = project_repository.get_project(db, project_id)
-    if db_project is None:
+
+def projects_etag(versions: List[project_repository.ProjectVersion], include: project_dtos.Include,
+                  fields: tuple[str, ...] | None) -> str:
+    return make_etag(str(include), fields, *versions, weak=True)
+
+
+# Comma separated project fields to return instead of all of them, e.g. fields=id,title,status
+FIELDS = Query(None, description="Comma separated fields to return, all by default")
+
+
+def project_fields(fields: str | None = FIELDS, include: project_dtos.Include = project_dtos.Include.TASKS):
+    """
+    Parsed fields, and include narrowed to none when fields leaves out tasks
+    """
+    fields = project_serializer.parse_fields(fields)
+    if fields is not None and "tasks" not in fields:
+        include = project_dtos.Include.NONE
+    return fields, include
+
+
+# status and priority may be repeated to match any of several values
+def project_filters(status: List[project_dtos.Status] | None = Query(None), priority: List[project_dtos.Priority] | None = Query(None),
+                    assignee: str | None = None,
+                    due_from: datetime.date | None = None, due_to: datetime.date | None = None) -> project_dtos.ProjectFilter:
+    return project_dtos.ProjectFilter(status=status, priority=priority, assignee=assignee,
+                                      due_from=due_from, due_to=due_to)
+
+
+# Route to export every project matching the list filters, without their
+# tasks, as CSV or NDJSON streamed from a server-side cursor
+@r.get("/projects/export", response_class=StreamingResponse)
+async def export_projects(format: ExportFormat = ExportFormat.CSV,
+                          filters: project_dtos.ProjectFilter = Depends(project_filters),
+                          sort: project_dtos.Sort = CURSOR_SORT, db: AsyncSession = Depends(get_async_db)):
+    return export_response(
+        [column.key for column in project_repository.PROJECT_COLUMNS],
+        project_repository.stream_projects(db, filters, sort, batch_size=EXPORT_BATCH_SIZE),
+        format, "projects")
+
+
+def project_etag(version: project_repository.ProjectVersion, include: project_dtos.Include,
+                 fields: tuple[str, ...] | None) -> str:
+    return make_etag(str(include), fields, version)
+
+
+def project_last_modified(version: project_repository.ProjectVersion, include: project_dtos.Include):
+    return version.updated_at if include == project_dtos.Include.NONE else None
+
+
+async def render_project(db: AsyncSession, project_id: int, include: project_dtos.Include,
+                         fields: tuple[str, ...] | None) -> Response:
+    project = await project_repository.get_project_row(db, project_id, include=include, fields=fields)
+    if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return db_project
+    version = project_repository.ProjectVersion.of(project, include)
+    response = project_serializer.one(project, fields=fields)
+    set_validators(response, project_etag(version, include, fields), project_last_modified(version, include))
+    return response
+
+
+# Route to get a project by its ID, 304 when the client's copy is current.
+# Last-Modified is only sent without tasks, a deleted task leaves no timestamp.
+# Served from the read cache until the project or one of its tasks is written.
+# Without the cache, revalidation only reads the project's version.
+@r.get("/projects/{project_id}", response_model=project_dtos.Project)
+async def read_project(project_id: int, request: Request, fields_include=Depends(project_fields), db: AsyncSession = Depends(get_async_db)):
+    fields, include = fields_include
+    if not read_cache.enabled and is_conditional(request):
+        version = await project_repository.get_project_version(db, project_id, include)
+        if version is not None:
+            etag, last_modified = project_etag(version, include, fields), project_last_modified(version, include)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+    return await cached_response(request, project_namespace(project_id), (str(include), fields),
+                                 lambda: render_project(db, project_id, include, fields))
 
 
-# Route to get a list of projects with optional pagination
+# Route to get a list of projects with optional filters, sorting and pagination.
+# Prefix a sort field with - for descending order.
+# Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one,
+# available with the default sort only.
+# Use include=none to skip loading the tasks of each project.
+# First pages are served from the read cache until a project or task is
+# written, later ones revalidated with If-None-Match only read the versions
+# of their projects.
+# Use fields to read and return only some columns, tasks are only loaded
+# when fields is left out or lists them.
 @r.get("/projects", response_model=List[project_dtos.Project])
-async def read_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return project_repository.get_projects(db, skip=skip, limit=limit)
+async def read_projects(request: Request, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                        fields_include=Depends(project_fields),
+                        filters: project_dtos.ProjectFilter = Depends(project_filters), sort: project_dtos.Sort = CURSOR_SORT,
+                        db: AsyncSession = Depends(get_async_db)):
+    fields, include = fields_include
+    page = dict(skip=skip, limit=limit, cursor=cursor, include=include, filters=filters, sort=sort)
 
+    async def render() -> Response:
+        projects = await project_repository.get_projects(db, **page, fields=fields)
+        response = project_serializer.many(projects, fields=fields, headers=next_page_headers(projects, limit, sort))
+        set_validators(response, projects_etag(
+            [project_repository.ProjectVersion.of(project, include) for project in projects], include, fields))
+        return response
 
-@r.get("/projects/{project_id}/tasks", response_model=List[task_dtos.Task])
-async def read_project_tasks(project_id: int, db: Session = Depends(get_db)):
-    db_project = project_repository.get_project(db, project_id)
-    if db_project is None:
+    if read_cache.enabled and skip == 0 and cursor is None:
+        return await cached_response(request, PROJECTS, (limit, str(include), filters, str(sort), fields), render)
+    if "if-none-match" in request.headers:
+        versions = await project_repository.get_project_versions(db, **page)
+        etag = projects_etag(versions, include, fields)
+        if is_not_modified(request, etag):
+            return not_modified(etag, headers=next_page_headers(versions, limit, sort))
+    return await render()
+
+
+async def render_project_tasks(db: AsyncSession, project_id: int) -> Response:
+    project = await project_repository.get_project_row(db, project_id)
+    if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return db_project.tasks
+    return task_serializer.many(project["tasks"])
+
+
+@r.get("/projects/{project_id}/tasks", response_model=List[task_dtos.Task])
+async def read_project_tasks(project_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await cached_response(request, project_namespace(project_id), "tasks",
+                                 lambda: render_project_tasks(db, project_id))
 
 
 # Route to create a new project
 @r.post("/projects", response_model=project_dtos.Project, status_code=201)
-async def create_project(project: project_dtos.ProjectCreate, db: Session = Depends(get_db)):
-    return project_repository.create_project(db, project)
+async def create_project(project: project_dtos.ProjectCreate, db: AsyncSession = Depends(get_async_db)):
+    return await project_repository.create_project(db, project)
 
 
 # Route to update an existing project
 @r.put("/projects/{project_id}", response_model=project_dtos.Project)
-async def update_project(project_id: int, project: project_dtos.ProjectUpdate, db: Session = Depends(get_db)):
-    db_project = project_repository.get_project(db, project_id)
+async def update_project(project_id: int, project: project_dtos.ProjectUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_project = await project_repository.update_project(db, project_id, project)
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project_repository.update_project(db, project_id, project)
+    return db_project
 
 
 # Route to delete a project
 @r.delete("/projects/{project_id}", response_model=project_dtos.Project)
-async def delete_project(project_id: int, db: Session = Depends(get_db)):
-    db_project = project_repository.get_project(db, project_id)
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_project = await project_repository.delete_project(db, project_id)
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project_repository.delete_project(db, project_id)
+    return db_project
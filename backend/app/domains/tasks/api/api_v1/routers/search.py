@@ -0,0 +1,24 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.domains.tasks.db.search import search_repository, search_dtos
+
+search_router = r = APIRouter()
+
+ALL_TYPES = list(search_dtos.ResultType)
+
+
+# Route to search tasks and projects by title and description.
+# type may be repeated, by default both are searched.
+@r.get("/search", response_model=List[search_dtos.SearchResult])
+async def search(q: str = Query(..., min_length=1), type: List[search_dtos.ResultType] = Query(ALL_TYPES),
+                 skip: int = 0, limit: int = Query(20, le=100), db: AsyncSession = Depends(get_async_db)):
+    return await search_repository.search(db, q, type, skip=skip, limit=limit)
+
+
+# Route to suggest tasks and projects whose title starts with q
+@r.get("/search/typeahead", response_model=List[search_dtos.SearchResult])
+async def typeahead(q: str = Query(..., min_length=1), type: List[search_dtos.ResultType] = Query(ALL_TYPES),
+                    limit: int = Query(10, le=50), db: AsyncSession = Depends(get_async_db)):
+    return await search_repository.typeahead(db, q, type, limit=limit)
@@ -0,0 +1,88 @@
+import asyncio
+from typing import List
+from fastapi import APIRouter, Query, WebSocket
+from fastapi.responses import StreamingResponse
+from app.core import config
+from app.domains.tasks.db.changes.change_dtos import ChangeEvent
+from app.domains.tasks.db.changes.change_events import change_broadcaster
+
+stream_router = r = APIRouter()
+
+# Control messages besides the ChangeEvents. subscribed comes first, once
+# changes are being followed. reset is sent to a client that fell too far
+# behind before disconnecting it, it should reload and reconnect.
+SUBSCRIBED_EVENT = "subscribed"
+RESET_EVENT = "reset"
+WS_TRY_AGAIN_LATER = 1013
+
+# project_id may be repeated to follow several projects, all changes by default
+PROJECT_IDS = Query(None, description="Only send changes concerning these projects")
+
+
+def matches(event: ChangeEvent, project_ids: List[int] | None) -> bool:
+    return not project_ids or not set(project_ids).isdisjoint(event.project_ids)
+
+
+async def _send_changes(websocket: WebSocket, project_ids: List[int] | None):
+    changes = change_broadcaster.subscribe(config.STREAM_QUEUE_SIZE)
+    try:
+        await websocket.send_json({"type": SUBSCRIBED_EVENT})
+        while (events := await changes.get()) is not None:
+            for event in events:
+                if matches(event, project_ids):
+                    await websocket.send_text(event.model_dump_json())
+    finally:
+        change_broadcaster.unsubscribe(changes)
+    await websocket.send_json({"type": RESET_EVENT})
+    await websocket.close(code=WS_TRY_AGAIN_LATER)
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+# WebSocket pushing a ChangeEvent per created, updated or deleted task and
+# project, as JSON text messages
+@r.websocket("/stream")
+async def stream_websocket(websocket: WebSocket, project_id: List[int] | None = PROJECT_IDS):
+    await websocket.accept()
+    tasks = [asyncio.create_task(_send_changes(websocket, project_id)),
+             asyncio.create_task(_wait_for_disconnect(websocket))]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _server_sent_events(project_ids: List[int] | None):
+    changes = change_broadcaster.subscribe(config.STREAM_QUEUE_SIZE)
+    try:
+        yield f"event: {SUBSCRIBED_EVENT}\ndata: {{}}\n\n"
+        while True:
+            try:
+                events = await asyncio.wait_for(changes.get(), config.STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if events is None:
+                yield f"event: {RESET_EVENT}\ndata: {{}}\n\n"
+                return
+            for event in events:
+                if matches(event, project_ids):
+                    yield f"event: {event.type}.{event.action}\ndata: {event.model_dump_json()}\n\n"
+    finally:
+        change_broadcaster.unsubscribe(changes)
+
+
+# The same changes as server-sent events named <type>.<action>, for
+# clients that can't use WebSockets
+@r.get("/stream", response_class=StreamingResponse)
+async def stream_events(project_id: List[int] | None = PROJECT_IDS):
+    return StreamingResponse(
+        _server_sent_events(project_id),
+        media_type="text/event-stream",
+        # Unbuffered through nginx
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,51 +1,222 @@
+import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.responses import Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.errors import is_foreign_key_violation
+from app.db.session import get_async_db
+from app.api.caching import cached_response
+from app.api.conditional import is_conditional, is_not_modified, make_etag, not_modified, set_validators
+from app.api.export import EXPORT_BATCH_SIZE, ExportFormat, export_response
+from app.core.cache import read_cache
+from app.api.serialization import RowSerializer
+from app.domains.tasks.db.filtering import CURSOR_SORT, next_page_headers
+from app.domains.tasks.db.read_cache import TASKS, task_namespace
 from app.domains.tasks.db.tasks import task_repository, task_dtos
 from app.domains.tasks.db.projects import project_repository
 
 tasks_router = r = APIRouter()
 
+MAX_BULK_ITEMS = 5000
 
-# Route to get a task by its ID
-@r.get("/tasks/{task_id}", response_model=task_dtos.Task)
-async def read_task(task_id: int, db: Session = Depends(get_db)):
-    db_task = task_repository.get_task(db, task_id)
-    if db_task is None:
+# Reads render rows straight to JSON, response_model only documents them
+task_serializer = RowSerializer(task_dtos.Task)
+
+
+def check_bulk_size(items: list):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+
+
+# Locks the existing projects until the bulk write commits, see get_existing_project_ids
+async def get_missing_project_ids(db: AsyncSession, project_ids: set[int | None]) -> set[int]:
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    return project_ids - await project_repository.get_existing_project_ids(db, project_ids)
+
+
+def bulk_success(index: int, status_code: int, db_task) -> task_dtos.TaskBulkResult:
+    return task_dtos.TaskBulkResult(index=index, status_code=status_code, task=task_dtos.Task.model_validate(db_task))
+
+
+def bulk_not_found(index: int, detail: str) -> task_dtos.TaskBulkResult:
+    return task_dtos.TaskBulkResult(index=index, status_code=404, detail=detail)
+
+
+# status and priority may be repeated to match any of several values
+def task_filters(status: List[task_dtos.Status] | None = Query(None), priority: List[task_dtos.Priority] | None = Query(None),
+                 assignee: str | None = None, project_id: int | None = None,
+                 due_from: datetime.date | None = None, due_to: datetime.date | None = None) -> task_dtos.TaskFilter:
+    return task_dtos.TaskFilter(status=status, priority=priority, assignee=assignee,
+                                project_id=project_id, due_from=due_from, due_to=due_to)
+
+
+# Route to export every task matching the list filters as CSV or NDJSON,
+# streamed from a server-side cursor. Declared before /tasks/{task_id}.
+@r.get("/tasks/export", response_class=StreamingResponse)
+async def export_tasks(format: ExportFormat = ExportFormat.CSV, filters: task_dtos.TaskFilter = Depends(task_filters),
+                       sort: task_dtos.Sort = CURSOR_SORT, db: AsyncSession = Depends(get_async_db)):
+    return export_response(
+        [column.key for column in task_repository.TASK_COLUMNS],
+        task_repository.stream_tasks(db, filters, sort, batch_size=EXPORT_BATCH_SIZE),
+        format, "tasks")
+
+
+# Bulk routes are declared before /tasks/{task_id} so "bulk" isn't read as an id.
+# Each responds with one result per item, in request order.
+@r.post("/tasks/bulk", response_model=List[task_dtos.TaskBulkResult])
+async def create_tasks(tasks: List[task_dtos.TaskCreate], db: AsyncSession = Depends(get_async_db)):
+    check_bulk_size(tasks)
+    missing_project_ids = await get_missing_project_ids(db, {task.project_id for task in tasks})
+    results = {}
+    valid = []
+    for index, task in enumerate(tasks):
+        if task.project_id in missing_project_ids:
+            results[index] = bulk_not_found(index, "Project not found")
+        else:
+            valid.append(index)
+
+    db_tasks = await task_repository.create_tasks(db, [tasks[index] for index in valid])
+    for index, db_task in zip(valid, db_tasks):
+        results[index] = bulk_success(index, 201, db_task)
+    return [results[index] for index in range(len(tasks))]
+
+
+@r.patch("/tasks/bulk", response_model=List[task_dtos.TaskBulkResult])
+async def update_tasks(tasks: List[task_dtos.TaskBulkUpdate], db: AsyncSession = Depends(get_async_db)):
+    check_bulk_size(tasks)
+    missing_project_ids = await get_missing_project_ids(
+        db, {task.project_id for task in tasks if "project_id" in task.model_fields_set})
+    results = {}
+    valid = []
+    for index, task in enumerate(tasks):
+        if "project_id" in task.model_fields_set and task.project_id in missing_project_ids:
+            results[index] = bulk_not_found(index, "Project not found")
+        else:
+            valid.append(index)
+
+    db_tasks = await task_repository.update_tasks(db, [tasks[index] for index in valid])
+    for index in valid:
+        db_task = db_tasks.get(tasks[index].id)
+        if db_task is None:
+            results[index] = bulk_not_found(index, "Task not found")
+        else:
+            results[index] = bulk_success(index, 200, db_task)
+    return [results[index] for index in range(len(tasks))]
+
+
+@r.delete("/tasks/bulk", response_model=List[task_dtos.TaskBulkResult])
+async def delete_tasks(task_ids: List[int] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    check_bulk_size(task_ids)
+    db_tasks = await task_repository.delete_tasks(db, task_ids)
+    return [
+        bulk_success(index, 200, db_tasks[task_id]) if task_id in db_tasks
+        else bulk_not_found(index, "Task not found")
+        for index, task_id in enumerate(task_ids)
+    ]
+
+
+def task_etag(task, fields: tuple[str, ...] | None) -> str:
+    return make_etag(fields, task.id, task.updated_at)
+
+
+# Accepts task rows or the rows of get_task_version(s)
+def tasks_etag(versions, fields: tuple[str, ...] | None) -> str:
+    return make_etag(fields, *((version.id, version.updated_at) for version in versions), weak=True)
+
+
+# Comma separated task fields to return instead of all of them, e.g. fields=id,title,status
+FIELDS = Query(None, description="Comma separated fields to return, all by default")
+
+
+async def render_task(db: AsyncSession, task_id: int, fields: tuple[str, ...] | None) -> Response:
+    task = await task_repository.get_task_row(db, task_id, fields=fields)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return db_task
+    response = task_serializer.one(task._asdict(), fields=fields)
+    set_validators(response, task_etag(task, fields), task.updated_at)
+    return response
+
 
+# Route to get a task by its ID, 304 when the client's copy is current.
+# Served from the read cache until the task is written. Without the cache,
+# revalidation only reads the task's version.
+@r.get("/tasks/{task_id}", response_model=task_dtos.Task)
+async def read_task(task_id: int, request: Request, fields: str | None = FIELDS, db: AsyncSession = Depends(get_async_db)):
+    fields = task_serializer.parse_fields(fields)
+    if not read_cache.enabled and is_conditional(request):
+        version = await task_repository.get_task_version(db, task_id)
+        if version is not None:
+            etag = task_etag(version, fields)
+            if is_not_modified(request, etag, version.updated_at):
+                return not_modified(etag, version.updated_at)
+    return await cached_response(request, task_namespace(task_id), fields,
+                                 lambda: render_task(db, task_id, fields))
 
-# Route to get a list of tasks with optional pagination
+
+# Route to get a list of tasks with optional filters, sorting and pagination.
+# Prefix a sort field with - for descending order.
+# Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one,
+# available with the default sort only.
+# First pages are served from the read cache until a task is written, later
+# ones revalidated with If-None-Match only read the versions of their tasks.
+# Use fields to read and return only some columns.
 @r.get("/tasks", response_model=List[task_dtos.Task])
-async def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return task_repository.get_tasks(db, skip=skip, limit=limit)
+async def read_tasks(request: Request, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                     filters: task_dtos.TaskFilter = Depends(task_filters), sort: task_dtos.Sort = CURSOR_SORT,
+                     fields: str | None = FIELDS, db: AsyncSession = Depends(get_async_db)):
+    fields = task_serializer.parse_fields(fields)
+    page = dict(skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort)
+
+    async def render() -> Response:
+        tasks = await task_repository.get_tasks(db, **page, fields=fields)
+        response = task_serializer.many([task._asdict() for task in tasks], fields=fields,
+                                        headers=next_page_headers(tasks, limit, sort))
+        set_validators(response, tasks_etag(tasks, fields))
+        return response
+
+    if read_cache.enabled and skip == 0 and cursor is None:
+        return await cached_response(request, TASKS, (limit, filters, str(sort), fields), render)
+    if "if-none-match" in request.headers:
+        versions = await task_repository.get_task_versions(db, **page)
+        etag = tasks_etag(versions, fields)
+        if is_not_modified(request, etag):
+            return not_modified(etag, headers=next_page_headers(versions, limit, sort))
+    return await render()
 
 
 # Route to create a new task
 @r.post("/tasks", response_model=task_dtos.Task, status_code=201)
-async def create_task(task: task_dtos.TaskCreate, db: Session = Depends(get_db)):
-    if task.project_id is not None:
-        db_project = project_repository.get_project(db, task.project_id)
-        if db_project is None:
+async def create_task(task: task_dtos.TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await task_repository.create_task(db, task)
+    except IntegrityError as e:
+        # project_id is the only foreign key of tasks
+        if is_foreign_key_violation(e):
             raise HTTPException(status_code=404, detail="Project not found")
-    return task_repository.create_task(db, task)
+        raise
 
 
 # Route to update an existing task
 @r.put("/tasks/{task_id}", response_model=task_dtos.Task)
-async def update_task(task_id: int, task: task_dtos.TaskUpdate, db: Session = Depends(get_db)):
-    db_task = task_repository.get_task(db, task_id)
+async def update_task(task_id: int, task: task_dtos.TaskUpdate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        db_task = await task_repository.update_task(db, task_id, task)
+    except IntegrityError as e:
+        if is_foreign_key_violation(e):
+            raise HTTPException(status_code=404, detail="Project not found")
+        raise
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task_repository.update_task(db, task_id, task)
+    return db_task
 
 
 # Route to delete a task
 @r.delete("/tasks/{task_id}", response_model=task_dtos.Task)
-async def delete_task(task_id: int, db: Session = Depends(get_db)):
-    db_task = task_repository.get_task(db, task_id)
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_task = await task_repository.delete_task(db, task_id)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task_repository.delete_task(db, task_id)
+    return db_task
@@ -0,0 +1,156 @@
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core import config
+from app.core.celery_app import celery_app
+from app.domains.tasks.db.imports import task_import
+
+
+@pytest.fixture
+def run_imports(test_db, tmp_path, monkeypatch):
+    """
+    Run import jobs as soon as they are enqueued, against the test database.
+    """
+    monkeypatch.setattr(config, "IMPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "IMPORT_BATCH_SIZE", 2)
+
+    def send_task(name, args, **options):
+        assert name == "app.celery_tasks.import_tasks"
+        task_import.run_import(test_db.get_bind(), *args)
+
+    monkeypatch.setattr(celery_app, "send_task", send_task)
+    return tmp_path
+
+
+def test_import_csv(client, run_imports):
+    project_id = client.post("/api/v1/projects", json={"title": "p"}).json()["id"]
+    client.get(f"/api/v1/projects/{project_id}/tasks")
+    content = "\n".join([
+        "title,status,priority,project_id,due_date,description",
+        f"a,to_do,high,{project_id},2023-07-31,",
+        'b,,,,,"with, comma"',
+        "c,unknown,,,,",
+        "d,,,999,,",
+        ",done,,,,",
+    ])
+
+    response = client.post("/api/v1/tasks/imports", files={"file": ("tasks.csv", content)})
+    assert response.status_code == 202
+    job = client.get(f"/api/v1/tasks/imports/{response.json()['id']}").json()
+    assert job["status"] == "done"
+    assert (job["total_rows"], job["processed_rows"], job["imported_rows"], job["failed_rows"]) == (5, 5, 2, 3)
+    assert [error["row"] for error in job["errors"]] == [3, 4, 5]
+    assert job["errors"][1]["detail"] == "Project not found"
+    assert job["errors"][0]["detail"].startswith("status:")
+    # The upload is removed once imported
+    assert list(run_imports.iterdir()) == []
+
+    tasks = client.get("/api/v1/tasks", params={"sort": "title"}).json()
+    assert [(task["title"], task["status"], task["description"]) for task in tasks] == [
+        ("a", "to_do", None), ("b", None, "with, comma")]
+    # Imports invalidate cached reads
+    assert [task["title"] for task in client.get(f"/api/v1/projects/{project_id}/tasks").json()] == ["a"]
+
+
+def test_import_ndjson(client, run_imports):
+    lines = [json.dumps({"title": "a", "priority": "low"}), "", "{not json", json.dumps(["b"])]
+    response = client.post("/api/v1/tasks/imports", params={"format": "ndjson"},
+                           files={"file": ("tasks.txt", "\n".join(lines))})
+
+    job = client.get(f"/api/v1/tasks/imports/{response.json()['id']}").json()
+    assert (job["status"], job["imported_rows"], job["failed_rows"]) == ("done", 1, 2)
+    assert client.get("/api/v1/tasks").json()[0]["priority"] == "low"
+
+
+def enqueue_import(client, monkeypatch, content: str) -> int:
+    """
+    Upload an import without running it
+    """
+    monkeypatch.setattr(celery_app, "send_task", lambda name, args, **options: None)
+    return client.post("/api/v1/tasks/imports", files={"file": ("tasks.csv", content)}).json()["id"]
+
+
+def test_import_running_elsewhere(client, run_imports, test_db, monkeypatch):
+    job_id = enqueue_import(client, monkeypatch, "title\na\nb")
+    with test_db.get_bind().begin() as connection:
+        connection.execute(text("UPDATE task_imports SET status = 'RUNNING', owner = 'other' WHERE id = :id"),
+                           {"id": job_id})
+
+    # A redelivery while another worker imports the job leaves it alone
+    task_import.run_import(test_db.get_bind(), job_id)
+    assert client.get(f"/api/v1/tasks/imports/{job_id}").json()["status"] == "running"
+    assert client.get("/api/v1/tasks").json() == []
+
+    # Until that worker stops making progress
+    with test_db.get_bind().begin() as connection:
+        connection.execute(text("UPDATE task_imports SET updated_at = now() - interval '1 hour' WHERE id = :id"),
+                           {"id": job_id})
+    task_import.run_import(test_db.get_bind(), job_id)
+    assert client.get(f"/api/v1/tasks/imports/{job_id}").json()["status"] == "done"
+    assert len(client.get("/api/v1/tasks").json()) == 2
+
+
+def test_import_taken_over(client, run_imports, test_db, monkeypatch):
+    job_id = enqueue_import(client, monkeypatch, "title\na\nb")
+    import_batch = task_import._import_batch
+
+    def import_batch_then_lose_job(connection, batch):
+        result = import_batch(connection, batch)
+        with test_db.get_bind().begin() as other:
+            other.execute(text("UPDATE task_imports SET owner = 'other' WHERE id = :id"), {"id": job_id})
+        return result
+
+    monkeypatch.setattr(task_import, "_import_batch", import_batch_then_lose_job)
+    task_import.run_import(test_db.get_bind(), job_id)
+
+    # The batch is left to the new owner
+    job = client.get(f"/api/v1/tasks/imports/{job_id}").json()
+    assert (job["status"], job["processed_rows"]) == ("running", 0)
+    assert client.get("/api/v1/tasks").json() == []
+
+
+def test_import_locks_projects(client, run_imports, test_db, monkeypatch):
+    project_id = client.post("/api/v1/projects", json={"title": "p"}).json()["id"]
+    copy_line = task_import._copy_line
+    delete_errors = []
+
+    def delete_project_then_copy(task):
+        # Another connection deleting the project before the batch commits waits for the lock
+        with test_db.get_bind().begin() as connection:
+            connection.execute(text("SET LOCAL lock_timeout = '100ms'"))
+            try:
+                connection.execute(text("DELETE FROM projects WHERE id = :id"), {"id": project_id})
+            except OperationalError as e:
+                delete_errors.append(e)
+        return copy_line(task)
+
+    monkeypatch.setattr(task_import, "_copy_line", delete_project_then_copy)
+    response = client.post("/api/v1/tasks/imports", files={"file": ("tasks.csv", f"title,project_id\na,{project_id}")})
+
+    job = client.get(f"/api/v1/tasks/imports/{response.json()['id']}").json()
+    assert (job["status"], job["imported_rows"]) == ("done", 1)
+    assert len(delete_errors) == 1
+
+
+def test_import_failed(client, run_imports, monkeypatch):
+    def fail(connection, batch):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(task_import, "_import_batch", fail)
+    response = client.post("/api/v1/tasks/imports", files={"file": ("tasks.csv", "title\na")})
+
+    job = client.get(f"/api/v1/tasks/imports/{response.json()['id']}").json()
+    assert (job["status"], job["detail"]) == ("failed", "boom")
+    assert list(run_imports.iterdir()) == []
+
+
+def test_import_unknown_format(client, run_imports):
+    response = client.post("/api/v1/tasks/imports", files={"file": ("tasks.txt", "")})
+    assert response.status_code == 400
+
+
+def test_read_import_not_found(client):
+    assert client.get("/api/v1/tasks/imports/1").status_code == 404
@@ -1,4 +1,12 @@
-from app.domains.tasks.db.projects.project_dtos import Status, Priority
+import json
+
+import pytest
+
+from app.core import config
+from sqlalchemy import select
+
+from app.domains.tasks.db.projects import project_repository
+from app.domains.tasks.db.projects.project_dtos import ProjectFilter, Sort, Status, Priority
 
 project_data = {
     "title": "Test Project",
@@ -54,3 +62,179 @@ def test_delete_project(client):
 
     assert response.status_code == 200
     assert response.json()["id"] == project_id
+
+
+def test_read_projects_with_cursor(client):
+    project_ids = [
+        client.post("/api/v1/projects", json=project_data).json()["id"]
+        for _ in range(3)
+    ]
+
+    response = client.get("/api/v1/projects", params={"limit": 2})
+    first_page = [project["id"] for project in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(
+        "/api/v1/projects", params={"limit": 2, "cursor": cursor}
+    )
+    second_page = [project["id"] for project in response.json()]
+
+    assert response.status_code == 200
+    assert first_page + second_page == list(reversed(project_ids))
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_read_projects_include(client):
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    client.post(
+        "/api/v1/tasks", json={"title": "Test Task", "project_id": project_id}
+    )
+
+    response = client.get("/api/v1/projects")
+    assert [task["title"] for task in response.json()[0]["tasks"]] == [
+        "Test Task"
+    ]
+
+    response = client.get("/api/v1/projects", params={"include": "none"})
+    assert response.status_code == 200
+    assert response.json()[0]["tasks"] == []
+
+
+def test_read_projects_query_budget(client, query_budget):
+    for title in ("a", "b", "c"):
+        project_id = client.post("/api/v1/projects", json={"title": title}).json()["id"]
+        client.post("/api/v1/tasks/bulk", json=[{"title": "t", "project_id": project_id}] * 2)
+
+    # The tasks of every project are read at once, not per project
+    with query_budget(2):
+        assert len(client.get("/api/v1/projects").json()) == 3
+        assert len(client.get(f"/api/v1/projects/{project_id}").json()["tasks"]) == 2
+
+
+def test_delete_project_with_tasks(client):
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    task_id = client.post(
+        "/api/v1/tasks", json={"title": "Test Task", "project_id": project_id}
+    ).json()["id"]
+
+    response = client.delete(f"/api/v1/projects/{project_id}")
+
+    assert response.status_code == 200
+    assert client.get(f"/api/v1/projects/{project_id}").status_code == 404
+    assert client.get(f"/api/v1/tasks/{task_id}").json()["project_id"] is None
+
+
+def test_update_project_not_found(client):
+    response = client.put("/api/v1/projects/4321", json={"title": "Missing"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("sort, filters", [
+    (Sort.CREATED_AT_DESC, None),
+    (Sort.CREATED_AT_DESC, ProjectFilter(assignee="Ann")),
+    (Sort.DUE_DATE_DESC, None),
+])
+def test_read_projects_index_ordered(explain, sort, filters):
+    plan = explain(project_repository._page(
+        select(*project_repository.PROJECT_COLUMNS), 0, None, filters, sort).limit(100))
+    assert "Index Scan" in plan
+    assert "Sort" not in plan
+
+
+def test_read_projects_filtered_and_sorted(client):
+    for title, status, due_date in [("a", "done", "2023-09-01"), ("b", "to_do", "2023-07-01"), ("c", "to_do", None)]:
+        client.post("/api/v1/projects", json={"title": title, "status": status, "due_date": due_date})
+
+    response = client.get(
+        "/api/v1/projects", params={"status": "to_do", "sort": "due_date", "include": "none"})
+    assert response.status_code == 200
+    assert [project["title"] for project in response.json()] == ["b", "c"]
+
+    response = client.get("/api/v1/projects", params={"due_from": "2023-08-01"})
+    assert [project["title"] for project in response.json()] == ["a"]
+
+
+@pytest.mark.parametrize("cache_backend", ["memory", "off"])
+def test_read_project_conditional(client, cache_backend, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", cache_backend)
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    task_id = client.post("/api/v1/tasks", json={"title": "a", "project_id": project_id}).json()["id"]
+
+    response = client.get(f"/api/v1/projects/{project_id}")
+    etag = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+    assert client.get(f"/api/v1/projects/{project_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    # Changes to the project's tasks change its representation
+    client.put(f"/api/v1/tasks/{task_id}", json={"title": "b"})
+    response = client.get(f"/api/v1/projects/{project_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    client.delete(f"/api/v1/tasks/{task_id}")
+    response = client.get(f"/api/v1/projects/{project_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    response = client.get(f"/api/v1/projects/{project_id}", params={"include": "none"})
+    assert "Last-Modified" in response.headers
+    assert response.headers["ETag"] != etag
+    response = client.get(f"/api/v1/projects/{project_id}", params={"include": "none"},
+                          headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 304
+
+
+def test_read_project_revalidated_without_loading(client, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", "off")
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    client.post("/api/v1/tasks", json={"title": "a", "project_id": project_id})
+    etag = client.get(f"/api/v1/projects/{project_id}").headers["ETag"]
+
+    # Without the read cache, revalidation only reads the project's version
+    monkeypatch.setattr(project_repository, "get_project_row", None)
+    response = client.get(f"/api/v1/projects/{project_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+# Without the read cache, revalidation only reads versions
+@pytest.mark.parametrize("cache_backend", ["memory", "off"])
+def test_read_projects_conditional(client, cache_backend, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", cache_backend)
+
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    task_id = client.post("/api/v1/tasks", json={"title": "a", "project_id": project_id}).json()["id"]
+
+    for include in ["tasks", "none"]:
+        etag = client.get("/api/v1/projects", params={"include": include}).headers["ETag"]
+        response = client.get("/api/v1/projects", params={"include": include}, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    etag = client.get("/api/v1/projects").headers["ETag"]
+    client.put(f"/api/v1/tasks/{task_id}", json={"project_id": None})
+    response = client.get("/api/v1/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["tasks"] == []
+
+
+def test_read_projects_fields(client):
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    client.post("/api/v1/tasks", json={"title": "a", "project_id": project_id})
+
+    response = client.get("/api/v1/projects", params={"fields": "id,title"})
+    assert response.json() == [{"id": project_id, "title": project_data["title"]}]
+
+    response = client.get(f"/api/v1/projects/{project_id}", params={"fields": "title,tasks"})
+    assert [task["title"] for task in response.json()["tasks"]] == ["a"]
+    assert response.json().keys() == {"title", "tasks"}
+
+
+def test_export_projects(client):
+    project_id = client.post("/api/v1/projects", json=project_data).json()["id"]
+    client.post("/api/v1/projects", json=project_data | {"title": "Other", "assignee": "Jane Doe"})
+    client.post("/api/v1/tasks", json={"title": "a", "project_id": project_id})
+
+    response = client.get("/api/v1/projects/export", params={"format": "ndjson", "assignee": "John Doe"})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [project_id]
+    assert "tasks" not in rows[0]
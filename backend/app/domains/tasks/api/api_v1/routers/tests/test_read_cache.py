@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.core import config
+from app.core.cache import VERSION_TTL_FACTOR, ReadThroughCache, memory_backend
+from app.domains.tasks.db.projects import project_entity
+
+
+def rename_behind_cache(test_db, project_id: int, title: str):
+    test_db.query(project_entity.Project).filter(project_entity.Project.id == project_id).update({"title": title})
+    test_db.commit()
+
+
+def test_project_reads_are_cached(client, test_db):
+    project_id = client.post("/api/v1/projects", json={"title": "a"}).json()["id"]
+    assert client.get(f"/api/v1/projects/{project_id}").json()["title"] == "a"
+    assert client.get("/api/v1/projects").json()[0]["title"] == "a"
+
+    # Writes that don't go through the repositories aren't seen
+    rename_behind_cache(test_db, project_id, "b")
+    assert client.get(f"/api/v1/projects/{project_id}").json()["title"] == "a"
+    assert client.get("/api/v1/projects").json()[0]["title"] == "a"
+    # Pages not read before load the current rows
+    assert client.get("/api/v1/projects", params={"sort": "title"}).json()[0]["title"] == "b"
+
+    client.put(f"/api/v1/projects/{project_id}", json={"description": "c"})
+    assert client.get(f"/api/v1/projects/{project_id}").json()["title"] == "b"
+    assert client.get("/api/v1/projects").json()[0]["title"] == "b"
+
+
+def test_task_writes_invalidate_projects(client):
+    first_id = client.post("/api/v1/projects", json={"title": "a"}).json()["id"]
+    second_id = client.post("/api/v1/projects", json={"title": "b"}).json()["id"]
+    task_id = client.post("/api/v1/tasks", json={"title": "t", "project_id": first_id}).json()["id"]
+    assert len(client.get(f"/api/v1/projects/{first_id}/tasks").json()) == 1
+    assert client.get(f"/api/v1/projects/{second_id}").json()["tasks"] == []
+
+    # Both the project the task leaves and the one it joins change
+    client.put(f"/api/v1/tasks/{task_id}", json={"project_id": second_id})
+    assert client.get(f"/api/v1/projects/{first_id}/tasks").json() == []
+    assert [task["id"] for task in client.get(f"/api/v1/projects/{second_id}").json()["tasks"]] == [task_id]
+
+    client.patch("/api/v1/tasks/bulk", json=[{"id": task_id, "project_id": first_id}])
+    assert client.get(f"/api/v1/projects/{second_id}").json()["tasks"] == []
+    assert len(client.get(f"/api/v1/projects/{first_id}/tasks").json()) == 1
+
+
+def test_project_delete_invalidates_tasks(client):
+    project_id = client.post("/api/v1/projects", json={"title": "a"}).json()["id"]
+    task_id = client.post("/api/v1/tasks", json={"title": "t", "project_id": project_id}).json()["id"]
+    assert client.get(f"/api/v1/tasks/{task_id}").json()["project_id"] == project_id
+    assert client.get("/api/v1/tasks").json()[0]["project_id"] == project_id
+
+    assert client.delete(f"/api/v1/projects/{project_id}").json()["tasks"] == []
+    assert client.get(f"/api/v1/tasks/{task_id}").json()["project_id"] is None
+    assert client.get("/api/v1/tasks").json()[0]["project_id"] is None
+    assert client.get(f"/api/v1/projects/{project_id}").status_code == 404
+
+
+def test_cache_off(client, test_db, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", "off")
+    project_id = client.post("/api/v1/projects", json={"title": "a"}).json()["id"]
+    client.get(f"/api/v1/projects/{project_id}")
+
+    rename_behind_cache(test_db, project_id, "b")
+    assert client.get(f"/api/v1/projects/{project_id}").json()["title"] == "b"
+
+
+def test_concurrent_misses_load_once():
+    cache = ReadThroughCache(prefix="test")
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.1)
+        return b"value"
+
+    async def read_concurrently():
+        return await asyncio.gather(*(cache.get_or_load("ns", "variant", load) for _ in range(5)))
+
+    assert asyncio.run(read_concurrently()) == [b"value"] * 5
+    assert len(loads) == 1
+
+    asyncio.run(cache.invalidate("ns"))
+    asyncio.run(cache.get_or_load("ns", "variant", load))
+    assert len(loads) == 2
+
+
+def test_versions_expire(monkeypatch):
+    monkeypatch.setattr(config, "CACHE_TTL", 60)
+    cache = ReadThroughCache(prefix="test")
+    asyncio.run(cache.invalidate("ns"))
+
+    version, expires_at = memory_backend._entries[cache._version_key("ns")]
+    assert version != b"0"
+    assert expires_at - time.monotonic() == pytest.approx(60 * VERSION_TTL_FACTOR, abs=1)
+    asyncio.run(cache.invalidate("ns"))
+    assert memory_backend.get(cache._version_key("ns")) != version
+
+
+def test_redis_errors_fall_back_to_loading(monkeypatch):
+    class Unreachable:
+        def __getattr__(self, name):
+            def command(*args, **kwargs):
+                raise ConnectionError("unreachable")
+            return command
+
+    monkeypatch.setattr(config, "CACHE_BACKEND", "redis")
+    monkeypatch.setattr(ReadThroughCache, "backend", Unreachable())
+
+    async def load():
+        return b"value"
+
+    cache = ReadThroughCache(prefix="test")
+    assert asyncio.run(cache.get_or_load("ns", "variant", load)) == b"value"
+    asyncio.run(cache.invalidate("ns"))
@@ -0,0 +1,48 @@
+def test_search_ranks_title_over_description(client):
+    client.post("/api/v1/tasks", json={"title": "Write docs", "description": "Explain the deployment"})
+    client.post("/api/v1/tasks", json={"title": "Deploy backend", "description": "Roll out"})
+    client.post("/api/v1/projects", json={"title": "Marketing"})
+
+    response = client.get("/api/v1/search", params={"q": "deploying"})
+
+    assert response.status_code == 200
+    assert [result["title"] for result in response.json()] == ["Deploy backend", "Write docs"]
+    assert response.json()[0]["type"] == "task"
+
+
+def test_search_follows_updates(client):
+    task_id = client.post("/api/v1/tasks", json={"title": "Old name"}).json()["id"]
+    client.put(f"/api/v1/tasks/{task_id}", json={"title": "Renamed"})
+
+    assert client.get("/api/v1/search", params={"q": "old"}).json() == []
+    assert [result["id"] for result in client.get(
+        "/api/v1/search", params={"q": "renamed"}).json()] == [task_id]
+
+
+def test_search_type_and_pagination(client):
+    for i in range(3):
+        client.post("/api/v1/projects", json={"title": f"Release {i}"})
+    client.post("/api/v1/tasks", json={"title": "Release notes"})
+
+    response = client.get("/api/v1/search", params={"q": "release", "type": "project", "limit": 2})
+    assert len(response.json()) == 2
+    assert {result["type"] for result in response.json()} == {"project"}
+
+    response = client.get("/api/v1/search", params={"q": "release", "type": "project", "skip": 2})
+    assert len(response.json()) == 1
+
+
+def test_typeahead(client):
+    client.post("/api/v1/tasks", json={"title": "Planning"})
+    client.post("/api/v1/projects", json={"title": "Plan"})
+    client.post("/api/v1/tasks", json={"title": "Replan"})
+    client.post("/api/v1/tasks", json={"title": "100% done"})
+
+    response = client.get("/api/v1/search/typeahead", params={"q": "pla"})
+    assert response.status_code == 200
+    assert [result["title"] for result in response.json()] == ["Plan", "Planning"]
+
+    # LIKE wildcards in q match literally
+    response = client.get("/api/v1/search/typeahead", params={"q": "100%"})
+    assert [result["title"] for result in response.json()] == ["100% done"]
+    assert client.get("/api/v1/search/typeahead", params={"q": "_"}).json() == []
@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+
+from app.core.broadcast import Subscription
+from app.domains.tasks.api.api_v1.routers import stream
+from app.domains.tasks.db.changes import change_events
+from app.domains.tasks.db.changes.change_dtos import Action
+
+
+def test_stream_websocket(client):
+    with client.websocket_connect("/api/v1/stream") as websocket:
+        assert websocket.receive_json() == {"type": "subscribed"}
+
+        task_id = client.post("/api/v1/tasks", json={"title": "a"}).json()["id"]
+        event = websocket.receive_json()
+        assert (event["type"], event["action"], event["id"]) == ("task", "created", task_id)
+        assert event["data"]["title"] == "a"
+
+        project_id = client.post("/api/v1/projects", json={"title": "p"}).json()["id"]
+        client.put(f"/api/v1/tasks/{task_id}", json={"project_id": project_id})
+        assert websocket.receive_json()["action"] == "created"
+        event = websocket.receive_json()
+        assert (event["action"], event["project_ids"]) == ("updated", [project_id])
+
+        client.delete(f"/api/v1/projects/{project_id}")
+        event = websocket.receive_json()
+        assert (event["type"], event["action"], event["data"]) == ("project", "deleted", None)
+        # Deleting the project detached its task
+        event = websocket.receive_json()
+        assert (event["type"], event["id"], event["data"]) == ("task", task_id, None)
+
+
+def test_stream_websocket_per_project(client):
+    first_id = client.post("/api/v1/projects", json={"title": "a"}).json()["id"]
+    second_id = client.post("/api/v1/projects", json={"title": "b"}).json()["id"]
+    task_id = client.post("/api/v1/tasks", json={"title": "t", "project_id": first_id}).json()["id"]
+
+    with client.websocket_connect("/api/v1/stream", params={"project_id": second_id}) as websocket:
+        websocket.receive_json()
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "u"})
+        client.patch("/api/v1/tasks/bulk", json=[{"id": task_id, "project_id": second_id}])
+
+        # Only the move concerns the second project
+        event = websocket.receive_json()
+        assert (event["action"], event["project_ids"]) == ("updated", [first_id, second_id])
+        assert event["data"]["title"] == "u"
+
+
+def test_stream_server_sent_events():
+    async def read_events():
+        events = stream._server_sent_events([1])
+        first = await events.__anext__()
+        now = datetime.datetime.now()
+        await change_events.publish_tasks(Action.DELETED, [
+            {"id": 2, "title": "other", "project_id": None, "created_at": now, "updated_at": now},
+            {"id": 3, "title": "mine", "project_id": 1, "created_at": now, "updated_at": now},
+        ])
+        second = await events.__anext__()
+        await events.aclose()
+        return first, second
+
+    subscribed, deleted = asyncio.run(read_events())
+    assert subscribed == "event: subscribed\ndata: {}\n\n"
+    assert deleted.startswith("event: task.deleted\ndata: ")
+    assert '"id":3' in deleted
+
+
+def test_subscription_overflow():
+    async def overflow():
+        subscription = Subscription(maxsize=1)
+        subscription.put("a")
+        subscription.put("b")
+        await asyncio.sleep(0)
+        return await subscription.get()
+
+    assert asyncio.run(overflow()) is None
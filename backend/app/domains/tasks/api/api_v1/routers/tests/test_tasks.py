@@ -1,4 +1,19 @@
-from app.domains.tasks.db.tasks.task_dtos import Status, Priority
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.pool import NullPool
+
+from app.core import config
+from conftest import get_test_db_url
+from app.domains.tasks.api.api_v1.routers import tasks
+from app.domains.tasks.db.tasks import task_repository
+from app.db.pagination import encode_cursor
+from app.domains.tasks.db.tasks.task_dtos import Sort, Status, Priority, TaskFilter
 
 task_data = {
     "title": "Test Task",
@@ -45,6 +60,16 @@ def test_update_task(client):
     assert response.json()["status"] == updated_data["status"]
 
 
+def test_update_task_project_query_budget(client, query_budget):
+    project_id = client.post("/api/v1/projects", json={"title": "Test Project"}).json()["id"]
+    task_id = client.post("/api/v1/tasks", json=task_data).json()["id"]
+
+    # Reading the project the task leaves is part of the UPDATE
+    with query_budget(1):
+        response = client.put(f"/api/v1/tasks/{task_id}", json={"project_id": project_id})
+    assert response.json()["project_id"] == project_id
+
+
 def test_delete_task(client):
     response = client.post("/api/v1/tasks", json=task_data)
     task_id = response.json()["id"]
@@ -54,3 +79,328 @@ def test_delete_task(client):
 
     assert response.status_code == 200
     assert response.json()["id"] == task_id
+
+
+def test_read_tasks_with_cursor(client):
+    task_ids = [
+        client.post("/api/v1/tasks", json=task_data).json()["id"]
+        for _ in range(5)
+    ]
+
+    response = client.get("/api/v1/tasks", params={"limit": 2})
+    assert response.status_code == 200
+    seen = [task["id"] for task in response.json()]
+
+    while "X-Next-Cursor" in response.headers:
+        response = client.get(
+            "/api/v1/tasks",
+            params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+        )
+        assert response.status_code == 200
+        seen += [task["id"] for task in response.json()]
+
+    assert seen == list(reversed(task_ids))
+
+
+def test_read_tasks_invalid_cursor(client):
+    response = client.get("/api/v1/tasks", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_create_task_project_not_found(client):
+    response = client.post(
+        "/api/v1/tasks", json={**task_data, "project_id": 4321}
+    )
+
+    assert response.status_code == 404
+
+
+def test_update_task_other_integrity_error(client):
+    task_id = client.post("/api/v1/tasks", json=task_data).json()["id"]
+
+    # Only foreign key violations mean the project is missing
+    with pytest.raises(IntegrityError):
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": None})
+
+
+def test_update_task_not_found(client):
+    response = client.put("/api/v1/tasks/4321", json={"title": "Missing"})
+
+    assert response.status_code == 404
+
+
+def test_delete_task_not_found(client):
+    response = client.delete("/api/v1/tasks/4321")
+
+    assert response.status_code == 404
+
+
+def test_create_tasks_bulk(client):
+    project_id = client.post(
+        "/api/v1/projects", json={"title": "Test Project"}
+    ).json()["id"]
+
+    response = client.post(
+        "/api/v1/tasks/bulk",
+        json=[
+            {**task_data, "project_id": project_id},
+            {**task_data, "project_id": 4321},
+            {"title": "Another Task"},
+        ],
+    )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status_code"] for result in results] == [201, 404, 201]
+    assert results[0]["task"]["project_id"] == project_id
+    assert results[1]["detail"] == "Project not found"
+    assert results[2]["task"]["title"] == "Another Task"
+
+
+def test_bulk_locks_projects(client, monkeypatch):
+    project_id = client.post("/api/v1/projects", json={"title": "Test Project"}).json()["id"]
+    create_tasks = task_repository.create_tasks
+    delete_errors = []
+
+    async def delete_project_then_create(db, tasks):
+        # Another connection deleting the project between the check and the INSERT waits for the lock
+        with create_engine(get_test_db_url(), poolclass=NullPool).begin() as connection:
+            connection.execute(text("SET LOCAL lock_timeout = '100ms'"))
+            try:
+                connection.execute(text("DELETE FROM projects WHERE id = :id"), {"id": project_id})
+            except OperationalError as e:
+                delete_errors.append(e)
+        return await create_tasks(db, tasks)
+
+    monkeypatch.setattr(task_repository, "create_tasks", delete_project_then_create)
+    response = client.post("/api/v1/tasks/bulk", json=[{**task_data, "project_id": project_id}])
+
+    assert [result["status_code"] for result in response.json()] == [201]
+    assert len(delete_errors) == 1
+
+
+def test_update_tasks_bulk(client):
+    task_ids = [
+        client.post("/api/v1/tasks", json=task_data).json()["id"]
+        for _ in range(2)
+    ]
+
+    response = client.patch(
+        "/api/v1/tasks/bulk",
+        json=[
+            {"id": task_ids[0], "title": "Updated Task Title"},
+            {"id": task_ids[1], "status": str(Status.DONE)},
+            {"id": 4321, "title": "Missing"},
+            {"id": task_ids[0], "project_id": 4321},
+        ],
+    )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status_code"] for result in results] == [200, 200, 404, 404]
+    assert results[0]["task"]["title"] == "Updated Task Title"
+    assert results[1]["task"]["title"] == task_data["title"]
+    assert results[1]["task"]["status"] == str(Status.DONE)
+    assert client.get(f"/api/v1/tasks/{task_ids[1]}").json()["status"] == str(
+        Status.DONE
+    )
+
+
+@pytest.mark.query_budget(4)
+def test_bulk_query_budget(client):
+    # The statements of a bulk request don't grow with its items
+    project_id = client.post("/api/v1/projects", json={"title": "Test Project"}).json()["id"]
+    results = client.post("/api/v1/tasks/bulk", json=[{**task_data, "project_id": project_id}] * 50).json()
+    task_ids = [result["task"]["id"] for result in results]
+
+    response = client.patch("/api/v1/tasks/bulk", json=[
+        {"id": task_id, "title": "Updated Task Title", "project_id": project_id} for task_id in task_ids])
+    assert [result["status_code"] for result in response.json()] == [200] * 50
+    client.request("DELETE", "/api/v1/tasks/bulk", json=task_ids)
+
+
+def test_delete_tasks_bulk(client):
+    task_id = client.post("/api/v1/tasks", json=task_data).json()["id"]
+
+    response = client.request(
+        "DELETE", "/api/v1/tasks/bulk", json=[task_id, 4321]
+    )
+
+    assert response.status_code == 200
+    assert [result["status_code"] for result in response.json()] == [200, 404]
+    assert client.get(f"/api/v1/tasks/{task_id}").status_code == 404
+
+
+@pytest.mark.parametrize("sort, filters, cursor", [
+    (Sort.CREATED_AT_DESC, None, None),
+    (Sort.CREATED_AT_DESC, None, encode_cursor(datetime.datetime(2023, 7, 1), 10)),
+    (Sort.CREATED_AT_DESC, TaskFilter(status=[Status.DONE]), None),
+    (Sort.CREATED_AT_DESC, TaskFilter(project_id=1), None),
+    (Sort.DUE_DATE, None, None),
+    (Sort.DUE_DATE_DESC, None, None),
+])
+def test_read_tasks_index_ordered(explain, sort, filters, cursor):
+    # Pages are read in index order, without sorting every matching row
+    plan = explain(task_repository._select_tasks(
+        task_repository.TASK_COLUMNS, 0, cursor, filters, sort).limit(100))
+    assert "Index Scan" in plan
+    assert "Sort" not in plan
+
+
+def test_read_tasks_filtered(client):
+    project_id = client.post(
+        "/api/v1/projects", json={"title": "Board"}).json()["id"]
+    tasks = [
+        {"title": "a", "status": "to_do", "assignee": "Ann",
+         "due_date": "2023-07-01", "project_id": project_id},
+        {"title": "b", "status": "done", "assignee": "Ann",
+         "due_date": "2023-08-01", "project_id": project_id},
+        {"title": "c", "status": "in_progress", "assignee": "Bob",
+         "due_date": "2023-09-01"},
+    ]
+    for task in tasks:
+        client.post("/api/v1/tasks", json=task)
+
+    def titles(**params):
+        response = client.get("/api/v1/tasks", params=params)
+        assert response.status_code == 200
+        return sorted(task["title"] for task in response.json())
+
+    assert titles(status=["to_do", "in_progress"]) == ["a", "c"]
+    assert titles(assignee="Ann") == ["a", "b"]
+    assert titles(project_id=project_id) == ["a", "b"]
+    assert titles(due_from="2023-07-15", due_to="2023-08-15") == ["b"]
+    assert titles(assignee="Ann", status="done") == ["b"]
+
+
+def test_read_tasks_sorted(client):
+    for title, priority in [("a", "medium"), ("b", "high"), ("c", None), ("d", "low")]:
+        client.post("/api/v1/tasks", json={"title": title, "priority": priority})
+
+    response = client.get("/api/v1/tasks", params={"sort": "-priority"})
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["b", "a", "d", "c"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/v1/tasks", params={"sort": "title", "limit": 2})
+    assert [task["title"] for task in response.json()] == ["a", "b"]
+
+
+def test_read_tasks_cursor_requires_default_sort(client):
+    client.post("/api/v1/tasks", json=task_data)
+    cursor = client.get("/api/v1/tasks", params={"limit": 1}).headers["X-Next-Cursor"]
+
+    response = client.get("/api/v1/tasks", params={"cursor": cursor, "sort": "title"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("cache_backend", ["memory", "off"])
+def test_read_task_conditional(client, cache_backend, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", cache_backend)
+    task_id = client.post("/api/v1/tasks", json=task_data).json()["id"]
+
+    response = client.get(f"/api/v1/tasks/{task_id}")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert not etag.startswith("W/")
+
+    response = client.get(f"/api/v1/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = client.get(f"/api/v1/tasks/{task_id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    client.put(f"/api/v1/tasks/{task_id}", json={"title": "Changed"})
+    response = client.get(f"/api/v1/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_read_task_revalidated_without_loading(client, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", "off")
+    task_id = client.post("/api/v1/tasks", json=task_data).json()["id"]
+    etag = client.get(f"/api/v1/tasks/{task_id}").headers["ETag"]
+
+    # Without the read cache, revalidation only reads the task's version
+    monkeypatch.setattr(task_repository, "get_task_row", None)
+    response = client.get(f"/api/v1/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+# Without the read cache, revalidation only reads versions
+@pytest.mark.parametrize("cache_backend", ["memory", "off"])
+def test_read_tasks_conditional(client, cache_backend, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", cache_backend)
+
+    for _ in range(3):
+        client.post("/api/v1/tasks", json=task_data)
+
+    response = client.get("/api/v1/tasks", params={"limit": 2})
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+
+    response = client.get("/api/v1/tasks", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert "X-Next-Cursor" in response.headers
+
+    # A different page is a different representation
+    response = client.get("/api/v1/tasks", params={"limit": 2, "skip": 1}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    client.post("/api/v1/tasks", json=task_data)
+    response = client.get("/api/v1/tasks", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_read_tasks_fields(client):
+    task_id = client.post("/api/v1/tasks", json=task_data).json()["id"]
+
+    response = client.get("/api/v1/tasks", params={"fields": "title, status,id"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": task_id, "title": task_data["title"], "status": task_data["status"]}]
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/api/v1/tasks/{task_id}", params={"fields": "title"})
+    assert response.json() == {"title": task_data["title"]}
+
+    # Each field set is its own representation
+    response = client.get("/api/v1/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "description" in response.json()[0]
+
+
+def test_read_tasks_unknown_fields(client):
+    response = client.get("/api/v1/tasks", params={"fields": "title,secret"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: secret"
+
+
+def test_export_tasks(client, monkeypatch):
+    # Several cursor batches per export
+    monkeypatch.setattr(tasks, "EXPORT_BATCH_SIZE", 2)
+    for title in ["a", "b", "c"]:
+        client.post("/api/v1/tasks", json=task_data | {"title": title})
+    client.post("/api/v1/tasks", json=task_data | {"title": "d", "status": str(Status.DONE)})
+
+    response = client.get("/api/v1/tasks/export", params={"status": str(Status.IN_PROGRESS), "sort": "title"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == ["a", "b", "c"]
+    assert rows[0]["status"] == task_data["status"]
+
+    response = client.get("/api/v1/tasks/export", params={"format": "ndjson", "sort": "-title"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["d", "c", "b", "a"]
+    assert rows[0]["status"] == str(Status.DONE)
+
+
+def test_export_tasks_empty(client):
+    response = client.get("/api/v1/tasks/export")
+    assert response.text.splitlines() == [",".join(column.key for column in task_repository.TASK_COLUMNS)]
@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from enum import Enum
+import typing as t
+
+
+class EntityType(Enum):
+    TASK = 'task'
+    PROJECT = 'project'
+
+    def __str__(self):
+        return self.value
+
+
+class Action(Enum):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    # Tasks were bulk loaded into project_ids, without individual events
+    IMPORTED = 'imported'
+
+    def __str__(self):
+        return self.value
+
+
+class ChangeEvent(BaseModel):
+    type: EntityType
+    action: Action
+    id: int | None = None
+    # Projects the change concerns, to match per-project subscriptions: a
+    # task's project before and after the change, or the project itself
+    project_ids: t.List[int] = []
+    # The task or project after the change, without a project's tasks.
+    # None for deletions and changes the client should reload.
+    data: t.Dict[str, t.Any] | None = None
@@ -0,0 +1,79 @@
+import typing as t
+
+import orjson
+
+from app.core.broadcast import Broadcaster
+from app.domains.tasks.db.changes.change_dtos import Action, ChangeEvent, EntityType
+from app.domains.tasks.db.projects import project_dtos
+from app.domains.tasks.db.tasks import task_dtos
+
+CHANGES_CHANNEL = "changes:tasks"
+
+
+# Each message is a JSON list of the ChangeEvents of one write
+def _decode(message: bytes) -> t.List[ChangeEvent]:
+    return [ChangeEvent.model_validate(event) for event in orjson.loads(message)]
+
+
+change_broadcaster = Broadcaster(CHANGES_CHANNEL, _decode)
+
+
+def _encode(events: t.Iterable[ChangeEvent]) -> bytes:
+    return orjson.dumps([event.model_dump(mode="json") for event in events])
+
+
+def task_events(action: Action, db_tasks: t.Iterable, previous_project_ids: t.Mapping[int, int | None] = {}) -> t.List[ChangeEvent]:
+    """
+    Events for tasks after action, given the project of each moved task
+    before it
+    """
+    events = []
+    for db_task in db_tasks:
+        task = task_dtos.Task.model_validate(db_task)
+        project_ids = {task.project_id, previous_project_ids.get(task.id)} - {None}
+        events.append(ChangeEvent(
+            type=EntityType.TASK, action=action, id=task.id, project_ids=sorted(project_ids),
+            data=None if action == Action.DELETED else task.model_dump(mode="json"),
+        ))
+    return events
+
+
+def project_events(action: Action, db_projects: t.Iterable) -> t.List[ChangeEvent]:
+    events = []
+    for db_project in db_projects:
+        project = project_dtos.Project.model_validate(db_project)
+        events.append(ChangeEvent(
+            type=EntityType.PROJECT, action=action, id=project.id, project_ids=[project.id],
+            data=None if action == Action.DELETED else project.model_dump(mode="json", exclude={"tasks"}),
+        ))
+    return events
+
+
+async def publish_tasks(action: Action, db_tasks: t.Iterable,
+                        previous_project_ids: t.Mapping[int, int | None] = {}):
+    """
+    Send the task_events of a write to the stream clients of every process
+    """
+    if change_broadcaster.enabled:
+        await change_broadcaster.publish(_encode(task_events(action, db_tasks, previous_project_ids)))
+
+
+async def publish_projects(action: Action, db_projects: t.Iterable, detached_task_ids: t.Iterable[int] = ()):
+    """
+    Send the project_events of a write to the stream clients of every
+    process, and updates without data for the tasks a deletion detached
+    """
+    if change_broadcaster.enabled:
+        events = project_events(action, db_projects)
+        events += [ChangeEvent(type=EntityType.TASK, action=Action.UPDATED, id=task_id,
+                               project_ids=events[0].project_ids) for task_id in detached_task_ids]
+        await change_broadcaster.publish(_encode(events))
+
+
+def publish_import(project_ids: t.Iterable[int]):
+    """
+    Tell clients that tasks were imported into project_ids, from a worker
+    """
+    if change_broadcaster.enabled:
+        change_broadcaster.publish_sync(_encode([ChangeEvent(
+            type=EntityType.TASK, action=Action.IMPORTED, project_ids=sorted(project_ids))]))
@@ -0,0 +1,79 @@
+from fastapi import HTTPException, status
+from sqlalchemy import case, tuple_
+from pydantic import BaseModel
+
+from app.db.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from app.domains.tasks.db.tasks.task_dtos import Sort
+
+# Keyset cursors encode (created_at, id), so they only follow this order
+CURSOR_SORT = Sort.CREATED_AT_DESC
+
+
+def apply_filters(query, entity, filters: BaseModel | None):
+    """
+    Translate the set fields of a TaskFilter or ProjectFilter into WHERE
+    clauses on the matching columns of entity
+    """
+    if filters is None:
+        return query
+    if filters.status:
+        query = query.filter(entity.status.in_(filters.status))
+    if filters.priority:
+        query = query.filter(entity.priority.in_(filters.priority))
+    if filters.assignee is not None:
+        query = query.filter(entity.assignee == filters.assignee)
+    if getattr(filters, "project_id", None) is not None:
+        query = query.filter(entity.project_id == filters.project_id)
+    if filters.due_from is not None:
+        query = query.filter(entity.due_date >= filters.due_from)
+    if filters.due_to is not None:
+        query = query.filter(entity.due_date <= filters.due_to)
+    return query
+
+
+def _sort_key(entity, sort: Sort):
+    """
+    The sort expression, and whether rows can miss it
+    """
+    name = sort.value.lstrip("-")
+    if name == "priority":
+        # Priorities are stored as strings, rank them in declaration order
+        enum_class = entity.priority.type.enum_class
+        return case(
+            *((entity.priority == member, rank)
+              for rank, member in enumerate(enum_class))
+        ), True
+    return getattr(entity, name), entity.__table__.c[name].nullable
+
+
+def apply_sort(query, entity, sort: Sort):
+    """
+    Order by sort with id as tie breaker, rows missing the sort key last
+    """
+    key, nullable = _sort_key(entity, sort)
+    if sort.value.startswith("-"):
+        # NULLS LAST only where rows can miss the key, on NOT NULL columns a
+        # backward scan of their (key, id) index gives the order
+        order = key.desc().nulls_last() if nullable else key.desc()
+        return query.order_by(order, entity.id.desc())
+    return query.order_by(key.asc().nulls_last() if nullable else key.asc(), entity.id.asc())
+
+
+def apply_page(query, entity, skip: int, cursor: str | None, sort: Sort):
+    if cursor is None:
+        return query.offset(skip)
+    if sort != CURSOR_SORT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"cursor requires sort={CURSOR_SORT}",
+        )
+    # Keyset pagination, seeks through the (created_at, id) index instead of scanning skipped rows
+    return query.filter(tuple_(entity.created_at, entity.id) < decode_cursor(cursor))
+
+
+def next_page_headers(items, limit: int, sort: Sort) -> dict[str, str]:
+    """
+    X-Next-Cursor header for a page, when it has a next page and the sort allows cursors
+    """
+    next_page = next_cursor(items, limit) if sort == CURSOR_SORT else None
+    return {} if next_page is None else {NEXT_CURSOR_HEADER: next_page}
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, ConfigDict
+import datetime
+from enum import Enum
+
+
+class ImportStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __str__(self):
+        return self.value
+
+
+class Format(Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+    def __str__(self):
+        return self.value
+
+
+class RowError(BaseModel):
+    # 1-based, not counting the CSV header
+    row: int
+    detail: str
+
+
+class ImportJob(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: ImportStatus
+    format: Format
+    filename: str | None = None
+    # Known once the worker has read through the file
+    total_rows: int | None = None
+    processed_rows: int
+    imported_rows: int
+    failed_rows: int
+    # The first IMPORT_MAX_ERRORS rejected rows
+    errors: list[RowError]
+    detail: str | None = None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    finished_at: datetime.datetime | None = None
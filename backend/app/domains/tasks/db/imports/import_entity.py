@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Enum, Text, DateTime, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.session import Base
+from app.domains.tasks.db.imports.import_dtos import Format, ImportStatus
+
+
+class ImportJob(Base):
+    __tablename__ = 'task_imports'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    status = Column(Enum(ImportStatus, native_enum=False, length=20),
+                    server_default=ImportStatus.PENDING.name, nullable=False)
+    format = Column(Enum(Format, native_enum=False, length=20), nullable=False)
+    filename = Column(String(255), nullable=True)
+    # Where the upload waits for the worker, shared through IMPORT_DIR
+    path = Column(String(1024), nullable=False)
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, server_default="0", nullable=False)
+    imported_rows = Column(Integer, server_default="0", nullable=False)
+    failed_rows = Column(Integer, server_default="0", nullable=False)
+    errors = Column(JSONB, server_default=text("'[]'::jsonb"), nullable=False)
+    detail = Column(Text, nullable=True)
+    # The run importing the job, see task_import.run_import
+    owner = Column(String(255), nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(),
+                        onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime, nullable=True)
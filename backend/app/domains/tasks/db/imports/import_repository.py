@@ -0,0 +1,14 @@
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domains.tasks.db.imports import import_dtos, import_entity
+
+
+async def get_import(db: AsyncSession, job_id: int):
+    return await db.scalar(select(import_entity.ImportJob).filter(import_entity.ImportJob.id == job_id))
+
+
+async def create_import(db: AsyncSession, format: import_dtos.Format, filename: str | None, path: str):
+    db_job = await db.scalar(insert(import_entity.ImportJob).values(
+        format=format, filename=filename, path=path).returning(import_entity.ImportJob))
+    await db.commit()
+    return db_job
@@ -0,0 +1,203 @@
+import contextlib
+import csv
+import datetime
+import io
+import itertools
+import logging
+import os
+import socket
+import typing as t
+import uuid
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.core import config
+from app.core.cache import read_cache
+from app.db.copy import copy_line
+from app.domains.tasks.db.changes import change_events
+from app.domains.tasks.db.imports import import_dtos, import_entity
+from app.domains.tasks.db.projects import project_entity
+from app.domains.tasks.db.read_cache import PROJECTS, TASKS, project_namespace
+from app.domains.tasks.db.tasks import task_dtos, task_entity
+
+logger = logging.getLogger(__name__)
+
+ImportJob = import_entity.ImportJob
+# Columns COPY fills, the others take their server defaults
+COPY_COLUMNS = ["title", "description", "due_date", "assignee", "status", "priority", "project_id"]
+COPY_STATEMENT = f"COPY {task_entity.Task.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+
+
+def _read_csv(file: t.TextIO) -> t.Iterator[dict]:
+    # Empty cells are missing values
+    for row in csv.DictReader(file):
+        yield {name: value for name, value in row.items() if value != ""}
+
+
+def _read_ndjson(file: t.TextIO) -> t.Iterator[dict | Exception]:
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield e
+
+
+READERS = {
+    import_dtos.Format.CSV: _read_csv,
+    import_dtos.Format.NDJSON: _read_ndjson,
+}
+
+
+def read_rows(path: str, format: import_dtos.Format) -> t.Iterator[tuple[int, dict | Exception]]:
+    """
+    (row number, values) of each row of the file, with the error instead
+    of the values for rows that can't be parsed
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from enumerate(READERS[format](file), start=1)
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, detail['loc'])) or 'row'}: {detail['msg']}" for detail in error.errors())
+    return str(error)
+
+
+def _copy_line(task: task_dtos.TaskCreate) -> str:
+    values = task.model_dump(include=set(COPY_COLUMNS))
+    return copy_line(values[name] for name in COPY_COLUMNS)
+
+
+def _import_batch(connection: Connection, batch: list[tuple[int, dict | Exception]]):
+    """
+    COPY the valid rows of batch into tasks. Returns the number of rows
+    imported, the errors of the others and the projects they went to.
+    """
+    valid, errors = [], []
+    for row, values in batch:
+        try:
+            if isinstance(values, Exception):
+                raise values
+            valid.append((row, task_dtos.TaskCreate.model_validate(values)))
+        except ValueError as e:
+            errors.append(import_dtos.RowError(row=row, detail=_describe(e)))
+
+    # One lookup for the projects of the whole batch, locked like
+    # get_existing_project_ids until the batch commits
+    project_ids = {task.project_id for _, task in valid if task.project_id is not None}
+    if project_ids:
+        project_ids = set(connection.scalars(select(project_entity.Project.id).filter(
+            project_entity.Project.id.in_(project_ids)).with_for_update(read=True, key_share=True)))
+
+    buffer = io.StringIO()
+    imported = 0
+    for row, task in valid:
+        if task.project_id is not None and task.project_id not in project_ids:
+            errors.append(import_dtos.RowError(row=row, detail="Project not found"))
+            continue
+        buffer.write(_copy_line(task))
+        imported += 1
+    if imported:
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(COPY_STATEMENT, buffer)
+    errors.sort(key=lambda error: error.row)
+    return imported, errors, project_ids
+
+
+def _claim(connection: Connection, job_id: int, owner: str):
+    """
+    Take the job for owner, in one statement so only one worker gets it.
+    Pending jobs can be taken, and running ones without progress for
+    IMPORT_CLAIM_TIMEOUT seconds, whose worker died or hung. None when
+    another worker has the job or it is finished.
+    """
+    stale = func.now() - datetime.timedelta(seconds=config.IMPORT_CLAIM_TIMEOUT)
+    # Against the table, the ORM can't RETURNING on a Connection
+    jobs = ImportJob.__table__
+    job = connection.execute(update(jobs).filter(jobs.c.id == job_id, or_(
+        jobs.c.status == import_dtos.ImportStatus.PENDING,
+        and_(jobs.c.status == import_dtos.ImportStatus.RUNNING, jobs.c.updated_at < stale),
+    )).values(status=import_dtos.ImportStatus.RUNNING, owner=owner).returning(*jobs.columns)).first()
+    connection.commit()
+    return job
+
+
+def _update(connection: Connection, job_id: int, owner: str, **values) -> bool:
+    """
+    Update the job, and its updated_at heartbeat, if owner still has it.
+    Doesn't commit.
+    """
+    result = connection.execute(update(ImportJob).filter(
+        ImportJob.id == job_id, ImportJob.owner == owner).values(**values))
+    return result.rowcount == 1
+
+
+def _finish(connection: Connection, job_id: int, owner: str, status: import_dtos.ImportStatus, **values) -> bool:
+    finished = _update(connection, job_id, owner, status=status, finished_at=func.now(), **values)
+    connection.commit()
+    return finished
+
+
+def _remove_upload(path: str):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def run_import(engine: Engine, job_id: int):
+    """
+    Import the file of a pending job in batches of IMPORT_BATCH_SIZE rows,
+    committing each batch with the job's progress. A job that was
+    interrupted resumes after its last committed batch.
+
+    A redelivered job that another worker is still importing is skipped.
+    Each batch commits only while this run owns the job, so a run that
+    lost it to another worker stops without importing rows twice.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    with engine.connect() as connection:
+        job = _claim(connection, job_id, owner)
+        if job is None:
+            logger.info("Import %s is finished or running elsewhere", job_id)
+            return
+        try:
+            total_rows = job.total_rows
+            if total_rows is None:
+                total_rows = sum(1 for _ in read_rows(job.path, job.format))
+                if not _update(connection, job_id, owner, total_rows=total_rows):
+                    return
+                connection.commit()
+
+            errors = [import_dtos.RowError.model_validate(error) for error in job.errors]
+            rows = itertools.islice(read_rows(job.path, job.format), job.processed_rows, None)
+            while batch := list(itertools.islice(rows, config.IMPORT_BATCH_SIZE)):
+                imported, batch_errors, project_ids = _import_batch(connection, batch)
+                errors = (errors + batch_errors)[:config.IMPORT_MAX_ERRORS]
+                if not _update(connection, job_id, owner,
+                               processed_rows=ImportJob.processed_rows + len(batch),
+                               imported_rows=ImportJob.imported_rows + imported,
+                               failed_rows=ImportJob.failed_rows + len(batch_errors),
+                               errors=[error.model_dump() for error in errors]):
+                    # Drops the batch's rows, the new owner imports them
+                    connection.rollback()
+                    logger.warning("Import %s was taken over by another worker", job_id)
+                    return
+                connection.commit()
+                if imported:
+                    read_cache.bump(TASKS, PROJECTS, *map(project_namespace, project_ids))
+                    change_events.publish_import(project_ids)
+        except Exception as e:
+            # Retrying would run into the same problem, the job reports it instead
+            logger.exception("Import %s failed", job_id)
+            connection.rollback()
+            if _finish(connection, job_id, owner, import_dtos.ImportStatus.FAILED, detail=str(e)):
+                _remove_upload(job.path)
+        else:
+            if _finish(connection, job_id, owner, import_dtos.ImportStatus.DONE):
+                _remove_upload(job.path)
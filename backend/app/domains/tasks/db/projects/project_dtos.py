@@ -1,7 +1,7 @@
 from enum import Enum
 from pydantic import BaseModel, ConfigDict
 import datetime
-from app.domains.tasks.db.tasks.task_dtos import Task
+from app.domains.tasks.db.tasks.task_dtos import Sort, Task
 
 
 class Status(Enum):
@@ -22,6 +22,14 @@ class Priority(Enum):
         return self.value
 
 
+class Include(Enum):
+    TASKS = 'tasks'
+    NONE = 'none'
+
+    def __str__(self):
+        return self.value
+
+
 class ProjectBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -40,6 +48,17 @@ class ProjectUpdate(ProjectBase):
     title: str | None = None
 
 
+class ProjectFilter(BaseModel):
+    """
+    List filters, each one left as None is not applied
+    """
+    status: list[Status] | None = None
+    priority: list[Priority] | None = None
+    assignee: str | None = None
+    due_from: datetime.date | None = None
+    due_to: datetime.date | None = None
+
+
 class Project(ProjectBase):
     id: int
     title: str
@@ -1,42 +1,218 @@
+import datetime
+from typing import NamedTuple
 from app.domains.tasks.db.projects import project_dtos
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.db.columns import field_columns, model_columns
+from app.domains.tasks.db.filtering import CURSOR_SORT, apply_filters, apply_page, apply_sort
+from app.domains.tasks.db.read_cache import invalidate_projects
+from app.domains.tasks.db.changes import change_events
+from app.domains.tasks.db.changes.change_dtos import Action
+from app.domains.tasks.db.tasks import task_entity
+from app.domains.tasks.db.tasks.task_repository import TASK_COLUMNS
 from . import project_entity
 
+# Read paths select these instead of the entity and build plain dicts
+PROJECT_COLUMNS = model_columns(project_entity.Project, project_dtos.Project)
 
-def get_project(db: Session, project_id: int):
-    return db.query(project_entity.Project).filter(project_entity.Project.id == project_id).first()
 
+# Project.tasks can't be lazy loaded on an AsyncSession, so it is either
+# loaded up front or, for include=none, not loaded at all. Reads go through
+# get_project_row and get_projects, these ORM loads only back writes.
+def _select_projects(include: project_dtos.Include = project_dtos.Include.TASKS):
+    if include == project_dtos.Include.NONE:
+        loader = noload(project_entity.Project.tasks)
+    else:
+        loader = selectinload(project_entity.Project.tasks)
+    return select(project_entity.Project).options(loader)
 
-def get_project_by_title(db: Session, title: str) -> project_dtos.ProjectBase:
-    return db.query(project_entity.Project).filter(project_entity.Project.title == title).first()
 
+async def get_project(db: AsyncSession, project_id: int, include: project_dtos.Include = project_dtos.Include.TASKS):
+    return await db.scalar(_select_projects(include).filter(project_entity.Project.id == project_id))
 
-def get_projects(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(project_entity.Project).order_by(project_entity.Project.created_at.desc()).offset(skip).limit(limit).all()
 
+async def _attach_tasks(db: AsyncSession, projects: list[dict], include: project_dtos.Include):
+    """
+    Set the "tasks" of each project dict, loading all of them in one query
+    """
+    tasks_by_project_id = {}
+    for project in projects:
+        project["tasks"] = tasks_by_project_id[project["id"]] = []
+    if include == project_dtos.Include.NONE or not projects:
+        return
+    result = await db.execute(select(*TASK_COLUMNS).filter(
+        task_entity.Task.project_id.in_(tasks_by_project_id)).order_by(task_entity.Task.id))
+    for row in result:
+        tasks_by_project_id[row.project_id].append(row._asdict())
 
-def create_project(db: Session, project: project_dtos.ProjectCreate):
-    db_project = project_entity.Project(
-        **project.model_dump(exclude_unset=True))
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-    return db_project
+
+async def get_project_row(db: AsyncSession, project_id: int, include: project_dtos.Include = project_dtos.Include.TASKS,
+                          fields: tuple[str, ...] | None = None):
+    """
+    Dict of the project_dtos.Project fields, or only of fields, for read-only use
+    """
+    result = await db.execute(select(*field_columns(PROJECT_COLUMNS, fields)).filter(
+        project_entity.Project.id == project_id))
+    row = result.first()
+    if row is None:
+        return None
+    project = row._asdict()
+    await _attach_tasks(db, [project], include)
+    return project
+
+
+async def get_project_by_title(db: AsyncSession, title: str) -> project_dtos.ProjectBase:
+    return await db.scalar(_select_projects(project_dtos.Include.NONE).filter(project_entity.Project.title == title))
+
+
+async def get_existing_project_ids(db: AsyncSession, project_ids: set[int]) -> set[int]:
+    """
+    The project_ids that exist, locked FOR KEY SHARE until the transaction
+    ends so they can't be deleted before tasks referencing them are written
+    """
+    if not project_ids:
+        return set()
+    result = await db.scalars(select(project_entity.Project.id).filter(
+        project_entity.Project.id.in_(project_ids)).with_for_update(read=True, key_share=True))
+    return set(result.all())
+
+
+def _page(query, skip: int, cursor: str | None, filters: project_dtos.ProjectFilter | None, sort: project_dtos.Sort):
+    query = apply_filters(query, project_entity.Project, filters)
+    query = apply_sort(query, project_entity.Project, sort)
+    return apply_page(query, project_entity.Project, skip, cursor, sort)
+
+
+async def get_projects(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                       include: project_dtos.Include = project_dtos.Include.TASKS,
+                       filters: project_dtos.ProjectFilter | None = None, sort: project_dtos.Sort = CURSOR_SORT,
+                       fields: tuple[str, ...] | None = None):
+    """
+    Dicts of the project_dtos.Project fields, or only of fields, for read-only use
+    """
+    columns = field_columns(PROJECT_COLUMNS, fields)
+    result = await db.execute(_page(select(*columns), skip, cursor, filters, sort).limit(limit))
+    projects = [row._asdict() for row in result]
+    await _attach_tasks(db, projects, include)
+    return projects
+
+
+async def stream_projects(db: AsyncSession, filters: project_dtos.ProjectFilter | None = None,
+                          sort: project_dtos.Sort = CURSOR_SORT, batch_size: int = 1000):
+    """
+    Every matching project row, without tasks, in partitions of batch_size
+    read through a server-side cursor
+    """
+    query = apply_sort(apply_filters(select(*PROJECT_COLUMNS), project_entity.Project, filters),
+                       project_entity.Project, sort)
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield partition
 
 
-def update_project(db: Session, project_id: int, project: project_dtos.ProjectUpdate):
-    db_project = db.query(project_entity.Project).filter(
-        project_entity.Project.id == project_id).first()
-    for key, value in project.model_dump(exclude_unset=True).items():
-        setattr(db_project, key, value)
-    db.commit()
-    db.refresh(db_project)
+class ProjectVersion(NamedTuple):
+    """
+    Changes whenever the representation of a project does. Its tasks count
+    too, unless they aren't included: deleting or moving one changes the
+    count, editing or adding one the latest updated_at.
+    """
+    id: int
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    task_count: int | None = None
+    tasks_updated_at: datetime.datetime | None = None
+
+    @classmethod
+    def of(cls, project: dict, include: project_dtos.Include = project_dtos.Include.TASKS):
+        version = cls(project["id"], project["created_at"], project["updated_at"])
+        if include == project_dtos.Include.NONE:
+            return version
+        return version._replace(
+            task_count=len(project["tasks"]),
+            tasks_updated_at=max((task["updated_at"] for task in project["tasks"]), default=None))
+
+
+def _version_columns(include: project_dtos.Include) -> list:
+    Project, Task = project_entity.Project, task_entity.Task
+    columns = [Project.id, Project.created_at, Project.updated_at]
+    if include != project_dtos.Include.NONE:
+        # Both aggregates seek through ix_tasks_project_id_created_at_id
+        columns += [
+            select(func.count(Task.id)).filter(Task.project_id == Project.id).scalar_subquery(),
+            select(func.max(Task.updated_at)).filter(Task.project_id == Project.id).scalar_subquery(),
+        ]
+    return columns
+
+
+async def get_project_version(db: AsyncSession, project_id: int,
+                              include: project_dtos.Include = project_dtos.Include.TASKS) -> ProjectVersion | None:
+    """
+    Version of a project, without loading it or its tasks
+    """
+    result = await db.execute(select(*_version_columns(include)).filter(project_entity.Project.id == project_id))
+    row = result.first()
+    return None if row is None else ProjectVersion(*row)
+
+
+async def get_project_versions(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                               include: project_dtos.Include = project_dtos.Include.TASKS,
+                               filters: project_dtos.ProjectFilter | None = None,
+                               sort: project_dtos.Sort = CURSOR_SORT) -> list[ProjectVersion]:
+    """
+    Versions of the projects get_projects would return, without loading them
+    """
+    result = await db.execute(_page(select(*_version_columns(include)), skip, cursor, filters, sort).limit(limit))
+    return [ProjectVersion(*row) for row in result]
+
+
+async def create_project(db: AsyncSession, project: project_dtos.ProjectCreate):
+    db_project = await db.scalar(insert(project_entity.Project).values(
+        **project.model_dump(exclude_unset=True)).returning(project_entity.Project))
+    await db.commit()
+    await invalidate_projects([db_project.id])
+    # A new project has no tasks, no need to query for them
+    set_committed_value(db_project, "tasks", [])
+    await change_events.publish_projects(Action.CREATED, [db_project])
     return db_project
 
 
-def delete_project(db: Session, project_id: int):
-    db_project = db.query(project_entity.Project).filter(
-        project_entity.Project.id == project_id).first()
-    db.delete(db_project)
-    db.commit()
+# Writes below return None when no row matched project_id
+async def update_project(db: AsyncSession, project_id: int, project: project_dtos.ProjectUpdate):
+    update_data = project.model_dump(exclude_unset=True)
+    if not update_data:
+        return await get_project(db, project_id)
+    # selectin is the only eager loader that can follow an UPDATE .. RETURNING
+    db_project = await db.scalar(update(project_entity.Project).filter(
+        project_entity.Project.id == project_id).values(**update_data).returning(project_entity.Project).options(selectinload(project_entity.Project.tasks)))
+    await db.commit()
+    if db_project is not None:
+        await invalidate_projects([project_id])
+        await change_events.publish_projects(Action.UPDATED, [db_project])
     return db_project
+
+
+async def delete_project(db: AsyncSession, project_id: int):
+    """
+    Dict of the deleted project, without tasks
+    """
+    # Detach the project's tasks in the same statement so the foreign key
+    # holds. The ORM can't return their ids next to the project, so this
+    # runs against the tables.
+    tasks = task_entity.Task.__table__
+    detached_tasks = update(tasks).filter(
+        tasks.c.project_id == project_id).values(project_id=None).returning(tasks.c.id).cte("detached_tasks")
+    result = await db.execute(delete(project_entity.Project.__table__).filter(
+        project_entity.Project.id == project_id).add_cte(detached_tasks).returning(
+        *PROJECT_COLUMNS, select(func.array_agg(detached_tasks.c.id)).scalar_subquery().label("task_ids")))
+    row = result.first()
+    await db.commit()
+    if row is None:
+        return None
+    project = row._asdict()
+    task_ids = project.pop("task_ids") or []
+    project["tasks"] = []
+    await invalidate_projects([project_id], task_ids)
+    await change_events.publish_projects(Action.DELETED, [project], task_ids)
+    return project
@@ -0,0 +1,41 @@
+import typing as t
+
+from app.core.cache import read_cache
+
+# Namespaces of cached reads. A task or project namespace holds the reads
+# of that row, a project's including its tasks. The first list pages depend
+# on every task or project, and project pages include tasks too.
+TASKS = "tasks"
+PROJECTS = "projects"
+
+
+def task_namespace(task_id: int) -> str:
+    return f"task:{task_id}"
+
+
+def project_namespace(project_id: int) -> str:
+    return f"project:{project_id}"
+
+
+async def invalidate_tasks(task_ids: t.Iterable[int], project_ids: t.Iterable[int | None] = ()):
+    """
+    Drop the cached reads of tasks and of the projects they were or are in
+    """
+    await read_cache.invalidate(
+        TASKS, PROJECTS,
+        *(task_namespace(task_id) for task_id in task_ids),
+        *(project_namespace(project_id) for project_id in project_ids if project_id is not None),
+    )
+
+
+async def invalidate_projects(project_ids: t.Iterable[int], task_ids: t.Iterable[int] = ()):
+    """
+    Drop the cached reads of projects, and of tasks whose project changed
+    """
+    task_namespaces = [task_namespace(task_id) for task_id in task_ids]
+    await read_cache.invalidate(
+        PROJECTS,
+        *(project_namespace(project_id) for project_id in project_ids),
+        *([TASKS] if task_namespaces else []),
+        *task_namespaces,
+    )
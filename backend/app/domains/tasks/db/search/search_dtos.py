@@ -0,0 +1,17 @@
+from enum import Enum
+from pydantic import BaseModel
+
+
+class ResultType(Enum):
+    TASK = 'task'
+    PROJECT = 'project'
+
+    def __str__(self):
+        return self.value
+
+
+class SearchResult(BaseModel):
+    type: ResultType
+    id: int
+    title: str
+    rank: float
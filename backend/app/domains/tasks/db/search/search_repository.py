@@ -0,0 +1,54 @@
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domains.tasks.db.search import search_dtos
+from app.domains.tasks.db.tasks import task_entity
+from app.domains.tasks.db.projects import project_entity
+
+# Must match the configuration of the search_vector columns
+TEXT_SEARCH_CONFIG = 'english'
+
+ENTITIES = {
+    search_dtos.ResultType.TASK: task_entity.Task,
+    search_dtos.ResultType.PROJECT: project_entity.Project,
+}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _ranked(db: AsyncSession, queries, skip: int, limit: int):
+    matches = union_all(*queries).subquery()
+    result = await db.execute(select(matches).order_by(
+        matches.c.rank.desc(), matches.c.type, matches.c.id).offset(skip).limit(limit))
+    return [search_dtos.SearchResult.model_validate(row._mapping) for row in result]
+
+
+async def search(db: AsyncSession, q: str, types: list[search_dtos.ResultType], skip: int = 0, limit: int = 20):
+    """
+    Full-text search of titles and descriptions, best matches first.
+    q takes web search syntax: "quoted phrases", or, -excluded.
+    """
+    ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, q)
+    queries = [
+        # Matching goes through the GIN index on search_vector, only matches get ranked
+        select(literal(str(type_)).label("type"), entity.id, entity.title,
+               func.ts_rank_cd(entity.search_vector, ts_query).label("rank"))
+        .filter(entity.search_vector.op("@@")(ts_query))
+        for type_, entity in ENTITIES.items() if type_ in types
+    ]
+    return await _ranked(db, queries, skip, limit)
+
+
+async def typeahead(db: AsyncSession, q: str, types: list[search_dtos.ResultType], limit: int = 10):
+    """
+    Titles starting with q, case insensitive, closest matches first
+    """
+    queries = [
+        # ILIKE is served by the pg_trgm index on title once q has 3 characters
+        select(literal(str(type_)).label("type"), entity.id, entity.title,
+               func.similarity(entity.title, q).label("rank"))
+        .filter(entity.title.ilike(_escape_like(q) + "%", escape="\\"))
+        for type_, entity in ENTITIES.items() if type_ in types
+    ]
+    return await _ranked(db, queries, 0, limit)
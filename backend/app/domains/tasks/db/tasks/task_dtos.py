@@ -21,6 +21,22 @@ class Priority(Enum):
         return self.value
 
 
+class Sort(Enum):
+    CREATED_AT = 'created_at'
+    CREATED_AT_DESC = '-created_at'
+    UPDATED_AT = 'updated_at'
+    UPDATED_AT_DESC = '-updated_at'
+    DUE_DATE = 'due_date'
+    DUE_DATE_DESC = '-due_date'
+    PRIORITY = 'priority'
+    PRIORITY_DESC = '-priority'
+    TITLE = 'title'
+    TITLE_DESC = '-title'
+
+    def __str__(self):
+        return self.value
+
+
 class TaskBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -45,3 +61,29 @@ class Task(TaskBase):
     title: str
     created_at: datetime.datetime
     updated_at: datetime.datetime
+
+
+class TaskFilter(BaseModel):
+    """
+    List filters, each one left as None is not applied
+    """
+    status: list[Status] | None = None
+    priority: list[Priority] | None = None
+    assignee: str | None = None
+    project_id: int | None = None
+    due_from: datetime.date | None = None
+    due_to: datetime.date | None = None
+
+
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
+
+class TaskBulkResult(BaseModel):
+    """
+    Outcome of one item of a bulk request, in request order
+    """
+    index: int
+    status_code: int
+    task: Task | None = None
+    detail: str | None = None
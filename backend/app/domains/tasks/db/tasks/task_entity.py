@@ -1,22 +1,43 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Enum, Text, Date, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Computed, Index, Column, ForeignKey, Integer, String, Enum, Text, Date, DateTime, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.db.session import Base
 from app.domains.tasks.db.tasks.task_dtos import Status, Priority
 
 
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_created_at_id', 'created_at', 'id'),
+        # Equality filters of the list endpoint, ending in the default sort
+        Index('ix_tasks_project_id_created_at_id', 'project_id', 'created_at', 'id'),
+        Index('ix_tasks_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_tasks_assignee_created_at_id', 'assignee', 'created_at', 'id'),
+        Index('ix_tasks_due_date_id', 'due_date', 'id'),
+        # -due_date keeps rows without one last, which a backward scan can't
+        Index('ix_tasks_due_date_desc_id', text('due_date DESC NULLS LAST'), text('id DESC')),
+        # Full-text search and title typeahead, see search_repository
+        Index('ix_tasks_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_tasks_title_trgm', 'title', postgresql_using='gin',
+              postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     due_date = Column(Date, nullable=True)
     assignee = Column(String(100), nullable=True)
-    status = Column(Enum(Status), nullable=True)
-    priority = Column(Enum(Priority), nullable=True)
+    status = Column(Enum(Status, native_enum=False, length=20), nullable=True)
+    priority = Column(Enum(Priority, native_enum=False, length=20), nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(),
                         onupdate=func.now(), nullable=False)
+    # Maintained by Postgres on every insert and update. Deferred so
+    # RETURNING and SELECTs of the entity don't carry it around.
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+        persisted=True)))
     project_id = Column(Integer, ForeignKey("projects.id"))
 
     project = relationship("Project", back_populates="tasks")
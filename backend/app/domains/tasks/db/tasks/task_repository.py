@@ -1,41 +1,176 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from app.domains.tasks.db.tasks import task_dtos, task_entity
 from app.domains.tasks.db.projects import project_entity
+from app.db.columns import field_columns, model_columns
+from app.domains.tasks.db.filtering import CURSOR_SORT, apply_filters, apply_page, apply_sort
+from app.domains.tasks.db.read_cache import invalidate_tasks
+from app.domains.tasks.db.changes import change_events
+from app.domains.tasks.db.changes.change_dtos import Action
 
+# Read paths select these instead of the entity and return plain rows
+TASK_COLUMNS = model_columns(task_entity.Task, task_dtos.Task)
 
-def get_task(db: Session, task_id: int):
-    return db.query(task_entity.Task).filter(task_entity.Task.id == task_id).first()
 
+async def get_task(db: AsyncSession, task_id: int):
+    return await db.scalar(select(task_entity.Task).filter(task_entity.Task.id == task_id))
 
-def get_task_by_title(db: Session, title: str) -> task_dtos.TaskBase:
-    return db.query(task_entity.Task).filter(task_entity.Task.title == title).first()
 
+async def get_task_row(db: AsyncSession, task_id: int, fields: tuple[str, ...] | None = None):
+    result = await db.execute(select(*field_columns(TASK_COLUMNS, fields)).filter(task_entity.Task.id == task_id))
+    return result.first()
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(task_entity.Task).order_by(task_entity.Task.created_at.desc()).offset(skip).limit(limit).all()
 
+async def get_task_version(db: AsyncSession, task_id: int):
+    """
+    (id, updated_at) of a task, enough to revalidate it without loading it
+    """
+    Task = task_entity.Task
+    result = await db.execute(select(Task.id, Task.updated_at).filter(Task.id == task_id))
+    return result.first()
 
-def create_task(db: Session, task: task_dtos.TaskCreate):
-    db_task = task_entity.Task(**task.model_dump(exclude_unset=True))
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+
+async def get_task_by_title(db: AsyncSession, title: str) -> task_dtos.TaskBase:
+    return await db.scalar(select(task_entity.Task).filter(task_entity.Task.title == title))
+
+
+def _select_tasks(columns, skip: int, cursor: str | None, filters: task_dtos.TaskFilter | None, sort: task_dtos.Sort):
+    query = apply_filters(select(*columns), task_entity.Task, filters)
+    query = apply_sort(query, task_entity.Task, sort)
+    return apply_page(query, task_entity.Task, skip, cursor, sort)
+
+
+async def get_tasks(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                    filters: task_dtos.TaskFilter | None = None, sort: task_dtos.Sort = CURSOR_SORT,
+                    fields: tuple[str, ...] | None = None):
+    """
+    Rows of the task_dtos.Task fields, or only of fields, for read-only use
+    """
+    columns = field_columns(TASK_COLUMNS, fields)
+    result = await db.execute(_select_tasks(columns, skip, cursor, filters, sort).limit(limit))
+    return result.all()
+
+
+async def stream_tasks(db: AsyncSession, filters: task_dtos.TaskFilter | None = None,
+                       sort: task_dtos.Sort = CURSOR_SORT, batch_size: int = 1000):
+    """
+    Every matching task row, in partitions of batch_size read through a
+    server-side cursor
+    """
+    query = apply_sort(apply_filters(select(*TASK_COLUMNS), task_entity.Task, filters), task_entity.Task, sort)
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield partition
+
+
+async def get_task_versions(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                            filters: task_dtos.TaskFilter | None = None, sort: task_dtos.Sort = CURSOR_SORT):
+    """
+    (id, created_at, updated_at) of the tasks get_tasks would return, enough
+    to tell whether a page changed without loading it
+    """
+    Task = task_entity.Task
+    result = await db.execute(_select_tasks(
+        [Task.id, Task.created_at, Task.updated_at], skip, cursor, filters, sort).limit(limit))
+    return result.all()
+
+
+async def create_task(db: AsyncSession, task: task_dtos.TaskCreate):
+    db_task = await db.scalar(insert(task_entity.Task).values(
+        **task.model_dump(exclude_unset=True)).returning(task_entity.Task))
+    await db.commit()
+    await invalidate_tasks([db_task.id], [db_task.project_id])
+    await change_events.publish_tasks(Action.CREATED, [db_task])
     return db_task
 
 
-def update_task(db: Session, task_id: int, task: task_dtos.TaskUpdate):
-    db_task = db.query(task_entity.Task).filter(
-        task_entity.Task.id == task_id).first()
-    for key, value in task.model_dump(exclude_unset=True).items():
-        setattr(db_task, key, value)
-    db.commit()
-    db.refresh(db_task)
+# Writes below return None when no row matched task_id
+async def update_task(db: AsyncSession, task_id: int, task: task_dtos.TaskUpdate):
+    update_data = task.model_dump(exclude_unset=True)
+    if not update_data:
+        return await get_task(db, task_id)
+    # The project the task leaves is invalidated and notified too, read in
+    # the same statement from the row as it was before the update
+    Task, tasks = task_entity.Task, task_entity.Task.__table__
+    old = select(tasks.c.id, tasks.c.project_id).filter(tasks.c.id == task_id).with_for_update().subquery("old")
+    # The ORM can't RETURNING columns of another FROM, so the UPDATE runs
+    # against the table in a CTE the tasks are loaded from
+    updated = update(tasks).filter(tasks.c.id == old.c.id).values(**update_data).returning(
+        *(column for column in tasks.c if column.key != "search_vector"),
+        old.c.project_id.label("previous_project_id")).cte("updated")
+    row = (await db.execute(select(aliased(Task, updated), updated.c.previous_project_id).execution_options(
+        populate_existing=True))).first()
+    await db.commit()
+    if row is None:
+        return None
+    db_task, previous_project_id = row
+    await invalidate_tasks([task_id], {previous_project_id, db_task.project_id})
+    await change_events.publish_tasks(Action.UPDATED, [db_task], {task_id: previous_project_id})
     return db_task
 
 
-def delete_task(db: Session, task_id: int):
-    db_task = db.query(task_entity.Task).filter(
-        task_entity.Task.id == task_id).first()
-    db.delete(db_task)
-    db.commit()
+async def delete_task(db: AsyncSession, task_id: int):
+    db_task = await db.scalar(delete(task_entity.Task).filter(
+        task_entity.Task.id == task_id).returning(task_entity.Task))
+    await db.commit()
+    if db_task is not None:
+        await invalidate_tasks([task_id], [db_task.project_id])
+        await change_events.publish_tasks(Action.DELETED, [db_task])
     return db_task
+
+
+async def create_tasks(db: AsyncSession, tasks: list[task_dtos.TaskCreate]):
+    """
+    Insert tasks with batched multi-row INSERT .. RETURNING, in input order
+    """
+    if not tasks:
+        return []
+    # Dump every field so all rows share one key set and batch together
+    result = await db.scalars(insert(task_entity.Task).returning(task_entity.Task, sort_by_parameter_order=True), [task.model_dump() for task in tasks])
+    db_tasks = result.all()
+    await db.commit()
+    await invalidate_tasks([db_task.id for db_task in db_tasks], {db_task.project_id for db_task in db_tasks})
+    await change_events.publish_tasks(Action.CREATED, db_tasks)
+    return db_tasks
+
+
+async def update_tasks(db: AsyncSession, tasks: list[task_dtos.TaskBulkUpdate]):
+    """
+    Apply partial updates by id with executemany, returning the updated
+    tasks by id. Ids that don't exist are skipped.
+    """
+    task_ids = {task.id for task in tasks}
+    result = await db.execute(select(task_entity.Task.id, task_entity.Task.project_id).filter(
+        task_entity.Task.id.in_(task_ids)).with_for_update())
+    # Project of each task before the update
+    project_ids = dict(result.all())
+    existing_ids = set(project_ids)
+
+    update_data = [task.model_dump(exclude_unset=True) | {"id": task.id}
+                   for task in tasks if task.id in existing_ids]
+    # executemany batches consecutive rows that set the same columns
+    update_data.sort(key=lambda values: sorted(values))
+    if update_data:
+        await db.execute(update(task_entity.Task), update_data)
+
+    result = await db.scalars(select(task_entity.Task).filter(
+        task_entity.Task.id.in_(existing_ids)).execution_options(populate_existing=True))
+    db_tasks = {db_task.id: db_task for db_task in result.all()}
+    await db.commit()
+    await invalidate_tasks(existing_ids, set(project_ids.values()) | {db_task.project_id for db_task in db_tasks.values()})
+    await change_events.publish_tasks(Action.UPDATED, db_tasks.values(), project_ids)
+    return db_tasks
+
+
+async def delete_tasks(db: AsyncSession, task_ids: list[int]):
+    """
+    Delete tasks in one statement, returning the deleted tasks by id
+    """
+    result = await db.scalars(delete(task_entity.Task).filter(
+        task_entity.Task.id.in_(task_ids)).returning(task_entity.Task))
+    db_tasks = {db_task.id: db_task for db_task in result.all()}
+    await db.commit()
+    await invalidate_tasks(db_tasks, {db_task.project_id for db_task in db_tasks.values()})
+    await change_events.publish_tasks(Action.DELETED, db_tasks.values())
+    return db_tasks
@@ -136,3 +136,35 @@ def test_unauthorized_routes(client, user_token_headers):
     assert response.status_code == 403
     response = client.get("/api/v1/users/123", headers=user_token_headers)
     assert response.status_code == 403
+
+
+def test_edit_user_invalidates_current_user(
+    client, test_user, user_token_headers, superuser_token_headers
+):
+    response = client.get("/api/v1/users/me", headers=user_token_headers)
+    assert response.status_code == 200
+
+    response = client.put(
+        f"/api/v1/users/{test_user.id}",
+        json={"is_active": False},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/users/me", headers=user_token_headers)
+    assert response.status_code == 400
+
+
+def test_delete_user_invalidates_current_user(
+    client, test_user, user_token_headers, superuser_token_headers
+):
+    response = client.get("/api/v1/users/me", headers=user_token_headers)
+    assert response.status_code == 200
+
+    response = client.delete(
+        f"/api/v1/users/{test_user.id}", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/users/me", headers=user_token_headers)
+    assert response.status_code == 401
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request, Depends, Response, encoders
 import typing as t
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.domains.users.db.user_repository import (
     get_users,
     get_user,
@@ -22,13 +22,13 @@ users_router = r = APIRouter()
 )
 async def users_list(
     response: Response,
-    db=Depends(get_db),
+    db=Depends(get_async_db),
     current_user=Depends(get_current_active_superuser),
 ):
     """
     Get all users
     """
-    users = get_users(db)
+    users = await get_users(db)
     # This is necessary for react-admin to work
     response.headers["Content-Range"] = f"0-9/{len(users)}"
     return users
@@ -50,13 +50,13 @@ async def user_me(current_user=Depends(get_current_active_user)):
 async def user_details(
     request: Request,
     user_id: int,
-    db=Depends(get_db),
+    db=Depends(get_async_db),
     current_user=Depends(get_current_active_superuser),
 ):
     """
     Get any user details
     """
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     return user
     # return encoders.jsonable_encoder(
     #     user, skip_defaults=True, exclude_none=True,
@@ -67,13 +67,13 @@ async def user_details(
 async def user_create(
     request: Request,
     user: UserCreate,
-    db=Depends(get_db),
+    db=Depends(get_async_db),
     current_user=Depends(get_current_active_superuser),
 ):
     """
     Create a new user
     """
-    return create_user(db, user)
+    return await create_user(db, user)
 
 
 @r.put(
@@ -83,13 +83,13 @@ async def user_edit(
     request: Request,
     user_id: int,
     user: UserEdit,
-    db=Depends(get_db),
+    db=Depends(get_async_db),
     current_user=Depends(get_current_active_superuser),
 ):
     """
     Update existing user
     """
-    return edit_user(db, user_id, user)
+    return await edit_user(db, user_id, user)
 
 
 @r.delete(
@@ -98,10 +98,10 @@ async def user_edit(
 async def user_delete(
     request: Request,
     user_id: int,
-    db=Depends(get_db),
+    db=Depends(get_async_db),
     current_user=Depends(get_current_active_superuser),
 ):
     """
     Delete existing user
     """
-    return delete_user(db, user_id)
+    return await delete_user(db, user_id)
@@ -1,70 +1,96 @@
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import typing as t
 
 from . import user_entity, user_dtos
-from app.core.security import get_password_hash
+from app.core import security
+from app.domains.auth.principal_cache import invalidate_user
 
 
-def get_user(db: Session, user_id: int):
-    user = db.query(user_entity.User).filter(
-        user_entity.User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    user = await db.scalar(select(user_entity.User).filter(
+        user_entity.User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-def get_user_by_email(db: Session, email: str) -> user_dtos.UserBase:
-    return db.query(user_entity.User).filter(user_entity.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> user_dtos.UserBase:
+    return await db.scalar(select(user_entity.User).filter(user_entity.User.email == email))
 
 
-def get_users(
-    db: Session, skip: int = 0, limit: int = 100
+async def get_users(
+    db: AsyncSession, skip: int = 0, limit: int = 100
 ) -> t.List[user_dtos.UserOut]:
-    return db.query(user_entity.User).offset(skip).limit(limit).all()
-
-
-def create_user(db: Session, user: user_dtos.UserCreate):
-    hashed_password = get_password_hash(user.password)
-    db_user = user_entity.User(
-        first_name=user.first_name,
-        last_name=user.last_name,
-        email=user.email,
-        is_active=user.is_active,
-        is_superuser=user.is_superuser,
-        hashed_password=hashed_password,
+    result = await db.scalars(select(user_entity.User).offset(skip).limit(limit))
+    return result.all()
+
+
+async def create_user(db: AsyncSession, user: user_dtos.UserCreate):
+    hashed_password = await security.get_password_hash_async(user.password)
+    db_user = await db.scalar(
+        insert(user_entity.User)
+        .values(
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            hashed_password=hashed_password,
+        )
+        .returning(user_entity.User)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     return db_user
 
 
-def delete_user(db: Session, user_id: int):
-    user = get_user(db, user_id)
+async def delete_user(db: AsyncSession, user_id: int):
+    user = await db.scalar(
+        delete(user_entity.User)
+        .filter(user_entity.User.id == user_id)
+        .returning(user_entity.User)
+    )
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="User not found")
-    db.delete(user)
-    db.commit()
+    await db.commit()
+    await invalidate_user(user_id)
     return user
 
 
-def edit_user(
-    db: Session, user_id: int, user: user_dtos.UserEdit
+async def edit_user(
+    db: AsyncSession, user_id: int, user: user_dtos.UserEdit
 ) -> user_dtos.User:
-    db_user = get_user(db, user_id)
-    if not db_user:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="User not found")
     update_data = user.model_dump(exclude_unset=True)
 
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(user.password)
+        update_data["hashed_password"] = await security.get_password_hash_async(
+            user.password
+        )
         del update_data["password"]
 
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
+    if not update_data:
+        return await get_user(db, user_id)
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db_user = await db.scalar(
+        update(user_entity.User)
+        .filter(user_entity.User.id == user_id)
+        .values(**update_data)
+        .returning(user_entity.User)
+    )
+    if not db_user:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="User not found")
+    await db.commit()
+    await invalidate_user(user_id)
     return db_user
+
+
+async def update_password_hash(
+    db: AsyncSession, user_id: int, hashed_password: str
+):
+    await db.execute(
+        update(user_entity.User)
+        .filter(user_entity.User.id == user_id)
+        .values(hashed_password=hashed_password)
+    )
+    await db.commit()
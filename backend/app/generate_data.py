@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Synthetic users, projects and tasks in production volumes, for capacity
+testing. Chunks of rows are generated by a pool of processes, each one
+loaded with COPY in its own transaction. The same seed, end date, chunk
+size and starting ids generate the same rows, whatever the number of
+workers.
+
+    python -m app.generate_data --users 10000 --projects 100000 --tasks 10000000 --seed 1
+
+initial_data.py takes the same options to generate on top of its rows.
+"""
+import argparse
+import dataclasses
+import datetime
+import io
+import math
+import random
+import time
+import typing as t
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from sqlalchemy import func, select, text
+
+from app.core import security
+from app.db.copy import copy_line
+from app.db.session import engine
+from app.domains.tasks.db.projects import project_dtos, project_entity
+from app.domains.tasks.db.tasks import task_dtos, task_entity
+from app.domains.users.db import user_entity
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+               "Maria", "Wei", "Aisha", "Mateo", "Yuki", "Olga", "Kwame", "Priya", "Lars", "Fatima"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Okafor", "Novak", "Kim", "Müller", "Rossi", "Silva", "Patel",
+              "Nguyen", "Johansson", "Cohen", "Kowalski", "Haddad", "Tanaka", "Dubois", "Ivanova", "Brown", "Diaz"]
+VERBS = ["Review", "Fix", "Implement", "Document", "Refactor", "Test", "Design", "Deploy", "Migrate", "Plan"]
+SUBJECTS = ["login flow", "billing page", "search index", "onboarding emails", "API rate limits",
+            "mobile layout", "export job", "audit log", "dashboard charts", "release notes",
+            "database backups", "payment retries", "user settings", "CI pipeline", "error reporting"]
+PROJECT_NAMES = ["Apollo", "Borealis", "Cascade", "Delta", "Ember", "Falcon", "Granite", "Harbor",
+                 "Iris", "Juniper", "Keystone", "Lighthouse", "Meridian", "Nimbus", "Orchid", "Phoenix"]
+WORDS = ["customer", "request", "follow", "up", "with", "team", "before", "release", "update", "the",
+         "tests", "check", "edge", "cases", "and", "report", "back", "on", "progress", "blocked", "by"]
+
+PRIORITIES = [task_dtos.Priority.LOW, task_dtos.Priority.MEDIUM, task_dtos.Priority.HIGH]
+PRIORITY_WEIGHTS = [30, 50, 20]
+PROJECT_PRIORITIES = [project_dtos.Priority.LOW, project_dtos.Priority.MEDIUM, project_dtos.Priority.HIGH]
+
+USER_COLUMNS = ["id", "email", "first_name", "last_name", "hashed_password", "is_active", "is_superuser",
+                "created_at", "updated_at"]
+PROJECT_COLUMNS = ["id", "title", "description", "due_date", "assignee", "status", "priority",
+                   "created_at", "updated_at"]
+TASK_COLUMNS = ["id", "title", "description", "due_date", "assignee", "status", "priority", "project_id",
+                "created_at", "updated_at"]
+# The password of every generated user
+PASSWORD = "password"
+
+
+@dataclasses.dataclass(frozen=True)
+class Plan:
+    seed: int
+    users: int
+    projects: int
+    tasks: int
+    # Generated ids follow these, the largest ids before generating
+    first_user_id: int
+    first_project_id: int
+    first_task_id: int
+    # Rows are created over the days before end
+    end: datetime.datetime
+    days: int
+    hashed_password: str
+
+    def rng(self, kind: str, start: int) -> random.Random:
+        # String seeds are hashed the same way by every process
+        return random.Random(f"{self.seed}:{kind}:{start}")
+
+
+def skewed(rng: random.Random, count: int, power: float = 2.0) -> int:
+    """
+    An index below count, the lower ones the more likely the higher power:
+    a few projects hold many tasks and a few people are assigned most
+    """
+    return int(count * rng.random() ** power)
+
+
+def full_name(plan: Plan, index: int) -> str:
+    return f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_NAMES[(index // len(FIRST_NAMES) + plan.seed) % len(LAST_NAMES)]}"
+
+
+def assignee(plan: Plan, rng: random.Random, unassigned: float) -> str | None:
+    if not plan.users or rng.random() < unassigned:
+        return None
+    return full_name(plan, skewed(rng, plan.users))
+
+
+def created(plan: Plan, rng: random.Random) -> tuple[datetime.datetime, datetime.datetime, float]:
+    """
+    Creation and last update times, more of them recent, and the age in days
+    """
+    age = plan.days * rng.random() ** 1.5
+    created_at = plan.end - datetime.timedelta(days=age)
+    updated_at = created_at + datetime.timedelta(days=age * rng.random() ** 3)
+    return created_at, updated_at, age
+
+
+def status(rng: random.Random, age: float, done_after: float, statuses) -> t.Any:
+    """
+    Older work is more likely done, the rest split between to do and in progress
+    """
+    if rng.random() < age / (age + done_after):
+        return statuses.DONE
+    return statuses.IN_PROGRESS if rng.random() < 0.6 else statuses.TO_DO
+
+
+def description(rng: random.Random, present: float) -> str | None:
+    if rng.random() >= present:
+        return None
+    return " ".join(rng.choices(WORDS, k=rng.randint(5, 25))).capitalize() + "."
+
+
+def user_rows(plan: Plan, start: int, stop: int) -> t.Iterator[tuple]:
+    rng = plan.rng("users", start)
+    for index in range(start, stop):
+        first_name, last_name = full_name(plan, index).split(" ", 1)
+        created_at, updated_at, _ = created(plan, rng)
+        yield (plan.first_user_id + index + 1, f"user{plan.first_user_id + index + 1}.{plan.seed}@example.com",
+               first_name, last_name, plan.hashed_password, rng.random() < 0.95, False, created_at, updated_at)
+
+
+def project_rows(plan: Plan, start: int, stop: int) -> t.Iterator[tuple]:
+    rng = plan.rng("projects", start)
+    for index in range(start, stop):
+        created_at, updated_at, age = created(plan, rng)
+        due_date = created_at.date() + datetime.timedelta(days=rng.randint(30, 365)) if rng.random() < 0.9 else None
+        yield (plan.first_project_id + index + 1, f"{rng.choice(PROJECT_NAMES)} {rng.choice(SUBJECTS)}",
+               description(rng, 0.8), due_date, assignee(plan, rng, 0.02),
+               status(rng, age, 180, project_dtos.Status),
+               rng.choices(PROJECT_PRIORITIES, PRIORITY_WEIGHTS)[0], created_at, updated_at)
+
+
+def task_rows(plan: Plan, start: int, stop: int) -> t.Iterator[tuple]:
+    rng = plan.rng("tasks", start)
+    for index in range(start, stop):
+        created_at, updated_at, age = created(plan, rng)
+        # Mostly due within a few weeks of creation
+        due_date = (created_at.date() + datetime.timedelta(days=math.ceil(rng.expovariate(1 / 14)))
+                    if rng.random() < 0.8 else None)
+        project_id = (plan.first_project_id + skewed(rng, plan.projects) + 1
+                      if plan.projects and rng.random() < 0.9 else None)
+        yield (plan.first_task_id + index + 1, f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)}",
+               description(rng, 0.7), due_date, assignee(plan, rng, 0.05),
+               status(rng, age, 30, task_dtos.Status),
+               rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0], project_id, created_at, updated_at)
+
+
+TABLES = {
+    "users": (user_entity.User.__table__, USER_COLUMNS, user_rows),
+    "projects": (project_entity.Project.__table__, PROJECT_COLUMNS, project_rows),
+    "tasks": (task_entity.Task.__table__, TASK_COLUMNS, task_rows),
+}
+
+_plan: Plan | None = None
+
+
+def _init_worker(plan: Plan):
+    global _plan
+    _plan = plan
+    # Connections of the parent process can't be shared
+    engine.dispose(close=False)
+
+
+def load_chunk(kind: str, start: int, stop: int) -> int:
+    """
+    COPY the rows start to stop of kind, in a worker
+    """
+    table, columns, rows = TABLES[kind]
+    buffer = io.StringIO()
+    buffer.writelines(copy_line(row) for row in rows(_plan, start, stop))
+    buffer.seek(0)
+    statement = f"COPY {engine.dialect.identifier_preparer.format_table(table)} ({', '.join(columns)}) FROM STDIN"
+    with engine.begin() as connection:
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(statement, buffer)
+    return stop - start
+
+
+def _run_chunks(pool: ProcessPoolExecutor, plan: Plan, kinds: t.Sequence[str], chunk_size: int):
+    futures = [pool.submit(load_chunk, kind, start, min(start + chunk_size, getattr(plan, kind)))
+               for kind in kinds for start in range(0, getattr(plan, kind), chunk_size)]
+    for kind in kinds:
+        print(f"generating {getattr(plan, kind):,} {kind}")
+    wait(futures)
+    for future in futures:
+        # Raises the error of a failed chunk
+        future.result()
+
+
+def make_plan(users: int, projects: int, tasks: int, seed: int, end: datetime.date, days: int) -> Plan:
+    with engine.connect() as connection:
+        first_ids = [connection.scalar(select(func.coalesce(func.max(table.c.id), 0)))
+                     for table, _, _ in TABLES.values()]
+    return Plan(seed=seed, users=users, projects=projects, tasks=tasks, first_user_id=first_ids[0],
+                first_project_id=first_ids[1], first_task_id=first_ids[2],
+                end=datetime.datetime.combine(end, datetime.time()), days=days,
+                # Hashed once, hashing each user's would take hours
+                hashed_password=security.get_password_hash(PASSWORD))
+
+
+def generate(users: int, projects: int, tasks: int, seed: int = 0, end: datetime.date | None = None,
+             days: int = 730, workers: int = 4, chunk_size: int = 50_000):
+    """
+    Add users, projects and tasks created over the days before end,
+    today by default
+    """
+    started = time.perf_counter()
+    plan = make_plan(users, projects, tasks, seed, end or datetime.date.today(), days)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(plan,)) as pool:
+        # Tasks reference the projects
+        _run_chunks(pool, plan, ["users", "projects"], chunk_size)
+        _run_chunks(pool, plan, ["tasks"], chunk_size)
+
+    with engine.begin() as connection:
+        # Ids were given explicitly, move the sequences past them
+        for table, _, _ in TABLES.values():
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.fullname}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {engine.dialect.identifier_preparer.format_table(table)}), false)"))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+    print(f"generated in {time.perf_counter() - started:.1f}s")
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--projects", type=int, default=0)
+    parser.add_argument("--tasks", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None,
+                        help="Date rows are created up to, today by default")
+    parser.add_argument("--days", type=int, default=730, help="Days rows are created over")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per COPY")
+
+
+def generate_from_arguments(args: argparse.Namespace):
+    if args.users or args.projects or args.tasks:
+        generate(args.users, args.projects, args.tasks, seed=args.seed, end=args.end, days=args.days,
+                 workers=args.workers, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_arguments(parser)
+    generate_from_arguments(parser.parse_args())
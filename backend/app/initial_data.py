@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 
+import argparse
+import asyncio
 from random import choice
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
 from datetime import date
 from app.core import config
+from app.generate_data import add_arguments, generate_from_arguments
 from app.domains.users.db.user_repository import create_user, get_user_by_email
 from app.domains.users.db.user_dtos import UserCreate
 from app.domains.tasks.db.tasks.task_repository import create_task, get_task_by_title
@@ -75,36 +78,41 @@ tasks = [
 ]
 
 
-def init() -> None:
-    db = SessionLocal()
+async def init() -> None:
+    async with AsyncSessionLocal() as db:
+        admin_email = config.TEST_USERNAME
+        admin_password = config.TEST_PASSWORD
+        user = await get_user_by_email(db, admin_email)
 
-    admin_email = config.TEST_USERNAME
-    admin_password = config.TEST_PASSWORD
-    user = get_user_by_email(db, admin_email)
+        if not user:
+            print("Creating test superuser")
+            await create_user(
+                db,
+                UserCreate(
+                    email=admin_email,
+                    password=admin_password,
+                    is_active=True,
+                    is_superuser=True,
+                ),
+            )
+            print("Superuser created")
 
-    if not user:
-        print("Creating test superuser")
-        create_user(
-            db,
-            UserCreate(
-                email=admin_email,
-                password=admin_password,
-                is_active=True,
-                is_superuser=True,
-            ),
-        )
-        print("Superuser created")
+        for project in projects:
+            if not await get_project_by_title(db, project.title):
+                await create_project(db, project)
 
-    for project in projects:
-        if not get_project_by_title(db, project.title):
-            create_project(db, project)
-
-    for task in tasks:
-        if not get_task_by_title(db, task.title):
-            project = get_project_by_title(db, choice(projects).title)
-            task.project_id = project.id
-            create_task(db, task)
+        for task in tasks:
+            if not await get_task_by_title(db, task.title):
+                project = await get_project_by_title(db, choice(projects).title)
+                task.project_id = project.id
+                await create_task(db, task)
 
 
 if __name__ == "__main__":
-    init()
+    # Pass --users, --projects or --tasks to also generate that many
+    # synthetic rows, see generate_data.py
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args = parser.parse_args()
+    asyncio.run(init())
+    generate_from_arguments(args)
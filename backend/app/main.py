@@ -1,23 +1,42 @@
 from fastapi.middleware.cors import CORSMiddleware
 from app import celery_tasks
-from app.core.celery_app import celery_app
-from app.domains.auth.auth import get_current_active_user
-from app.db.session import SessionLocal
-from app.core import config
+from app.domains.auth.auth import (
+    get_current_active_user,
+    get_current_active_superuser,
+)
+from app.domains.auth.principal_cache import start_invalidation_listener
+from app.db.pagination import NEXT_CURSOR_HEADER
+from app.api.serialization import TimedORJSONResponse
+from app.api.metrics import MetricsMiddleware
+from app.api.timing import ServerTimingMiddleware, configure_access_log
+from app.core import config, metrics
 from app.domains.tasks.api.api_v1.routers.tasks import tasks_router
 from app.domains.tasks.api.api_v1.routers.projects import projects_router
+from app.domains.tasks.api.api_v1.routers.search import search_router
+from app.domains.tasks.api.api_v1.routers.imports import imports_router
+from app.domains.tasks.api.api_v1.routers.stream import stream_router
+from app.domains.tasks.db.changes.change_events import change_broadcaster
+from app.domains.analytics.api.api_v1.routers.analytics import analytics_router
 from app.domains.auth.api.api_v1.routers.auth import auth_router
 from app.domains.users.api.api_v1.routers.users import users_router
+from app.api.api_v1.routers.admin import admin_router
+from app.api.api_v1.routers.jobs import jobs_router
+from app.api.api_v1.routers.metrics import metrics_router
+from app.core.jobs import enqueue
+from starlette.concurrency import run_in_threadpool
 from fastapi import FastAPI, Depends
-from starlette.requests import Request
 import uvicorn
 import sys
 import debugpy
 
 
 app = FastAPI(
-    title=config.PROJECT_NAME, docs_url="/api/docs", openapi_url="/api"
+    title=config.PROJECT_NAME,
+    docs_url="/api/docs",
+    openapi_url="/api",
+    default_response_class=TimedORJSONResponse,
 )
+configure_access_log()
 
 origins = config.CORS_ORIGINS.split(',')
 
@@ -27,15 +46,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified", "Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
+# Outermost, so its total covers the other middlewares
+app.add_middleware(ServerTimingMiddleware)
+
 
+@app.on_event("startup")
+async def startup():
+    if config.PRINCIPAL_CACHE_REDIS_INVALIDATION:
+        start_invalidation_listener()
+    if config.CHANGE_EVENTS == "redis":
+        change_broadcaster.start_listener()
 
-@app.middleware("http")
-async def db_session_middleware(request: Request, call_next):
-    request.state.db = SessionLocal()
-    response = await call_next(request)
-    request.state.db.close()
-    return response
+
+@app.on_event("shutdown")
+async def shutdown():
+    metrics.mark_process_dead()
 
 
 @app.get("/api/v1")
@@ -45,9 +73,12 @@ async def root():
 
 @app.get("/api/v1/background_task")
 async def example_background_task():
-    celery_app.send_task("app.tasks.example_task", args=["Hello World"])
+    job_id = await run_in_threadpool(
+        enqueue, "app.celery_tasks.example_task", args=["Hello World"]
+    )
 
-    return {"message": "success"}
+    # Follow the job at /api/v1/jobs/{job_id}
+    return {"message": "success", "job_id": job_id}
 
 
 # Routers
@@ -71,6 +102,46 @@ app.include_router(
     tags=["projects"],
 )
 
+app.include_router(
+    imports_router,
+    prefix="/api/v1",
+    tags=["imports"],
+)
+
+app.include_router(
+    stream_router,
+    prefix="/api/v1",
+    tags=["stream"],
+)
+
+app.include_router(
+    search_router,
+    prefix="/api/v1",
+    tags=["search"],
+)
+
+app.include_router(
+    analytics_router,
+    prefix="/api/v1",
+    tags=["analytics"],
+)
+
+app.include_router(
+    jobs_router,
+    prefix="/api/v1",
+    tags=["jobs"],
+)
+
+# Scraped by Prometheus from the backend directly, outside of /api
+app.include_router(metrics_router, tags=["metrics"])
+
+app.include_router(
+    admin_router,
+    prefix="/api/v1",
+    tags=["admin"],
+    dependencies=[Depends(get_current_active_superuser)],
+)
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--debug":
         # Enable debugging and wait for the debugger to attach
@@ -1,15 +1,23 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy_utils import database_exists, create_database, drop_database
 from fastapi.testclient import TestClient
 import typing as t
 
-from app.core import config, security
-from app.db.session import Base, get_db
+from app.core import config, jobs, security
+from app.core.cache import memory_backend
+from app.core.timing import RequestTimings, current_timings
+from app.db.session import Base, get_async_db, get_async_url, instrument_engine
 from app.domains.users.db import user_entity
 from app.main import app
-from app.domains.users.db.user_repository import get_user_by_email
+from app.domains.auth.principal_cache import principal_cache
 import debugpy
 
 
@@ -17,6 +25,49 @@ def get_test_db_url() -> str:
     return f"{config.DATABASE_URL}_test"
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries): fail when a request of the test runs more statements",
+    )
+
+
+def statement_shape(statement: str) -> str:
+    """
+    statement with its parameters and IN lists collapsed, the same for
+    every run of a query
+    """
+    shape = re.sub(r"(\$\d+|%\(\w+\)s|%s)(::\w+(\[\])?)?", "?", statement)
+    shape = re.sub(r"\?(\s*,\s*\?)+", "?, ...", shape)
+    return " ".join(shape.split())
+
+
+class QueryRecorder:
+    """
+    Statements the app runs on the test database, per request
+    """
+
+    def __init__(self):
+        self.requests: t.Dict[RequestTimings, t.List[str]] = {}
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        timings = current_timings()
+        if timings is not None:
+            self.requests.setdefault(timings, []).append(statement)
+
+    def report(self, statements: t.List[str]) -> str:
+        """
+        Statements with the shapes run more than once first, an N+1
+        query shows as one shape repeated per row of another
+        """
+        shapes = Counter(map(statement_shape, statements))
+        repeated = [f"  {count}x {shape}" for shape, count in shapes.most_common() if count > 1]
+        return "\n".join(
+            (["Repeated statements:", *repeated] if repeated else [])
+            + ["Statements:", *(f"  {statement_shape(statement)}" for statement in statements)]
+        )
+
+
 @pytest.fixture
 def enable_debugging(request):
     # Enable debugging and wait for the debugger to attach
@@ -29,8 +80,10 @@ def enable_debugging(request):
 @pytest.fixture
 def test_db():
     """
-    Modify the db session to automatically roll back after each test.
-    This is to avoid tests affecting the database state of other tests.
+    A sync session on the test database, for setting up and checking rows.
+    Its transaction is rolled back after the test, but the app commits
+    through its own async engine, so that isolates nothing: tests are kept
+    apart by create_test_db creating and dropping the database around each.
     """
     # Connect to the test database
     engine = create_engine(
@@ -61,6 +114,23 @@ def test_db():
     connection.close()
 
 
+@pytest.fixture
+def explain(test_db):
+    """
+    EXPLAIN a select on the test database. Sequential scans and sorts are
+    discouraged, so even empty tables show whether an index gives the order.
+    """
+    test_db.execute(text("SET LOCAL enable_seqscan = off"))
+    test_db.execute(text("SET LOCAL enable_sort = off"))
+
+    def explain(query) -> str:
+        compiled = query.compile(dialect=test_db.bind.dialect, compile_kwargs={"literal_binds": True})
+        result = test_db.connection().exec_driver_sql(f"EXPLAIN {compiled}")
+        return "\n".join(row[0] for row in result)
+
+    return explain
+
+
 @pytest.fixture(autouse=True)
 def create_test_db():
     """
@@ -84,16 +154,119 @@ def create_test_db():
     drop_database(test_db_url)
 
 
+@pytest.fixture(autouse=True)
+def hash_passwords_in_threads(monkeypatch):
+    """
+    Monkeypatched hashing functions can't be sent to a process pool.
+    """
+    monkeypatch.setattr(config, "PASSWORD_HASH_EXECUTOR", "thread")
+
+
+@pytest.fixture(autouse=True)
+def validate_fast_responses(monkeypatch):
+    """
+    Check responses rendered from rows against their response model.
+    """
+    monkeypatch.setattr(config, "VALIDATE_FAST_RESPONSES", True)
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """
+    Users are recreated for every test, don't let them leak between tests.
+    """
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def memory_read_cache(monkeypatch):
+    """
+    Cache reads in process instead of Redis, empty for every test.
+    """
+    monkeypatch.setattr(config, "CACHE_BACKEND", "memory")
+    memory_backend.flushdb()
+
+
+@pytest.fixture(autouse=True)
+def memory_job_store(monkeypatch):
+    """
+    Keep job bookkeeping in the in-process stand-in instead of Redis.
+    """
+    monkeypatch.setattr(jobs, "get_redis", lambda: memory_backend)
+
+
+@pytest.fixture(autouse=True)
+def memory_change_events(monkeypatch):
+    """
+    Deliver change events within the process instead of through Redis.
+    """
+    monkeypatch.setattr(config, "CHANGE_EVENTS", "memory")
+
+
+@pytest.fixture
+def query_recorder() -> QueryRecorder:
+    return QueryRecorder()
+
+
 @pytest.fixture
-def client(test_db):
+def query_budget(query_recorder):
+    """
+    Context manager failing the test when a request sent within it runs
+    more than max_queries statements, with a report of what they were:
+
+        with query_budget(2):
+            client.get("/api/v1/projects")
+    """
+
+    @contextmanager
+    def budget(max_queries: int):
+        first = len(query_recorder.requests)
+        yield
+        for statements in list(query_recorder.requests.values())[first:]:
+            if len(statements) > max_queries:
+                pytest.fail(
+                    f"{len(statements)} statements in one request, over the budget of {max_queries}\n"
+                    + query_recorder.report(statements),
+                    pytrace=False,
+                )
+
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def query_budget_marker(request, query_budget):
+    """
+    Apply @pytest.mark.query_budget(max_queries) to every request of a test
+    """
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+    with query_budget(*marker.args, **marker.kwargs):
+        yield
+
+
+@pytest.fixture
+def client(test_db, query_recorder):
     """
     Get a TestClient instance that reads/write to the test database.
     """
+    # Each TestClient request runs on its own event loop, so asyncpg
+    # connections can't be pooled between requests
+    test_async_engine = create_async_engine(
+        get_async_url(get_test_db_url()), poolclass=NullPool
+    )
+    instrument_engine(test_async_engine.sync_engine)
+    event.listen(test_async_engine.sync_engine, "before_cursor_execute", query_recorder.record)
+    test_async_session_maker = async_sessionmaker(
+        bind=test_async_engine, autoflush=False, expire_on_commit=False
+    )
 
-    def get_test_db():
-        yield test_db
+    async def get_test_async_db():
+        async with test_async_session_maker() as db:
+            yield db
 
-    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_async_db] = get_test_async_db
 
     yield TestClient(app)
 
@@ -103,6 +276,14 @@ def test_password() -> str:
     return "securepassword"
 
 
+def get_user_by_email(db, email: str) -> user_entity.User:
+    return (
+        db.query(user_entity.User)
+        .filter(user_entity.User.email == email)
+        .first()
+    )
+
+
 def get_password_hash() -> str:
     """
     Password hashing can be expensive so a mock will be much faster